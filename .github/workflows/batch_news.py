@@ -0,0 +1,134 @@
+import os
+import sys
+import json
+import time
+import argparse
+import importlib
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from news_source import HEADLINES_ENV, fetch_headlines, parse_article
+import metrics
+
+# === CONFIG ===
+GNEWS_API_KEY = os.getenv("GNEWS_KEY")
+BATCH_DIR = Path("batch")
+# Read-only inputs and shared caches every deliverable's working directory links back to.
+SHARED_ITEMS = ("assets", "cookies.txt", ".cache")
+INTRO_VIDEO_PATH = "assets/intro.mp4"
+DELIVERABLES = {
+    # kind: (creator module, content video, final video after the intro merge)
+    "single": ("create_news_video", "final_content.mp4", "final_news.mp4"),
+    "combined": ("create_combined_news", "final_content_combined.mp4", "final_news_combined.mp4"),
+    "short": ("create_news_video_shorts", "final_content_shorts.mp4", "final_content_shorts.mp4"),
+}
+
+
+def prepare_workdir(workdir, root):
+    """Creates an isolated working directory with the shared assets and caches linked in."""
+    workdir.mkdir(parents=True, exist_ok=True)
+    for name in SHARED_ITEMS:
+        source, link = root / name, workdir / name
+        if name == ".cache": source.mkdir(exist_ok=True)
+        if source.exists() and not link.exists(): link.symlink_to(source.resolve())
+    return workdir
+
+
+def run_deliverable(kind, workdir, headlines_path=None, argv=()):
+    """
+    Runs one creator inside its own working directory; executed in a warm worker process.
+    Without `headlines_path` the creator fetches its own headlines.
+    """
+    module_name, content_video, final_video = DELIVERABLES[kind]
+    os.chdir(workdir)
+    if headlines_path: os.environ[HEADLINES_ENV] = str(headlines_path)
+    else: os.environ.pop(HEADLINES_ENV, None)
+    started = time.time()
+    module = importlib.import_module(module_name)
+    try:
+        module.main(["--fresh", *argv])
+    except SystemExit as e:
+        if e.code: return {"kind": kind, "workdir": str(workdir), "ok": False, "error": f"exit code {e.code}", "seconds": time.time() - started}
+    if not Path(content_video).exists():
+        return {"kind": kind, "workdir": str(workdir), "ok": False, "error": f"{content_video} was not produced", "seconds": time.time() - started}
+    if final_video != content_video:
+        from merge_intro_content import merge_videos_with_transition
+        merge_videos_with_transition(INTRO_VIDEO_PATH, content_video, final_video, output_kind="combined" if kind == "combined" else "longform")
+    ok = Path(final_video).exists()
+    return {"kind": kind, "workdir": str(workdir), "ok": ok, "video": str(Path(workdir) / final_video) if ok else None,
+            "metadata": str(Path(workdir) / "video_metadata.json"), "seconds": time.time() - started}
+
+
+def prefetch(headlines, max_workers=4):
+    """Scrapes every headline once into the shared article cache before the deliverables start."""
+    print(f"📚 Pre-parsing {len(headlines)} article(s) into the shared cache...")
+    def parse(article_data):
+        try: parse_article(article_data["url"])
+        except Exception as e: print(f"    ⚠️ Could not parse {article_data['url']}: {e}")
+    with ThreadPoolExecutor(max_workers=max_workers) as pool: list(pool.map(parse, headlines))
+
+
+def plan_deliverables(headlines, singles, combined, short):
+    """Splits headlines so concurrent single-story videos never pick the same story."""
+    jobs = []
+    for k in range(singles):
+        jobs.append(("single", f"single_{k}", headlines[k::singles]))
+    if combined: jobs.append(("combined", "combined", headlines))
+    if short: jobs.append(("short", "short", headlines))
+    return jobs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Produce several videos from one headline fetch.")
+    parser.add_argument("--singles", type=int, default=2, help="Number of single-story videos.")
+    parser.add_argument("--combined", action="store_true", help="Also produce the combined roundup.")
+    parser.add_argument("--short", action="store_true", help="Also produce a YouTube Short.")
+    parser.add_argument("--jobs", type=int, default=2, help="Deliverables rendered concurrently.")
+    parser.add_argument("--stream", action="store_true", help="Pass --stream to the combined roundup.")
+    parser.add_argument("--upload", action="store_true", help="Upload each video in the background as soon as it is finished.")
+    parser.add_argument("--upload-concurrency", type=int, default=2, help="Concurrent uploads when --upload is given.")
+    args = parser.parse_args(argv)
+
+    root = Path.cwd()
+    started = time.time()
+    headlines = fetch_headlines(GNEWS_API_KEY, max_articles=10)
+    if not headlines: print("❌ No headlines returned. Exiting."); sys.exit(1)
+    prefetch(headlines)
+
+    jobs = []
+    for kind, name, subset in plan_deliverables(headlines, args.singles, args.combined, args.short):
+        workdir = prepare_workdir(BATCH_DIR / name, root)
+        headlines_path = workdir / "headlines.json"
+        headlines_path.write_text(json.dumps(subset, indent=2))
+        extra = ["--stream"] if kind == "combined" and args.stream else []
+        jobs.append((kind, workdir.resolve(), headlines_path.resolve(), extra))
+    if not jobs: print("❌ Nothing to produce."); sys.exit(1)
+
+    uploader = None
+    if args.upload:
+        from upload_queue import UploadQueue, UploadWorker
+        upload_queue = UploadQueue()
+        uploader = UploadWorker(upload_queue, args.upload_concurrency).start()
+
+    print(f"🏭 Producing {len(jobs)} deliverable(s) with {args.jobs} concurrent worker(s)...")
+    results = []
+    with ProcessPoolExecutor(max_workers=args.jobs, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(run_deliverable, *job) for job in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            print(f"{'✅' if result['ok'] else '❌'} {result['kind']} in {result['workdir']} ({result['seconds']:.0f}s){'' if result['ok'] else ': ' + result['error']}")
+            if uploader and result["ok"]: upload_queue.enqueue(result["video"], result["metadata"], shorts=result["kind"] == "short")
+    os.chdir(root)
+    if uploader:
+        print("⏳ Waiting for queued uploads to finish...")
+        uploader.drain()
+
+    elapsed = time.time() - started
+    done = [r for r in results if r["ok"]]
+    (BATCH_DIR / "batch_results.json").write_text(json.dumps(results, indent=2))
+    print(f"\n🎉 Batch complete: {len(done)}/{len(results)} video(s) in {elapsed / 60:.1f} min ({len(done) / (elapsed / 3600):.1f} videos/hour).")
+    if not done: sys.exit(1)
+
+if __name__ == "__main__":
+    with metrics.run("batch_news"): main()
@@ -0,0 +1,355 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import resource
+import statistics
+import subprocess
+import threading
+import tempfile
+from pathlib import Path
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+# Offline benchmarks: synthetic media, a local stand-in for the HTTP APIs, and timings of the render
+# functions at several narration lengths and asset counts. Run from the repo root:
+#   python .github/workflows/benchmark.py --out bench.json [--compare baseline.json]
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_NARRATIONS = [30, 120]
+DEFAULT_ASSET_COUNTS = [4, 12]
+SHORTS_MAX_SECONDS = 58
+REGRESSION_THRESHOLD = 0.10
+CASES = ["acquire_images", "render_video", "create_story_video", "combine_videos", "create_shorts_video", "merge_videos_with_transition"]
+
+
+def ffmpeg(*args):
+    subprocess.run(["ffmpeg", "-y", "-v", "error", *args], check=True)
+
+
+def silent_mp3(path, seconds):
+    ffmpeg("-f", "lavfi", "-i", "anullsrc=r=24000:cl=mono", "-t", str(seconds), "-c:a", "libmp3lame", "-b:a", "64k", str(path))
+    return str(path)
+
+
+def tone_mp3(path, seconds, frequency=220):
+    ffmpeg("-f", "lavfi", "-i", f"sine=frequency={frequency}:sample_rate=44100", "-t", str(seconds), "-ac", "2", "-c:a", "libmp3lame", "-b:a", "128k", str(path))
+    return str(path)
+
+
+def test_clip(path, seconds, size="1920x1080", audio=False):
+    """testsrc2 video (plus a sine track if `audio`), encoded fast so fixture setup stays cheap."""
+    cmd = ["-f", "lavfi", "-i", f"testsrc2=size={size}:rate=30", "-t", str(seconds)]
+    if audio: cmd += ["-f", "lavfi", "-i", "sine=frequency=440:sample_rate=44100", "-t", str(seconds), "-ac", "2", "-c:a", "aac"]
+    ffmpeg(*cmd, "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p", str(path))
+    return str(path)
+
+
+def synthetic_image(width, height, seed):
+    """Noise under translucent shapes, so JPEG sizes and dHashes look like photos rather than flat colour."""
+    from PIL import Image, ImageDraw
+    rng = random.Random(seed)
+    img = Image.effect_noise((width, height), 40).convert("RGB")
+    draw = ImageDraw.Draw(img, "RGBA")
+    for _ in range(12):
+        x, y = rng.randrange(width), rng.randrange(height)
+        r = rng.randrange(min(width, height) // 8, min(width, height) // 2)
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=(rng.randrange(256), rng.randrange(256), rng.randrange(256), 160))
+    return img
+
+
+IMAGE_SIZES = [(4000, 3000), (1600, 1067), (1200, 1600), (2560, 1440)]
+
+def synthetic_images(directory, count, canvas, mode):
+    """Originals of mixed sizes and orientations, ingested the way the pipelines ingest downloads."""
+    from image_ingest import ingest_image
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(count):
+        original = directory / f"img_{i}.png"
+        synthetic_image(*IMAGE_SIZES[i % len(IMAGE_SIZES)], seed=i).save(original)
+        paths.append(ingest_image(original, canvas=canvas, mode=mode))
+    return paths
+
+
+def synthetic_ass(path, seconds, play_res=(1920, 1080)):
+    lines = max(1, int(seconds // 4))
+    fmt = lambda t: f"{int(t // 3600)}:{int(t % 3600 // 60):02d}:{t % 60:05.2f}"
+    events = "".join(f"Dialogue: 0,{fmt(i * seconds / lines)},{fmt((i + 1) * seconds / lines)},Default,,0,0,0,,Benchmark subtitle line {i + 1}\n" for i in range(lines))
+    Path(path).write_text(
+        f"[Script Info]\nScriptType: v4.00+\nPlayResX: {play_res[0]}\nPlayResY: {play_res[1]}\n\n[V4+ Styles]\n"
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding\n"
+        "Style: Default,Noto Sans,42,&H00FFFFFF,&H000000FF,&H00000000,&H99000000,-1,0,0,0,100,100,0,0,1,2,1,2,40,40,40,1\n\n"
+        "[Events]\nFormat: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n" + events, encoding="utf-8")
+    return str(path)
+
+
+# --- Local API stand-in ---
+class FakeAPIHandler(BaseHTTPRequestHandler):
+    """Answers GNews, Custom Search and Pexels photo searches, and serves the images they link to."""
+    images = {}
+
+    def log_message(self, *args): pass
+
+    def _json(self, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200); self.send_header("Content-Type", "application/json"); self.send_header("Content-Length", str(len(body))); self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        base = f"http://{self.server.server_address[0]}:{self.server.server_address[1]}"
+        count = int((query.get("num") or query.get("per_page") or query.get("max") or ["10"])[0])
+        if url.path == "/gnews":
+            self._json({"articles": [{"title": f"Benchmark story {i}", "url": f"{base}/article/{i}", "description": f"Synthetic story {i} for offline benchmarks."} for i in range(count)]})
+        elif url.path == "/customsearch":
+            self._json({"items": [{"link": f"{base}/image/{i}.jpg"} for i in range(count)]})
+        elif url.path == "/pexels/photos":
+            self._json({"photos": [{"src": {"large2x": f"{base}/image/{i}.jpg"}} for i in range(count)]})
+        elif url.path.startswith("/image/"):
+            body = self.images.get(url.path)
+            if body is None:
+                self.send_response(404); self.end_headers(); return
+            self.send_response(200); self.send_header("Content-Type", "image/jpeg"); self.send_header("Content-Length", str(len(body))); self.end_headers()
+            self.wfile.write(body)
+        else:
+            self.send_response(404); self.end_headers()
+
+
+def start_fake_apis(image_count=10):
+    """Starts the stand-in on a free local port and points the API endpoints at it."""
+    import io
+    for i in range(image_count):
+        buffer = io.BytesIO()
+        synthetic_image(*IMAGE_SIZES[i % len(IMAGE_SIZES)], seed=100 + i).save(buffer, "jpeg", quality=90)
+        FakeAPIHandler.images[f"/image/{i}.jpg"] = buffer.getvalue()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeAPIHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ.update({"GNEWS_API_ENDPOINT": f"{base}/gnews", "CSE_ENDPOINT": f"{base}/customsearch", "PEXELS_PHOTO_ENDPOINT": f"{base}/pexels/photos"})
+    return server
+
+
+def prepare_assets(workdir, intro_seconds=5):
+    """Branding assets from the repo plus synthetic background music and intro."""
+    assets = workdir / "assets"
+    assets.mkdir(parents=True, exist_ok=True)
+    for name in ("icon.png", "like.gif"): shutil.copy(REPO_ROOT / "assets" / name, assets / name)
+    tone_mp3(assets / "bkg1.mp3", 240, 196); tone_mp3(assets / "bkg2.mp3", 240, 262)
+    test_clip(assets / "intro.mp4", intro_seconds, audio=True)
+
+
+# --- Cases ---
+def case_acquire_images(work, narration, assets):
+    import create_combined_news, visual_dedup
+    story = {"title": f"Benchmark story {assets}", "images": [], "videos": []}
+    create_combined_news.IMAGE_COUNT_PER_ARTICLE = min(assets, 10)
+    def run():
+        # A fresh run-scoped index, or every repeat after the first would be all duplicates.
+        visual_dedup._index = visual_dedup.VisualIndex(work / "fixtures" / "visual_hashes.json")
+        return create_combined_news.download_story_images(assets, story)
+    return run
+
+
+def case_render_video(work, narration, assets):
+    import create_news_video
+    cfg = create_news_video.Config()
+    cfg.image_dir.mkdir(exist_ok=True); cfg.video_clip_dir.mkdir(exist_ok=True)
+    images = synthetic_images(work / "fixtures" / f"rv_{assets}", assets, (1920, 1080), "fit")
+    videos = [test_clip(work / "fixtures" / f"rv_clip_{assets}_{i}.mp4", cfg.video_clip_duration) for i in range(max(1, assets // 3))]
+    silent_mp3(cfg.voice_path, narration); synthetic_ass(cfg.ass_path, narration)
+    plan = create_news_video.plan_render(images, videos, narration, cfg)
+    return (lambda: create_news_video.render_video(images, videos, narration, cfg)), {"plan": plan.summary()}
+
+
+def case_create_story_video(work, narration, assets):
+    import create_combined_news
+    images = synthetic_images(work / "fixtures" / f"sv_{assets}", assets, (1920, 1080), "fit")
+    videos = [test_clip(work / "fixtures" / f"sv_clip_{assets}_{i}.mp4", 12) for i in range(max(1, assets // 4))]
+    audio, ass = silent_mp3(work / "voice_0.mp3", narration), synthetic_ass(work / "subtitles_0.ass", narration)
+    story = {"title": "Benchmark", "images": images, "videos": videos}
+    plan = create_combined_news.plan_story(story, narration)
+    return (lambda: create_combined_news.create_story_video(0, story, audio, ass, "segment_0.mp4")), {"plan": plan.summary()}
+
+
+def case_combine_videos(work, narration, assets):
+    import create_combined_news
+    segment_seconds = narration / assets
+    segments = [test_clip(work / "fixtures" / f"seg_{assets}_{i}.mp4", segment_seconds, audio=True) for i in range(assets)]
+    audio = silent_mp3(work / "voice.mp3", narration)
+    metadata = {"title": "Benchmark", "description": "Benchmark", "tags": ["benchmark"]}
+    return lambda: create_combined_news.combine_videos(segments, audio, "final_content_combined.mp4", metadata)
+
+
+def case_create_shorts_video(work, narration, assets):
+    import create_news_video_shorts
+    seconds = min(narration, SHORTS_MAX_SECONDS)
+    image_dir = work / "fixtures" / f"shorts_{assets}"
+    synthetic_images(image_dir, assets, (1080, 1920), "cover")
+    audio, ass = silent_mp3(work / "voice.mp3", seconds), synthetic_ass(work / "subtitles.ass", seconds, (1080, 1920))
+    metadata = {"title": "Benchmark", "description": "Benchmark", "tags": ["benchmark"]}
+    return lambda: create_news_video_shorts.create_shorts_video(image_dir, audio, "final_content_shorts.mp4", ass, seconds, ["./assets/bkg1.mp3"], metadata)
+
+
+def case_merge_videos_with_transition(work, narration, assets):
+    from merge_intro_content import merge_videos_with_transition
+    content = test_clip(work / "fixtures" / f"content_{narration}.mp4", narration, audio=True)
+    return lambda: merge_videos_with_transition("assets/intro.mp4", content, "final_news.mp4")
+
+
+# The media-free checks live in the test suite; --check runs just those.
+CHECK_TESTS = ["test_filtergraph.py", "test_timeline.py"]
+
+def run_checks():
+    """Runs the filtergraph and timeline plan goldens from tests/ with pytest; needs neither ffmpeg nor media. Returns the exit code."""
+    tests = Path(__file__).resolve().parents[2] / "tests"
+    return subprocess.run([sys.executable, "-m", "pytest", "-q", *(str(tests / name) for name in CHECK_TESTS)]).returncode
+
+
+# Modules whose import is the startup cost of an entry point (the upload scripts run on import, so their uploader stands in).
+IMPORT_TARGETS = ["create_news_video", "create_combined_news", "create_news_video_shorts", "merge_intro_content", "batch_news", "upload_queue", "youtube_uploader"]
+
+def import_time(module, runs=5):
+    """
+    Median cumulative import time of `module` in fresh interpreters, from `python -X importtime`,
+    with its five heaviest direct imports.
+    """
+    totals, children = [], {}
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=Path(__file__).parent, capture_output=True, text=True)
+        if proc.returncode: return {"module": module, "error": (proc.stderr.strip().splitlines() or ["import failed"])[-1]}
+        rows = []
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line: continue
+            _, cumulative, name = line[len("import time:"):].split("|")
+            rows.append((len(name) - len(name.lstrip()), name.strip(), int(cumulative)))
+        index = next(i for i, row in enumerate(rows) if row[1] == module)
+        depth, _, total = rows[index]
+        totals.append(total)
+        # Imports appear before their importer, one level deeper.
+        for child_depth, name, cumulative in reversed(rows[:index]):
+            if child_depth <= depth: break
+            if child_depth == depth + 2: children.setdefault(name, []).append(cumulative)
+    heaviest = sorted(((name, statistics.median(v) / 1000) for name, v in children.items()), key=lambda x: -x[1])[:5]
+    return {"module": module, "ms": round(statistics.median(totals) / 1000, 1), "heaviest": [[name, round(ms, 1)] for name, ms in heaviest]}
+
+
+def report_import_times(modules=IMPORT_TARGETS):
+    print("⏱️ Import time per entry point (median of fresh interpreters, -X importtime):")
+    results = [import_time(m) for m in modules]
+    for r in results:
+        if "error" in r: print(f"  {r['module']:<26} ❌ {r['error']}"); continue
+        print(f"  {r['module']:<26} {r['ms']:8.1f} ms   " + ", ".join(f"{name} {ms:.1f}" for name, ms in r["heaviest"]))
+    return results
+
+
+def _child_cpu():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_case(name, work, narration, assets, repeat):
+    """Builds the fixtures for one case, then times `repeat` runs of it (wall and ffmpeg CPU seconds)."""
+    run, info = globals()[f"case_{name}"](work, narration, assets), {}
+    if isinstance(run, tuple): run, info = run
+    walls, cpus, output = [], [], None
+    for _ in range(repeat):
+        started, cpu_started = time.perf_counter(), _child_cpu()
+        try: output = run()
+        except SystemExit: output = None
+        walls.append(time.perf_counter() - started); cpus.append(_child_cpu() - cpu_started)
+    ok = bool(output) and (not isinstance(output, (str, Path)) or Path(output).exists())
+    size = Path(output).stat().st_size if ok and isinstance(output, (str, Path)) else None
+    return {"case": name, "narration_s": narration, "assets": assets, "ok": ok, "seconds": round(statistics.median(walls), 3),
+            "cpu_seconds": round(statistics.median(cpus), 3), "output_bytes": size, "runs": repeat, **info}
+
+
+def environment_info():
+    version = subprocess.run(["ffmpeg", "-version"], capture_output=True, text=True).stdout.splitlines()[:1]
+    rev = subprocess.run(["git", "-C", str(REPO_ROOT), "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    return {"ffmpeg": version[0] if version else None, "git": rev or None, "cpus": os.cpu_count(),
+            "encode_mode": os.getenv("ENCODE_MODE", "capped"),
+            "render_memory_mb": os.getenv("RENDER_MEMORY_MB"), "graph_optimize": os.getenv("FILTERGRAPH_OPTIMIZE", "1") != "0", "python": sys.version.split()[0], "timestamp": time.time()}
+
+
+def compare(results, baseline_path, threshold=REGRESSION_THRESHOLD):
+    """Prints per-case ratios against a previous results file. Returns the regressed cases."""
+    baseline = {(r["case"], r["narration_s"], r["assets"]): r for r in json.loads(Path(baseline_path).read_text())["results"]}
+    regressions = []
+    print(f"\n📊 Compared with {baseline_path} (regression threshold {threshold:.0%}):")
+    for r in results:
+        before = baseline.get((r["case"], r["narration_s"], r["assets"]))
+        if not before or not before["ok"] or not r["ok"]:
+            print(f"  {r['case']:<30} {r['narration_s']:>5}s x{r['assets']:<3} {'no baseline' if not before else 'failed run'}"); continue
+        ratio = r["seconds"] / max(before["seconds"], 1e-6)
+        flag = "🔺" if ratio > 1 + threshold else ("🟢" if ratio < 1 - threshold else "  ")
+        if ratio > 1 + threshold: regressions.append(r)
+        print(f"{flag} {r['case']:<30} {r['narration_s']:>5}s x{r['assets']:<3} {before['seconds']:8.2f}s -> {r['seconds']:8.2f}s ({ratio:5.2f}x)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline render benchmarks with synthetic media.")
+    parser.add_argument("--narration", default=",".join(map(str, DEFAULT_NARRATIONS)), help="Comma-separated narration lengths in seconds.")
+    parser.add_argument("--assets", default=",".join(map(str, DEFAULT_ASSET_COUNTS)), help="Comma-separated asset counts.")
+    parser.add_argument("--cases", default=",".join(CASES), help=f"Comma-separated subset of: {', '.join(CASES)}.")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per case; the median is reported.")
+    parser.add_argument("--out", default="benchmark_results.json")
+    parser.add_argument("--compare", help="Previous results JSON; exits non-zero if any case regressed.")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("--workdir", help="Keep fixtures and outputs here instead of a temporary directory.")
+    parser.add_argument("--check", action="store_true", help="Only run the media-free checks: filtergraph and timeline plan goldens.")
+    parser.add_argument("--no-optimize", action="store_true", help="Render with filtergraphs exactly as built (FILTERGRAPH_OPTIMIZE=0).")
+    parser.add_argument("--import-time", action="store_true", help="Only measure entry-point import times with -X importtime.")
+    parser.add_argument("--memory-mb", type=int, help="Render memory budget (RENDER_MEMORY_MB); small values force windowed rendering.")
+    args = parser.parse_args(argv)
+    if args.memory_mb: os.environ["RENDER_MEMORY_MB"] = str(args.memory_mb)
+    if args.no_optimize: os.environ["FILTERGRAPH_OPTIMIZE"] = "0"
+    if args.check: sys.exit(run_checks())
+    if args.import_time:
+        results = report_import_times()
+        Path(args.out).write_text(json.dumps({"environment": {"python": sys.version.split()[0], "timestamp": time.time()}, "imports": results}, indent=2))
+        return
+
+    narrations = [float(n) for n in args.narration.split(",")]
+    asset_counts = [int(n) for n in args.assets.split(",")]
+    cases = [c for c in args.cases.split(",") if c]
+    unknown = set(cases) - set(CASES)
+    if unknown: parser.error(f"unknown case(s): {', '.join(sorted(unknown))}")
+
+    # Dummy credentials: nothing here may reach a real API.
+    for key in ("GNEWS_KEY", "GCP_API_KEY", "GSEARCH_CSE_ID", "PEXELS_API_KEY"): os.environ[key] = "benchmark"
+    os.environ["GCP_SA_KEY"] = "{}"
+    out_path = Path(args.out).resolve()
+    baseline_path = Path(args.compare).resolve() if args.compare else None
+    work = Path(args.workdir).resolve() if args.workdir else Path(tempfile.mkdtemp(prefix="news-bench-"))
+    work.mkdir(parents=True, exist_ok=True)
+    root = Path.cwd()
+    os.chdir(work)
+    server = start_fake_apis()
+    try:
+        print(f"🧪 Preparing synthetic assets in {work}...")
+        prepare_assets(work)
+        results = []
+        for name in cases:
+            # Image acquisition does not depend on narration length.
+            for narration in (narrations[:1] if name == "acquire_images" else narrations):
+                for assets in asset_counts:
+                    print(f"\n⏱️ {name}: {narration:g}s narration, {assets} asset(s)")
+                    result = run_case(name, work, narration, assets, args.repeat)
+                    results.append(result)
+                    print(f"{'✅' if result['ok'] else '❌'} {name} {narration:g}s x{assets}: {result['seconds']:.2f}s wall, {result['cpu_seconds']:.2f}s ffmpeg CPU")
+    finally:
+        server.shutdown()
+        os.chdir(root)
+        if not args.workdir: shutil.rmtree(work, ignore_errors=True)
+
+    out_path.write_text(json.dumps({"environment": environment_info(), "results": results}, indent=2))
+    print(f"\n💾 Results written to {out_path}")
+    if baseline_path and compare(results, baseline_path, args.threshold): sys.exit(1)
+
+if __name__ == "__main__":
+    main()
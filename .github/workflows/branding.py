@@ -0,0 +1,75 @@
+import os
+import json
+import shlex
+import hashlib
+import subprocess
+import metrics
+from pathlib import Path
+from render_cost import plan_only
+from run_manifest import file_digest
+
+BRANDING_DIR = Path(".cache/branding")
+BRANDING_FPS = 30
+CHANNEL_NAME = "HotWired"
+LAYOUTS = {
+    # canvas, logo (x, y, size), channel name (x, y, font size), like GIF (width, height, inset from the top-right corner).
+    # Portrait elements sit 90px in to stay inside the mobile safe area.
+    "landscape": {"canvas": (1920, 1080), "logo": (10, 10, 60), "text": (75, 18, 36), "gif": (190, 50, 10)},
+    "portrait": {"canvas": (1080, 1920), "logo": (90, 90, 60), "text": (165, 90, 60), "gif": (190, 50, 90)},
+}
+
+
+def strip_height(layout):
+    """Height of the band at the top of the canvas that holds every branding element, rounded up to even."""
+    (_, ly, size), (_, ty, font_size), (_, gh, inset) = layout["logo"], layout["text"], layout["gif"]
+    height = max(ly + size, ty + int(font_size * 1.5), inset + gh)
+    return height + height % 2
+
+
+def _run(cmd, tmp_path, path):
+    try:
+        subprocess.run(cmd, check=True)
+    except subprocess.CalledProcessError:
+        tmp_path.unlink(missing_ok=True); raise
+    tmp_path.replace(path)
+
+
+def branding_overlay(name, logo, gif, font):
+    """
+    Cached RGBA clip of one loop of the full branding for a layout: the logo and channel name are
+    rasterized once into a transparent PNG strip, and the like GIF is composited over it at the
+    render frame rate. Renders loop it with -stream_loop -1 and apply it with one overlay at 0:0.
+    Cached by layout and asset contents, so changing the logo, GIF or font re-renders it.
+    """
+    layout = LAYOUTS[name]
+    key = hashlib.sha1(json.dumps([layout, CHANNEL_NAME, file_digest(logo), file_digest(gif), file_digest(font)]).encode("utf-8")).hexdigest()[:12]
+    strip, clip = BRANDING_DIR / f"{name}_{key}.png", BRANDING_DIR / f"{name}_{key}.mov"
+    if clip.exists():
+        metrics.inc("cache_hits", cache="branding"); return clip
+    width, height = layout["canvas"][0], strip_height(layout)
+    (lx, ly, size), (tx, ty, font_size), (gw, gh, inset) = layout["logo"], layout["text"], layout["gif"]
+    strip_cmd = ["ffmpeg", "-y", "-v", "error", "-f", "lavfi", "-i", f"color=c=black@0.0:s={width}x{height},format=rgba", "-i", str(logo),
+                 "-filter_complex", f"[1:v]scale={size}:{size}[logo];[0:v][logo]overlay={lx}:{ly}:format=rgb,"
+                                    f"drawtext=text='{CHANNEL_NAME}':fontfile='{font}':fontcolor=red:fontsize={font_size}:x={tx}:y={ty},format=rgba",
+                 "-frames:v", "1", "-update", "1", "-f", "image2", "-c:v", "png"]
+    # -ignore_loop 1 (the default) plays the GIF once; the render loops the finished clip instead.
+    clip_cmd = ["ffmpeg", "-y", "-v", "error", "-loop", "1", "-i", str(strip), "-i", str(gif),
+                "-filter_complex", f"[1:v]scale={gw}:{gh}[gif];[0:v][gif]overlay=W-w-{inset}:{inset}:format=rgb:eof_action=endall,fps={BRANDING_FPS},format=argb",
+                "-an", "-c:v", "qtrle", "-f", "mov"]
+    if plan_only():
+        print(f"    📝 Branding '{name}' is not cached yet; a real run renders it with:")
+        print(f"       {shlex.join(strip_cmd + [str(strip)])}\n       {shlex.join(clip_cmd + [str(clip)])}")
+        return clip
+    print(f"    🎨 Rendering the '{name}' branding overlay ({width}x{height}) into {BRANDING_DIR}...")
+    BRANDING_DIR.mkdir(parents=True, exist_ok=True)
+    # Renders running in parallel may build the same overlay; each writes its own temporary file.
+    for cmd, path in ((strip_cmd, strip), (clip_cmd, clip)):
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        _run(cmd + [str(tmp_path)], tmp_path, path)
+    return clip
+
+
+def add_branding(g, base, name, label, logo, gif, font):
+    """Branding over `base` with one overlay of the cached clip for layout `name`."""
+    overlay = g.input(branding_overlay(name, logo, gif, font), "-stream_loop", "-1")
+    return g.chain([base, overlay.video], "overlay=0:0", label=label)
@@ -0,0 +1,86 @@
+import itertools
+import threading
+import metrics
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# The renderers only use clips as silent B-roll, so take video-only streams capped at 1080p.
+CLIP_FORMAT = "bv*[height<=1080][ext=mp4]/bv*[height<=1080]/b[height<=1080][ext=mp4]/b[height<=1080]"
+MAX_CLIP_WORKERS = 3
+_local = threading.local()
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _youtube_dl(key, opts):
+    """One YoutubeDL per thread and option set, reused across calls so extractor and cookie setup happen once."""
+    import yt_dlp
+    cache = _local.__dict__.setdefault("instances", {})
+    if key not in cache: cache[key] = yt_dlp.YoutubeDL(opts)
+    return cache[key]
+
+
+def _worker_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None: _pool = ThreadPoolExecutor(max_workers=MAX_CLIP_WORKERS, thread_name_prefix="clip")
+    return _pool
+
+
+def search_candidates(term, limit=10, cookies=None):
+    """Flat ytsearch listing: ids, urls and durations only, without resolving any formats."""
+    opts = {"quiet": True, "no_warnings": True, "extract_flat": "in_playlist", "cookiefile": cookies}
+    info = _youtube_dl(("search", cookies), opts).extract_info(f"ytsearch{limit}:{term}", download=False)
+    return [e for e in itertools.islice(info.get("entries") or [], limit) if e and e.get("live_status") != "is_live"]
+
+
+def fetch_clip(url, out_dir, start, duration, cookies=None):
+    """Downloads only [start, start + duration) of one video. Returns the clip path."""
+    from yt_dlp.utils import DownloadError, download_range_func, match_filter_func
+    opts = {
+        "format": CLIP_FORMAT,
+        "outtmpl": str(Path(out_dir) / "yt_%(id)s.%(ext)s"),
+        "download_ranges": download_range_func(None, [(start, start + duration)]),
+        "force_keyframes_at_cuts": True,
+        "match_filter": match_filter_func("!is_live"),
+        "noplaylist": True,
+        "quiet": True,
+        "no_warnings": True,
+        "cookiefile": cookies,
+    }
+    info = _youtube_dl(("clip", str(out_dir), start, duration, cookies), opts).extract_info(url, download=True)
+    downloads = (info or {}).get("requested_downloads") or []
+    if not downloads or not Path(downloads[0]["filepath"]).exists(): raise DownloadError(f"No clip written for {url}")
+    metrics.inc("downloads", kind="clip"); metrics.inc("download_bytes", Path(downloads[0]["filepath"]).stat().st_size, kind="clip")
+    return downloads[0]["filepath"]
+
+
+def fetch_clips(urls, out_dir, count, start=0, duration=10, cookies=None, accept=None):
+    """
+    Fetches candidate clips concurrently and returns up to `count` paths, in candidate order.
+    At most `count` downloads are in flight or done at once, so none is wasted. `accept(path, url)` may veto a
+    downloaded clip (e.g. a duplicate), in which case the next candidate takes its place.
+    """
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    urls, results, next_index = list(urls), {}, 0
+    pending = {}
+    while (pending or next_index < len(urls)) and len(results) < count:
+        while next_index < len(urls) and len(pending) < MAX_CLIP_WORKERS and len(pending) + len(results) < count:
+            future = _worker_pool().submit(fetch_clip, urls[next_index], out_dir, start, duration, cookies)
+            pending[future] = next_index; next_index += 1
+        future = next(as_completed(pending))
+        index = pending.pop(future)
+        try:
+            path = future.result()
+            if accept and not accept(path, urls[index]): continue
+            results[index] = path
+            print(f"      ✅ Clip {len(results)}/{count}: {path}")
+        except Exception as e:
+            print(f"      ❌ Could not fetch {urls[index]}: {str(e).splitlines()[0] if str(e) else e}")
+    # Downloads already running cannot be cancelled: wait for them and delete what they wrote,
+    # so no unselected clip is left in `out_dir` for a later glob to pick up.
+    for future in pending:
+        if future.cancel(): continue
+        try: Path(future.result()).unlink(missing_ok=True)
+        except Exception: pass
+    return [results[i] for i in sorted(results)][:count]
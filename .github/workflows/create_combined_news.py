@@ -1,30 +1,39 @@
 import os
-import requests
+import argparse
 import subprocess
 import random
 import textwrap
 import json
 import re
 from pathlib import Path
-from pydub import AudioSegment
-from newspaper import Article
-from google.cloud import texttospeech
-from google.oauth2 import service_account
 import shutil
-from googleapiclient.discovery import build
-from PIL import Image # For image validation
-import cairosvg # For SVG to PNG conversion
-import google.generativeai as genai
+from google_clients import tts_client
+from story_index import StoryIndex, story_source
+from news_source import fetch_headlines, parse_article
+from run_manifest import RunManifest
+from pipeline import Pipeline, Stage, CPU
+from encode_profiles import encode
+from render_cost import plan_only, planned
+from quota import ledger
+from image_search import search_image_urls
+from clip_fetcher import fetch_clips
+from image_ingest import RejectedImage, fetch_image, ingest_image, LANDSCAPE
+from visual_dedup import visual_index, reset_visual_index, drop_duplicate_image, drop_duplicate_clip
+from filtergraph import Graph, fit
+from timeline import plan_timeline
+from windowed_render import WINDOW_DIR, needs_windows, render_timeline
+from branding import add_branding
+import metrics
 
 # === CONFIG ===
 GNEWS_API_KEY = os.getenv("GNEWS_KEY")
 YOUTUBE_API_KEY = os.getenv("GCP_API_KEY")
 GOOGLE_API_KEY = os.getenv("GCP_API_KEY")
-GNEWS_API_ENDPOINT = "https://gnews.io/api/v4/top-headlines"
 IMAGE_DIR = "images"
 VIDEO_CLIP_DIR = "videoclips"
 VOICE_PATH = "voice.mp3"
 VIDEO_PATH = "final_content_combined.mp4"
+TIMELINE_TS_PATH = "timeline.ts"
 ASS_PATH = "subtitles.ass"
 METADATA_PATH = "video_metadata.json"
 IMAGE_COUNT_PER_ARTICLE = 5
@@ -36,10 +45,6 @@ SKIP_DOMAINS = [
     "washingtonpost.com", "navigacloud.com", "redlakenationnews.com",
     "imengine.public.prod.pdh.navigacloud.com", "arc-anglerfish-washpost-prod-washpost.s3.amazonaws.com"
 ]
-cookies_file_path = "cookies.txt"
-
-if GOOGLE_API_KEY:
-    genai.configure(api_key=GOOGLE_API_KEY)
 
 def preprocess_and_summarize_text(raw_text):
     print("    -> Cleaning and summarizing article text...")
@@ -58,7 +63,12 @@ def preprocess_and_summarize_text(raw_text):
     if not GOOGLE_API_KEY:
         print("    ⚠️ GOOGLE_API_KEY not set. Skipping AI summarization, using cleaned text.")
         return cleaned_text
+    if not ledger().try_acquire("gemini"):
+        print("    ⚠️ Gemini quota spent. Skipping AI summarization, using cleaned text.")
+        return cleaned_text
     try:
+        import google.generativeai as genai
+        genai.configure(api_key=GOOGLE_API_KEY)
         model = genai.GenerativeModel('gemini-1.5-flash')
         prompt = f"""
         You are a news script editor. Your task is to take the raw text from a news article and prepare it for a text-to-speech engine that will be used in a video news report.
@@ -85,12 +95,13 @@ def preprocess_and_summarize_text(raw_text):
 def cleanup():
     print("🧹 Cleaning up previous run artifacts...")
     for item in Path(".").glob("segment_*.mp4"): item.unlink()
+    for item in Path(".").glob("segment_*.ts"): item.unlink()
     for item in Path(".").glob("voice_*.mp3"): item.unlink()
     for item in Path(".").glob("subtitles_*.ass"): item.unlink()
     items_to_delete = (
         IMAGE_DIR, VIDEO_CLIP_DIR, "video_slides", "slides.txt", "subtitles.ass",
         "video_metadata.json", "voice.mp3", "final_content_combined.mp4", "concat_list.txt",
-        "final_news_combined.mp4", VIDEO_PATH
+        "final_news_combined.mp4", VIDEO_PATH, TIMELINE_TS_PATH, WINDOW_DIR
     )
     for item in items_to_delete:
         try:
@@ -111,25 +122,21 @@ def get_media_duration(media_path):
 
 def get_news_stories(num_articles=5):
     print(f"📰 Fetching the top {num_articles} news stories...")
-    params = {"token": GNEWS_API_KEY, "lang": "en", "country": "us", "max": 10}
     try:
-        r = requests.get(GNEWS_API_ENDPOINT, params=params, timeout=10)
-        r.raise_for_status()
-        articles_data = r.json().get("articles", [])
+        articles_data = fetch_headlines(GNEWS_API_KEY, max_articles=10)
         if not articles_data: print("❌ No articles returned from API."); return []
-        stories = []
+        stories, index = [], StoryIndex("combined")
         for article_data in articles_data:
             if len(stories) >= num_articles: break
             try:
                 print(f"  -> Parsing article: {article_data['title']}")
-                article = Article(article_data['url'])
-                article.download()
-                article.parse()
-                if article.text and len(article.text.split()) > 70:
-                    processed_content = preprocess_and_summarize_text(article.text)
+                if index.is_published(article_data['url'], article_data['title'], article_data.get('description', '')): continue
+                article_text = parse_article(article_data['url'])
+                if article_text and len(article_text.split()) > 70:
+                    processed_content = preprocess_and_summarize_text(article_text)
                     if not processed_content or len(processed_content.split()) < 40:
                         print("    ⚠️ Summarization resulted in text that is too short. Skipping article."); continue
-                    stories.append({"title": article_data['title'], "content": processed_content, "images": [], "videos": []})
+                    stories.append({"title": article_data['title'], "content": processed_content, "images": [], "videos": [], "source": story_source(article_data)})
             except Exception as e: print(f"    ⚠️ Could not parse or process article: {article_data['url']}. Error: {e}")
         return stories
     except Exception as e: print(f"❌ News fetch error: {e}"); return []
@@ -138,26 +145,19 @@ def search_images(query, num_images):
     API_KEY, CSE_ID = os.getenv("GCP_API_KEY"), os.getenv("GSEARCH_CSE_ID")
     if not API_KEY or not CSE_ID: print("    ⚠️ GCP_API_KEY or GSEARCH_CSE_ID not set. Skipping image search."); return []
     try:
-        res = requests.get("https://www.googleapis.com/customsearch/v1", params={"key": API_KEY, "cx": CSE_ID, "q": query, "searchType": "image", "num": num_images}, timeout=10)
-        res.raise_for_status()
-        items = res.json().get("items", [])
-        return [item["link"] for item in items if not any(d in item["link"] for d in SKIP_DOMAINS)]
+        return search_image_urls(query, num_images, API_KEY, CSE_ID, os.getenv("PEXELS_API_KEY"), skip_domains=SKIP_DOMAINS)
     except Exception as e: print(f"❌ Image search failed for query '{query}': {e}"); return []
 
-def download_asset(url, save_path):
-    try:
-        r = requests.get(url, timeout=15, headers={"User-Agent": "Mozilla/5.0"}, stream=True)
-        r.raise_for_status()
-        with open(save_path, "wb") as f: f.write(r.content)
-        return True
-    except Exception as e: print(f"    Could not download asset from {url}. Error: {e}"); return False
-
 def search_and_download_videos(query, download_dir, num_clips=1, duration=12):
     print(f"  🎬 Searching for video clips related to '{query}'...")
     if not YOUTUBE_API_KEY:
         print("    ⚠️ YOUTUBE_API_KEY not set. Skipping video search.")
         return []
 
+    if not ledger().try_acquire("youtube", operation="search"):
+        print("    ⚠️ YouTube search quota spent. Using images only for this story.")
+        return []
+    from googleapiclient.discovery import build
     youtube = build('youtube', 'v3', developerKey=YOUTUBE_API_KEY)
     try:
         search_response = youtube.search().list(
@@ -172,55 +172,24 @@ def search_and_download_videos(query, download_dir, num_clips=1, duration=12):
             print("    ❌ No video results returned from YouTube.")
             return []
 
-        downloaded_clips = []
-        for i, video_id in enumerate(video_ids):
-            if len(downloaded_clips) >= num_clips:
-                break
-
-            video_url = f"https://www.youtube.com/watch?v={video_id}"
-            safe_name = re.sub(r'[^\w\d_-]', '', query.lower().replace(' ', '_'))[:20]
-            clip_path = os.path.join(download_dir, f"clip_{safe_name}_{i}.mp4")
-
-            print(f"    📥 Attempting download: {video_url}")
-            yt_dlp_command = [
-                "yt-dlp",
-                "--quiet",
-                "--no-warnings",
-                "-f", "bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]",
-                "--merge-output-format", "mp4",
-                "--download-sections", f"*0-{duration}",
-                "--force-keyframes-at-cuts",
-                "-o", clip_path,
-                video_url
-            ]
-
-            # Optional: Skip cookies even if file exists
-            if os.path.exists(cookies_file_path):
-                print("    🔍 Running without cookies despite cookies.txt existing.")
-
-            try:
-                result = subprocess.run(yt_dlp_command, capture_output=True, text=True, check=True)
-                if os.path.exists(clip_path):
-                    downloaded_clips.append(clip_path)
-                    print(f"    ✅ Downloaded clip to: {clip_path}")
-                else:
-                    print(f"    ❌ Downloaded file not found: {clip_path}")
-            except subprocess.CalledProcessError as e:
-                print(f"    ❌ yt-dlp failed to download from {video_url}")
-                print(f"       stderr: {e.stderr.strip()}")
-            except Exception as e:
-                print(f"    ❌ Unexpected error: {e}")
+        # Only the first `duration` seconds are fetched, video-only; cookies are deliberately not used here.
+        video_urls = [f"https://www.youtube.com/watch?v={video_id}" for video_id in video_ids]
+        video_urls = [url for url in video_urls if not visual_index().known_duplicate(url)]
+        downloaded_clips = fetch_clips(video_urls, download_dir, num_clips, start=0, duration=duration, accept=lambda path, url: not drop_duplicate_clip(path, url))
+        visual_index().save()
 
         if not downloaded_clips:
             print("    ⚠️ No clips were successfully downloaded.")
         return downloaded_clips
 
     except Exception as e:
+        if getattr(getattr(e, "resp", None), "status", None) in (403, 429) and "quota" in str(e).lower(): ledger().note_rejected("youtube")
         print(f"    ❌ Error while using YouTube API: {e}")
         return []
 
 def generate_voice(text, out_path):
     print("🎤 Generating natural voice with Google TTS...")
+    from google.cloud import texttospeech
     try:
         # --- NEW: Randomly select a high-quality voice and adjust prosody ---
         CANDIDATE_VOICES = [
@@ -239,9 +208,7 @@ def generate_voice(text, out_path):
 
         print(f"    -> Voice: {selected_voice_name}, Rate: {speaking_rate:.2f}, Pitch: {pitch:.2f}")
 
-        service_account_info = json.loads(os.environ["GCP_SA_KEY"])
-        creds = service_account.Credentials.from_service_account_info(service_account_info)
-        client = texttospeech.TextToSpeechClient(credentials=creds)
+        client = tts_client(os.environ["GCP_SA_KEY"])
         synthesis_input = texttospeech.SynthesisInput(text=text)
 
         voice = texttospeech.VoiceSelectionParams(
@@ -261,6 +228,7 @@ def generate_voice(text, out_path):
 
 def generate_ass(text, audio_path, ass_path):
     print("📝 Generating styled subtitles (optimized)...")
+    from pydub import AudioSegment
     try:
         audio = AudioSegment.from_file(audio_path)
         duration = len(audio) / 1000.0
@@ -279,39 +247,45 @@ def generate_ass(text, audio_path, ass_path):
     except Exception as e:
         print(f"❌ Failed to generate subtitles: {e}")
 
-def create_story_video(story_index, story_data, audio_path, ass_path, output_path):
-    print(f"🎞 Creating video segment for story {story_index+1}...")
+def plan_story(story_data, narration_duration, image_seconds=4):
+    """Story assets in random order, cut to cover the narration exactly instead of repeating the whole list."""
     visual_assets = story_data['images'] + story_data['videos']
     random.shuffle(visual_assets)
-    if not visual_assets:
+    is_image = lambda asset_path: Path(asset_path).suffix.lower() in ['.jpg', '.jpeg', '.png', '.webp']
+    return plan_timeline([(a, image_seconds if is_image(a) else get_media_duration(a), is_image(a)) for a in visual_assets], narration_duration)
+
+def create_story_video(story_index, story_data, audio_path, ass_path, output_path, branded=False):
+    """Renders one story segment. `branded` burns in the logo/GIF overlays so the segment can be stream-assembled without a final re-encode."""
+    print(f"🎞 Creating video segment for story {story_index+1}...")
+    if not story_data['images'] and not story_data['videos']:
         print("    ❌ No visual assets for this story. Skipping segment."); return None
     narration_duration = get_media_duration(audio_path)
     if not narration_duration or narration_duration == 0:
         print("    ❌ Invalid narration duration for segment."); return None
-    ffmpeg_cmd = ["ffmpeg", "-y"]
-    final_asset_list, total_visual_duration, asset_duration_img = [], 0, 4
-    while total_visual_duration < narration_duration:
-        if not visual_assets: break
-        final_asset_list.extend(visual_assets)
-        for asset_path in visual_assets:
-            if Path(asset_path).suffix.lower() in ['.jpg', '.jpeg', '.png', '.webp']: total_visual_duration += asset_duration_img
-            else: total_visual_duration += get_media_duration(asset_path) or 0
-    for asset_path in final_asset_list:
-        if Path(asset_path).suffix.lower() in ['.jpg', '.jpeg', '.png', '.webp']:
-            ffmpeg_cmd.extend(["-loop", "1", "-t", str(asset_duration_img), "-i", str(asset_path)])
-        else:
-            ffmpeg_cmd.extend(["-i", str(asset_path)])
-    ffmpeg_cmd.extend(["-i", audio_path])
-    voice_input_idx = len(final_asset_list)
-    filter_chains, scaled_streams = [], []
-    for i in range(len(final_asset_list)):
-        filter_chains.append(f"[{i}:v]scale=1920:1080:force_original_aspect_ratio=decrease,pad=1920:1080:(ow-iw)/2:(oh-ih)/2,setsar=1,format=yuv420p[v{i}]")
-        scaled_streams.append(f"[v{i}]")
-    filter_chains.append(f"{''.join(scaled_streams)}concat=n={len(scaled_streams)}:v=1:a=0[timeline]")
-    filter_chains.append(f"[timeline]ass='{Path(ass_path).as_posix()}'[v]")
-    ffmpeg_cmd.extend(["-filter_complex", ";".join(filter_chains), "-map", "[v]", "-map", f"{voice_input_idx}:a", "-c:v", "libx264", "-c:a", "aac", "-b:a", "192k", "-t", str(narration_duration), output_path])
+    plan = plan_story(story_data, narration_duration)
+    if not plan.shots:
+        print("    ❌ No playable visual assets for this story. Skipping segment."); return None
+    g = Graph()
+    if needs_windows(len(plan.shots)):
+        parts = render_timeline(plan.shots, f"story_{story_index}")
+        timeline = g.input(parts, "-f", "concat", "-safe", "0", size=(1920, 1080)).video
+    else:
+        scaled_streams = []
+        for i, shot in enumerate(plan.shots):
+            visual = g.input(shot.path, *shot.input_options(), probe=True)
+            scaled_streams.append(g.chain(visual.video, *fit(1920, 1080), "format=yuv420p", label=f"v{i}"))
+        timeline = g.chain(scaled_streams, f"concat=n={len(scaled_streams)}:v=1:a=0", label="timeline")
+    voice = g.input(audio_path)
+    if branded:
+        sub = g.chain(timeline, f"ass='{Path(ass_path).as_posix()}'", label="sub")
+        video = add_branding(g, sub, "landscape", "v", LOGO_FILE, LIKE_FILE, FONT_TEXT)
+    else:
+        video = g.chain(timeline, f"ass='{Path(ass_path).as_posix()}'", label="v")
+    ffmpeg_cmd = g.command(video, voice.audio) + ["-t", str(narration_duration)]
     try:
-        subprocess.run(ffmpeg_cmd, check=True)
+        encode(ffmpeg_cmd, output_path, "combined", narration_duration)
+        if plan_only(): return planned(output_path)
+        shutil.rmtree(WINDOW_DIR / f"story_{story_index}", ignore_errors=True)
         print(f"    ✅ Segment saved: {output_path}"); return output_path
     except subprocess.CalledProcessError as e:
         print(f"    ❌ FFmpeg segment rendering failed. Error: {e}"); return None
@@ -322,68 +296,180 @@ def combine_videos(segment_paths, full_audio_path, output_path, metadata):
     with open(concat_file_path, "w") as f:
         for path in segment_paths: f.write(f"file '{path}'\n")
     narration_duration = get_media_duration(full_audio_path)
-    ffmpeg_cmd = ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", concat_file_path, "-i", full_audio_path, "-stream_loop", "-1", "-i", random.choice(BGM_FILES), "-ignore_loop", "0", "-i", LIKE_FILE, "-loop", "1", "-i", LOGO_FILE]
-    filter_complex = f"[1:a]volume=1.0[a1];[2:a]volume=0.05[a2];[a1][a2]amix=inputs=2:duration=first[aout];[3:v]scale=190:50[gif];[4:v]scale=60:60[logo];[0:v][logo]overlay=10:10[tmp1];[tmp1]drawtext=text='HotWired':fontfile='{FONT_TEXT}':fontcolor=red:fontsize=36:x=75:y=18[tmp2];[tmp2][gif]overlay=W-w-10:10[vout]"
-    ffmpeg_cmd.extend(["-filter_complex", filter_complex, "-map", "[vout]", "-map", "[aout]", "-c:v", "libx264", "-c:a", "aac", "-b:a", "192k", "-t", str(narration_duration), "-movflags", "+faststart", "-metadata", f"title={metadata['title']}", "-metadata", f"description={metadata['description']}", "-metadata", f"comment=Tags: {', '.join(metadata['tags'])}", output_path])
+    g = Graph()
+    segments, voice = g.input(concat_file_path, "-f", "concat", "-safe", "0"), g.input(full_audio_path)
+    bgm = g.input(random.choice(BGM_FILES), "-stream_loop", "-1")
+    a1, a2 = g.chain(voice.audio, "volume=1.0", label="a1"), g.chain(bgm.audio, "volume=0.05", label="a2")
+    audio = g.chain([a1, a2], "amix=inputs=2:duration=first", label="aout")
+    video = add_branding(g, segments.video, "landscape", "vout", LOGO_FILE, LIKE_FILE, FONT_TEXT)
+    ffmpeg_cmd = g.command(video, audio) + ["-t", str(narration_duration), "-movflags", "+faststart", "-metadata", f"title={metadata['title']}", "-metadata", f"description={metadata['description']}", "-metadata", f"comment=Tags: {', '.join(metadata['tags'])}"]
     print("--- \nDEBUG: Executing Final FFmpeg command...\n---")
     try:
-        subprocess.run(ffmpeg_cmd, check=True)
+        encode(ffmpeg_cmd, output_path, "combined", narration_duration)
+        if plan_only(): return planned(output_path)
         print(f"✅ Final video saved: {output_path}")
+        return output_path
     except subprocess.CalledProcessError as e:
         print(f"❌ Final video combination failed. Error: {e}")
 
-if __name__ == "__main__":
-    cleanup()
-    os.makedirs(IMAGE_DIR, exist_ok=True)
-    os.makedirs(VIDEO_CLIP_DIR, exist_ok=True)
-    stories = get_news_stories(num_articles=5)
-    if not stories: print("❌ No stories found. Exiting."); exit()
-    video_segments, segment_audio_files = [], []
-    main_title = stories[0]['title'] if stories else "Today's News Roundup"
-    for i, story in enumerate(stories):
-        print(f"\n--- Processing Story {i+1}/{len(stories)}: {story['title']} ---")
-        story_text = "In our next story... " + f"{story['title']}.\n{story['content']}" if i > 0 else f"{story['title']}.\n{story['content']}"
-        segment_audio_path, segment_ass_path = f"voice_{i}.mp3", f"subtitles_{i}.ass"
-        generate_voice(story_text, segment_audio_path)
-        if not os.path.exists(segment_audio_path): print(f"    ❌ Could not generate audio for story {i}, skipping."); continue
-        segment_audio_files.append(segment_audio_path)
-        generate_ass(story_text, segment_audio_path, segment_ass_path)
-        print(f"  🖼️ Searching for images...")
-        image_urls = search_images(story['title'], num_images=IMAGE_COUNT_PER_ARTICLE)
-        if image_urls:
-            for j, img_url in enumerate(image_urls):
+def download_story_images(i, story):
+    print(f"  🖼️ Searching for images...")
+    images = []
+    image_urls = search_images(story['title'], num_images=IMAGE_COUNT_PER_ARTICLE)
+    for j, img_url in enumerate(image_urls):
+        if visual_index().known_duplicate(img_url): print(f"    ♊ Skipping known duplicate {img_url}"); continue
+        try:
+            try: img_path = fetch_image(img_url, Path(IMAGE_DIR) / f"story{i}_img{j}")
+            except RejectedImage as e: print(f"    ⏭️ Skipped {img_url}: {e}"); continue
+            if img_path:
+                final_image_path = str(img_path)
+                if final_image_path.endswith(".svg"):
+                    print(f"    🎨 Converting SVG to PNG: {final_image_path}")
+                    png_path = Path(final_image_path).with_suffix(".png")
+                    try:
+                        import cairosvg
+                        cairosvg.svg2png(url=final_image_path, write_to=str(png_path)); os.remove(final_image_path); final_image_path = str(png_path)
+                    except Exception as e: print(f"    ❌ Failed to convert SVG: {e}"); continue
+                if drop_duplicate_image(final_image_path, img_url): continue
                 try:
-                    safe_suffix = "".join(c for c in Path(img_url).suffix.split('?')[0] if c.isalnum() or c == '.') or ".jpg"
-                    img_path = Path(IMAGE_DIR) / f"story{i}_img{j}{safe_suffix}"
-                    if download_asset(img_url, img_path):
-                        final_image_path = str(img_path)
-                        if final_image_path.endswith(".svg"):
-                            print(f"    🎨 Converting SVG to PNG: {final_image_path}")
-                            png_path = Path(final_image_path).with_suffix(".png")
-                            try:
-                                cairosvg.svg2png(url=final_image_path, write_to=str(png_path)); os.remove(final_image_path); final_image_path = str(png_path)
-                            except Exception as e: print(f"    ❌ Failed to convert SVG: {e}"); continue
-                        try:
-                            with Image.open(final_image_path) as img: img.verify()
-                            print(f"    ✅ Valid image ready: {final_image_path}")
-                            story['images'].append(final_image_path)
-                        except Exception as e:
-                            print(f"    ❌ Invalid image file. Deleting. Error: {e}")
-                            if os.path.exists(final_image_path): os.remove(final_image_path)
-                except Exception as e: print(f"    ⚠️ Error processing image URL {img_url}: {e}")
-        story['videos'] = search_and_download_videos(story['title'], download_dir=VIDEO_CLIP_DIR, num_clips=2)
-        segment_path = create_story_video(i, story, segment_audio_path, segment_ass_path, f"segment_{i}.mp4")
-        if segment_path: video_segments.append(segment_path)
-    if not video_segments: print("❌ No video segments created. Exiting."); exit()
+                    final_image_path = ingest_image(final_image_path, canvas=LANDSCAPE)
+                    print(f"    ✅ Valid image ready: {final_image_path}")
+                    images.append(final_image_path)
+                except Exception as e:
+                    print(f"    ❌ Invalid image file. Deleting. Error: {e}")
+                    if os.path.exists(final_image_path): os.remove(final_image_path)
+        except Exception as e: print(f"    ⚠️ Error processing image URL {img_url}: {e}")
+    visual_index().save()
+    return images
+
+def synthesize_story_audio(story_text, audio_path, ass_path):
+    generate_voice(story_text, audio_path)
+    if not os.path.exists(audio_path): return None
+    generate_ass(story_text, audio_path, ass_path)
+    return [audio_path, ass_path]
+
+TIMELINE_START = {"bytes": 0, "duration": 0.0}
+
+def append_segment(segment_path, previous=TIMELINE_START):
+    """
+    Remuxes a finished segment onto the end of the MPEG-TS timeline at its running offset.
+    Truncating to the previous length first makes a re-run of this stage idempotent, and a segment
+    that cannot be appended is cut back off so the chain continues from the same point without it.
+    Only the first story starts from an empty timeline; a later stage with no `previous` fails.
+    """
+    if previous is None: print(f"    ❌ The timeline before {segment_path} was lost; not appending to it."); return None
+    if not segment_path: return previous
+    duration = get_media_duration(segment_path)
+    if not duration: print(f"    ❌ Could not probe {segment_path}; leaving it out of the timeline."); return previous
+    print(f"📼 Appending {segment_path} to the timeline at {previous['duration']:.2f}s...")
+    with open(TIMELINE_TS_PATH, "r+b" if os.path.exists(TIMELINE_TS_PATH) else "wb") as f:
+        f.truncate(previous["bytes"]); f.seek(previous["bytes"])
+        cmd = ["ffmpeg", "-v", "error", "-i", segment_path, "-map", "0", "-c", "copy", "-output_ts_offset", str(previous["duration"]), "-f", "mpegts", "pipe:1"]
+        try: subprocess.run(cmd, stdout=f, check=True)
+        except subprocess.CalledProcessError as e:
+            print(f"    ❌ Could not append {segment_path}, skipping it: {e}")
+            f.truncate(previous["bytes"]); return previous
+        return {"bytes": f.tell(), "duration": previous["duration"] + duration}
+
+def finalize_stream(metadata, timeline):
+    """Final pass for the streamed timeline: video is copied, only the background music mix is encoded."""
+    if not timeline or not timeline["bytes"]: print("❌ No video segments created. Exiting."); return None
+    print("🎬 Remuxing streamed timeline into the final video...")
+    with open(TIMELINE_TS_PATH, "r+b") as f: f.truncate(timeline["bytes"])
+    ffmpeg_cmd = ["ffmpeg", "-y", "-i", TIMELINE_TS_PATH, "-stream_loop", "-1", "-i", random.choice(BGM_FILES),
+                  "-filter_complex", "[0:a]volume=1.0[a1];[1:a]volume=0.05[a2];[a1][a2]amix=inputs=2:duration=first[aout]",
+                  "-map", "0:v", "-map", "[aout]", "-c:v", "copy", "-c:a", "aac", "-b:a", "192k", "-t", str(timeline["duration"]), "-movflags", "+faststart",
+                  "-metadata", f"title={metadata['title']}", "-metadata", f"description={metadata['description']}", "-metadata", f"comment=Tags: {', '.join(metadata['tags'])}", VIDEO_PATH]
+    try:
+        subprocess.run(ffmpeg_cmd, check=True)
+        print(f"✅ Final video saved: {VIDEO_PATH}")
+        return VIDEO_PATH
+    except subprocess.CalledProcessError as e:
+        print(f"❌ Final video remux failed. Error: {e}")
+
+def combine_audio(segment_audio_files):
     print("🔊 Combining all audio segments into master track...")
+    from pydub import AudioSegment
     combined_audio = sum((AudioSegment.from_mp3(f) for f in segment_audio_files), AudioSegment.empty())
     combined_audio.export(VOICE_PATH, format="mp3")
     duration_in_seconds = get_media_duration(VOICE_PATH)
     if duration_in_seconds:
         minutes, seconds = int(duration_in_seconds // 60), int(duration_in_seconds % 60)
         print(f"🔊 Master audio created. Total video length: {minutes} minutes and {seconds} seconds.")
+    return VOICE_PATH
+
+def story_text_for(i, story):
+    return "In our next story... " + f"{story['title']}.\n{story['content']}" if i > 0 else f"{story['title']}.\n{story['content']}"
+
+def render_segment(i, story, stream, voice, images, videos):
+    audio_path, ass_path = voice
+    output_path = f"segment_{i}.ts" if stream else f"segment_{i}.mp4"
+    return create_story_video(i, {**story, "images": images, "videos": videos}, audio_path, ass_path, output_path, branded=stream)
+
+def master_audio_stage(*segments):
+    # Only stories whose segment rendered are narrated, keeping audio and video in step.
+    voices = [f"voice_{i}.mp3" for i, segment in enumerate(segments) if segment]
+    return combine_audio(voices) if voices else None
+
+def combine_stage(metadata, master_audio, *segments):
+    video_segments = [segment for segment in segments if segment]
+    if not video_segments: print("❌ No video segments created. Exiting."); return None
+    return combine_videos(video_segments, master_audio, VIDEO_PATH, metadata)
+
+def write_metadata(stories):
+    main_title = stories[0]['title'] if stories else "Today's News Roundup"
     description_text = " | ".join([s['title'] for s in stories]) + f"\n\nStay informed with the latest headlines. In this video: {stories[0]['title']}, and more."
-    metadata = {"title": main_title, "description": description_text[:5000], "tags": ["news", "world news", "daily news", "breaking news", "headlines"] + [s['title'].split(' ')[0] for s in stories]}
+    metadata = {"kind": "combined", "title": main_title, "description": description_text[:5000], "tags": ["news", "world news", "daily news", "breaking news", "headlines"] + [s['title'].split(' ')[0] for s in stories], "sources": [s['source'] for s in stories]}
     with open(METADATA_PATH, "w") as f: json.dump(metadata, f, indent=2)
     print("\n✅ Saved consolidated video metadata.")
-    combine_videos(video_segments, VOICE_PATH, VIDEO_PATH, metadata)
\ No newline at end of file
+    return metadata
+
+def build_pipeline(stories, metadata, manifest, stream=False):
+    """
+    Per-story voice, image and clip stages run concurrently; each segment renders as soon as its own story is ready.
+    In stream mode each finished segment is appended to an MPEG-TS timeline in story order, and the final step is a remux.
+    """
+    stages, segments = [], []
+    for i, story in enumerate(stories):
+        story_text = story_text_for(i, story)
+        stages += [
+            Stage(f"story_{i}_voice", synthesize_story_audio, args=(story_text, f"voice_{i}.mp3", f"subtitles_{i}.ass"), inputs=[story_text], outputs=lambda r: r),
+            Stage(f"story_{i}_images", download_story_images, args=(i, story), inputs=[story['title']], outputs=lambda r: r),
+            Stage(f"story_{i}_videos", search_and_download_videos, args=(story['title'], VIDEO_CLIP_DIR, 2), inputs=[story['title']], outputs=lambda r: r),
+            Stage(f"story_{i}_segment", render_segment, args=(i, story, stream), deps=[f"story_{i}_voice", f"story_{i}_images", f"story_{i}_videos"], kind=CPU, outputs=lambda r: [r]),
+        ]
+        segments.append(f"story_{i}_segment")
+        if stream:
+            previous = [f"story_{i-1}_append"] if i > 0 else []
+            stages.append(Stage(f"story_{i}_append", append_segment, deps=[f"story_{i}_segment"] + previous, allow_missing=True))
+    if stream:
+        stages.append(Stage("final", finalize_stream, args=(metadata,), deps=[f"story_{len(stories)-1}_append"], outputs=lambda r: [r]))
+        return Pipeline(stages, manifest=manifest)
+    stages += [
+        Stage("master_audio", master_audio_stage, deps=segments, allow_missing=True, outputs=lambda r: [r]),
+        Stage("final", combine_stage, args=(metadata,), deps=["master_audio"] + segments, kind=CPU, allow_missing=True, outputs=lambda r: [r]),
+    ]
+    return Pipeline(stages, manifest=manifest)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create the combined multi-story news video.")
+    parser.add_argument("--fresh", action="store_true", help="Ignore the run manifest and rebuild every stage.")
+    parser.add_argument("--plan", action="store_true", help="Acquire and probe assets, then print each render's ffmpeg command and cost estimate instead of encoding.")
+    parser.add_argument("--stream", action="store_true", help="Append branded segments to an MPEG-TS timeline as they finish and remux at the end.")
+    args = parser.parse_args(argv)
+    if args.plan: os.environ["RENDER_PLAN_ONLY"] = "1"
+    reset_visual_index()
+
+    manifest = RunManifest(fresh=args.fresh)
+    if manifest.is_new: cleanup()
+    os.makedirs(IMAGE_DIR, exist_ok=True)
+    os.makedirs(VIDEO_CLIP_DIR, exist_ok=True)
+    stories = manifest.stage("stories", lambda: get_news_stories(num_articles=5) or None)
+    if not stories: print("❌ No stories found. Exiting."); exit()
+    metadata = write_metadata(stories)
+    # A streamed timeline is assembled from real segments, so a plan always uses the concat path.
+    results = build_pipeline(stories, metadata, manifest, stream=args.stream and not args.plan).run()
+    if results["final"] and not args.plan: manifest.finish()
+
+if __name__ == "__main__":
+    with metrics.run("create_combined_news"): main()
@@ -1,24 +1,33 @@
 import os
 import sys
+import argparse
 import requests
 import subprocess
 import random
 import textwrap
 import json
 import re
-import itertools
 import datetime
 from pathlib import Path
-from newspaper import Article
-from google.cloud import texttospeech
-from google.oauth2 import service_account
 import shutil
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from PIL import Image
-import cairosvg
-import google.generativeai as genai
-import yt_dlp
+from google_clients import tts_client
+from story_index import StoryIndex, story_source
+from news_source import fetch_headlines, parse_article
+from run_manifest import RunManifest
+from pipeline import Pipeline, Stage, CPU
+from encode_profiles import encode_ladder
+from render_cost import plan_only, planned
+from quota import ledger
+from image_search import search_image_urls
+from clip_fetcher import search_candidates, fetch_clips
+from image_ingest import RejectedImage, fetch_image, ingest_image, LANDSCAPE
+from visual_dedup import visual_index, reset_visual_index, drop_duplicate_image, drop_duplicate_clip
+from pexels_clips import PEXELS_VIDEO_ENDPOINT, mezzanine_clip
+from filtergraph import Graph, fit, recrop
+from timeline import TimelinePlan, plan_timeline
+from windowed_render import WINDOW_DIR, needs_windows, render_timeline
+from branding import add_branding
+import metrics
 
 # --- Configuration ---
 class Config:
@@ -31,13 +40,16 @@ class Config:
         self.gsearch_cse_id = os.getenv("GSEARCH_CSE_ID")
         self.pexels_api_key = os.getenv("PEXELS_API_KEY")
         self.validate()
-        if self.google_api_key: genai.configure(api_key=self.google_api_key)
 
         self.image_dir = Path("images")
         self.video_clip_dir = Path("videoclips")
         self.final_video_path = Path("final_content.mp4")
         self.voice_path = Path("voice.mp3")
         self.ass_path = Path("subtitles.ass")
+        # --with-short: the Short is rendered from the same timeline, in the same ffmpeg process.
+        self.with_short = False
+        self.short_video_path = Path("final_content_shorts.mp4")
+        self.short_ass_path = Path("subtitles_shorts.ass")
         self.images_to_fetch = 8
         self.youtube_videos_to_fetch = 3
         self.pexels_videos_to_fetch = 2
@@ -61,7 +73,8 @@ def cleanup(cfg: Config):
     print("🧹 Cleaning up previous run artifacts...")
     shutil.rmtree(cfg.image_dir, ignore_errors=True)
     shutil.rmtree(cfg.video_clip_dir, ignore_errors=True)
-    for f in [cfg.voice_path, cfg.final_video_path, cfg.ass_path, Path("timeline.mp4")]:
+    shutil.rmtree(WINDOW_DIR, ignore_errors=True)
+    for f in [cfg.voice_path, cfg.final_video_path, cfg.ass_path, cfg.short_video_path, cfg.short_ass_path, Path("timeline.mp4")]:
         f.unlink(missing_ok=True)
 
 def get_media_duration(media_path: Path) -> float | None:
@@ -88,29 +101,33 @@ def clean_ai_script(text: str) -> str:
     return "\n".join(filter(None, cleaned_lines))
 
 # --- Core Workflow Functions ---
-def get_top_story(cfg: Config) -> tuple[str, str] | None:
+def get_top_story(cfg: Config) -> tuple[str, str, dict] | None:
     print("📰 Fetching top news stories to select one randomly...")
-    params = {"token": cfg.gnews_api_key, "lang": "en", "country": "us", "max": 10}
     try:
-        r = requests.get("https://gnews.io/api/v4/top-headlines", params=params, timeout=10)
-        r.raise_for_status()
-        articles_data = r.json().get("articles", [])
+        articles_data = fetch_headlines(cfg.gnews_api_key, max_articles=10)
         if not articles_data: print("❌ GNews API returned no articles."); return None
         random.shuffle(articles_data)
+        index = StoryIndex("single")
         for article_data in articles_data:
             try:
                 print(f"  -> Attempting to process: {article_data['title']}")
-                article = Article(article_data['url'])
-                article.download(); article.parse()
-                if not article.text or len(article.text.split()) < 400: continue
-                print("    - Generating detailed script with AI for a ~3 minute video...")
-                model = genai.GenerativeModel('gemini-1.5-flash')
-                prompt = f"Analyze the following news article and expand it into a detailed news script suitable for a 3-minute video narration. Structure it with an introduction, several paragraphs covering key details and context, and a conclusion. Output ONLY the finished, clean script text."
-                response = model.generate_content(prompt + f"\n\n---\n{article.text}\n---")
-                clean_content = clean_ai_script(response.text)
+                if index.is_published(article_data['url'], article_data['title'], article_data.get('description', '')): continue
+                article_text = parse_article(article_data['url'])
+                if not article_text or len(article_text.split()) < 400: continue
+                if ledger().try_acquire("gemini"):
+                    print("    - Generating detailed script with AI for a ~3 minute video...")
+                    import google.generativeai as genai
+                    genai.configure(api_key=cfg.google_api_key)
+                    model = genai.GenerativeModel('gemini-1.5-flash')
+                    prompt = f"Analyze the following news article and expand it into a detailed news script suitable for a 3-minute video narration. Structure it with an introduction, several paragraphs covering key details and context, and a conclusion. Output ONLY the finished, clean script text."
+                    response = model.generate_content(prompt + f"\n\n---\n{article_text}\n---")
+                    clean_content = clean_ai_script(response.text)
+                else:
+                    print("    - Gemini quota spent; narrating the article text directly.")
+                    clean_content = clean_ai_script(article_text)
                 if len(clean_content.split()) < 300: continue
                 print(f"✅ Randomly selected story: {article_data['title']}")
-                return article_data['title'], clean_content
+                return article_data['title'], clean_content, story_source(article_data)
             except Exception as e: print(f"    - Failed to process article. Error: {e}. Trying next.")
     except Exception as e: print(f"❌ News fetch API error: {e}")
     print("❌ Could not find a suitable top story to process.")
@@ -118,38 +135,35 @@ def get_top_story(cfg: Config) -> tuple[str, str] | None:
 
 def get_visual_assets(query: str, cfg: Config) -> tuple[list, list]:
     print(f"🖼️ 📹 Acquiring visual assets for: '{query}'")
+    downloaded_images = search_and_download_images(query, cfg)
+    youtube_videos = search_and_download_youtube_videos(query, cfg)
+    pexels_videos = search_and_download_pexels_videos(query, cfg)
+    return downloaded_images, youtube_videos + pexels_videos
+
+def search_and_download_images(query: str, cfg: Config) -> list[str]:
     downloaded_images = []
     try:
-        img_params = {"key": cfg.google_api_key, "cx": cfg.gsearch_cse_id, "q": query, "searchType": "image", "num": cfg.images_to_fetch}
-        res = requests.get("https://www.googleapis.com/customsearch/v1", params=img_params, timeout=10); res.raise_for_status()
-        image_urls = [item["link"] for item in res.json().get("items", [])]
+        image_urls = search_image_urls(query, cfg.images_to_fetch, cfg.google_api_key, cfg.gsearch_cse_id, cfg.pexels_api_key)
         if image_urls:
             print(f"    - Downloading & sanitizing {len(image_urls)} images...")
             for i, url in enumerate(image_urls):
                 img_path = None
+                if visual_index().known_duplicate(url): print(f"      ♊ Skipping known duplicate {url}"); continue
                 try:
-                    ext = (Path(url.split('?')[0]).suffix or ".jpg")[:5]
-                    if not ext.lower() in ['.jpg', '.jpeg', '.png', '.webp', '.svg']: ext = '.jpg'
-                    img_path = cfg.image_dir / f"img_{i}{ext}"
-                    r = requests.get(url, timeout=15, headers={"User-Agent": "Mozilla/5.0"}); r.raise_for_status()
-                    img_path.write_bytes(r.content)
+                    img_path = fetch_image(url, cfg.image_dir / f"img_{i}")
                     final_path = img_path
                     if img_path.suffix.lower() == ".svg":
+                        import cairosvg
                         png_path = img_path.with_suffix(".png")
                         cairosvg.svg2png(url=str(img_path), write_to=str(png_path)); img_path.unlink(); final_path = png_path
-                    with Image.open(final_path) as img:
-                        rgb_img = img.convert('RGB')
-                        jpeg_path = final_path.with_suffix(".jpg")
-                        rgb_img.save(jpeg_path, "jpeg", quality=95)
-                        if final_path != jpeg_path: final_path.unlink()
-                        downloaded_images.append(str(jpeg_path))
+                    if drop_duplicate_image(final_path, url): continue
+                    downloaded_images.append(ingest_image(final_path, canvas=LANDSCAPE))
+                except RejectedImage as e: print(f"      - Skipped {url}: {e}")
                 except Exception:
                     if img_path and img_path.exists(): img_path.unlink()
     except Exception as e: print(f"    - Warning: Image search failed: {e}")
-
-    youtube_videos = search_and_download_youtube_videos(query, cfg)
-    pexels_videos = search_and_download_pexels_videos(query, cfg)
-    return downloaded_images, youtube_videos + pexels_videos
+    visual_index().save()
+    return downloaded_images
 
 def extract_keywords(title: str) -> str:
     stop_words = {"a", "an", "the", "and", "or", "in", "on", "for", "with", "is", "are", "was", "were", "of", "to", "at", "by", "it", "from", "as", "after", "before", "how", "what", "why", "today", "live", "updates"}
@@ -159,53 +173,29 @@ def extract_keywords(title: str) -> str:
 
 def search_and_download_youtube_videos(query: str, cfg: Config) -> list[str]:
     print(f"    - Searching YouTube for {cfg.youtube_videos_to_fetch} Creative Commons clips...")
-    downloaded_clips = []
     search_terms = [f'"{query} news"', f'"{query}" footage', f'"{query}" b-roll']
 
     cookies_path = Path("cookies.txt")
     use_cookies = cookies_path.exists()
+    if not use_cookies: print(f"      ⚠️ 'cookies.txt' not found. Attempting unauthenticated download (may fail).")
+    cookies = str(cookies_path) if use_cookies else None
 
-    for i, term in enumerate(search_terms):
-        if len(downloaded_clips) >= cfg.youtube_videos_to_fetch:
-            break
-
-        clip_path = cfg.video_clip_dir / f"yt_clip_{i}.mp4"
-        search_query = f'ytsearch10:{term}'
-
-        ydl_opts = {
-            'format': 'b[ext=mp4]',
-            'outtmpl': str(clip_path),
-            'quiet': True,
-            'no_warnings': True,
-            'ignoreerrors': True,
-            'noplaylist': True,
-            'default_search': 'ytsearch',
-            'match_filter': yt_dlp.utils.match_filter_func("!is_live"),
-            'postprocessor_args': {
-                'ffmpeg': ['-ss', '00:00:05.00', '-t', str(cfg.video_clip_duration), '-an']
-            },
-        }
-
-        if use_cookies:
-            ydl_opts['cookies'] = str(cookies_path)
-        else:
-            print(f"      ⚠️ 'cookies.txt' not found. Attempting unauthenticated download (may fail).")
-
+    candidates, seen = [], set()
+    for term in search_terms:
+        if len(candidates) >= cfg.youtube_videos_to_fetch * 3: break
         try:
-            print(f"      - Searching and attempting download for clip #{i+1} using query: {search_query}")
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([search_query])
-
-            if clip_path.exists():
-                print(f"      ✅ Successfully downloaded: {clip_path}")
-                downloaded_clips.append(str(clip_path))
-            else:
-                print(f"      ❌ Clip {i+1} not found at expected path: {clip_path}")
-        except yt_dlp.utils.DownloadError as e:
-            print(f"      ❌ yt_dlp DownloadError for clip #{i+1}: {e}")
+            for entry in search_candidates(term, limit=10, cookies=cookies):
+                if entry["id"] in seen or (entry.get("duration") or 0) < cfg.video_clip_duration + 5: continue
+                url = f"https://www.youtube.com/watch?v={entry['id']}"
+                if visual_index().known_duplicate(url): continue
+                seen.add(entry["id"]); candidates.append(url)
         except Exception as e:
-            print(f"      ❌ Unexpected error while downloading clip #{i+1}: {e}")
+            print(f"      ❌ Search failed for {term}: {e}")
 
+    print(f"      - Fetching {cfg.video_clip_duration}s ranges from {len(candidates)} candidate(s)...")
+    downloaded_clips = fetch_clips(candidates, cfg.video_clip_dir, cfg.youtube_videos_to_fetch, start=5, duration=cfg.video_clip_duration, cookies=cookies,
+                                   accept=lambda path, url: not drop_duplicate_clip(path, url))
+    visual_index().save()
     print(f"    - Downloaded {len(downloaded_clips)} clip(s) from YouTube ({'with' if use_cookies else 'without'} cookies).")
     return downloaded_clips
 
@@ -224,20 +214,29 @@ def search_and_download_pexels_videos(query: str, cfg: Config) -> list[str]:
         try:
             headers = {"Authorization": cfg.pexels_api_key}
             params = {"query": q, "per_page": (cfg.pexels_videos_to_fetch-len(downloaded_clips))*2+3, "orientation": "landscape"}
-            res = requests.get("https://api.pexels.com/videos/search", headers=headers, params=params, timeout=15); res.raise_for_status()
+            if not ledger().try_acquire("pexels"): break
+            res = requests.get(PEXELS_VIDEO_ENDPOINT, headers=headers, params=params, timeout=15)
+            if not ledger().note_response("pexels", res): break
+            res.raise_for_status()
             videos = res.json().get("videos", [])
             if not videos: continue
             for video in videos:
                 if len(downloaded_clips) >= cfg.pexels_videos_to_fetch: break
                 if video.get('id') in processed_ids: continue
                 processed_ids.add(video.get('id'))
-                video_link = next((f['link'] for f in video.get('video_files', []) if f.get('quality') == 'hd'), None)
-                if not video_link: continue
+                if visual_index().known_duplicate(video.get('url')): continue
                 clip_path = cfg.video_clip_dir / f"px_clip_{video.get('id')}.mp4"
-                r_dl = requests.get(video_link, timeout=45, headers={"User-Agent": "Mozilla/5.0"}); r_dl.raise_for_status()
-                clip_path.write_bytes(r_dl.content)
-                if clip_path.exists(): downloaded_clips.append(str(clip_path))
-        except Exception: continue
+                # One bad rendition or ffmpeg failure skips that video, not the rest of the search results.
+                try:
+                    mezzanine = mezzanine_clip(video, cfg.video_clip_duration)
+                    if not mezzanine: continue
+                    shutil.copyfile(mezzanine, clip_path)
+                except Exception as e:
+                    print(f"      ❌ Could not fetch Pexels video {video.get('id')}: {e}"); continue
+                if clip_path.exists() and not drop_duplicate_clip(clip_path, video.get('url')): downloaded_clips.append(str(clip_path))
+        except Exception as e:
+            print(f"      ❌ Pexels search for '{q}' failed: {e}"); continue
+    visual_index().save()
     print(f"    - Downloaded {len(downloaded_clips)} clips from Pexels.")
     return downloaded_clips
 
@@ -245,10 +244,10 @@ def search_and_download_pexels_videos(query: str, cfg: Config) -> list[str]:
 def generate_audio_and_subs(text: str, cfg: Config) -> float | None:
     """Generates voiceover and subtitles using the simplest reliable timing method."""
     print("🎤 Generating voiceover...")
+    from google.cloud import texttospeech
     try:
         selected_voice = random.choice(["en-US-Studio-M", "en-US-Wavenet-J", "en-US-Wavenet-F"])
-        creds = service_account.Credentials.from_service_account_info(json.loads(cfg.gcp_sa_key))
-        client = texttospeech.TextToSpeechClient(credentials=creds)
+        client = tts_client(cfg.gcp_sa_key)
         synthesis_input = texttospeech.SynthesisInput(text=text)
         voice_params = texttospeech.VoiceSelectionParams(language_code="en-US", name=selected_voice)
         audio_config = texttospeech.AudioConfig(audio_encoding=texttospeech.AudioEncoding.MP3)
@@ -291,93 +290,138 @@ def generate_audio_and_subs(text: str, cfg: Config) -> float | None:
     print("✅ Subtitles created.")
     return duration
 
+def plan_render(images: list, videos: list, duration: float, cfg: Config) -> TimelinePlan:
+    """Two stills first, then the rest shuffled, cut to cover the narration exactly."""
+    image_pool = list(images)
+    lead, remaining_assets = image_pool[:2], image_pool[2:] + list(videos)
+    random.shuffle(remaining_assets)
+    is_image = lambda p: Path(p).suffix.lower() == '.jpg'
+    clip_seconds = lambda p: min(get_media_duration(p) or cfg.video_clip_duration, cfg.video_clip_duration)
+    return plan_timeline([(p, cfg.image_duration if is_image(p) else clip_seconds(p), is_image(p)) for p in lead + remaining_assets], duration)
+
+def short_narration(duration: float, cfg: Config) -> float | None:
+    """Seconds of the narration's opening that the Short covers, after writing its 9:16 subtitles; None if nothing fits."""
+    from create_news_video_shorts import SHORTS_MAX_LENGTH, narration_span, read_cues, shorts_captions, write_ass_for_shorts
+    cues = narration_span(read_cues(cfg.ass_path), max_seconds=min(SHORTS_MAX_LENGTH, duration))
+    if not cues: print("  ⚠️ No subtitle lines fit in a Short; rendering the landscape video only."); return None
+    write_ass_for_shorts(shorts_captions(cues), cfg.short_ass_path)
+    return cues[-1][1]
+
 def render_video(images: list, videos: list, duration: float, cfg: Config):
-    """Renders the final video with a specific, user-defined asset sequence."""
+    """
+    Renders the final video with a specific, user-defined asset sequence. With cfg.with_short the
+    decoded timeline is split into a 16:9 and a 9:16 branch, each with its own subtitles and
+    branding layout, and both files are encoded by the same ffmpeg process.
+    Raises RuntimeError on failure, which the pipeline records as a failed render stage.
+    """
     print("🎞️ Rendering final video with specific visual sequence...")
-    if not images and not videos: print("❌ No visual assets available to render."); sys.exit(1)
-
-    playlist, image_pool = [], list(images)
-    if image_pool: playlist.append({'path': image_pool.pop(0), 'duration': cfg.image_duration, 'is_image': True})
-    if image_pool: playlist.append({'path': image_pool.pop(0), 'duration': cfg.image_duration, 'is_image': True})
-
-    remaining_assets = image_pool + videos
-    random.shuffle(remaining_assets)
-    playlist.extend([{'path': p, 'duration': cfg.image_duration if Path(p).suffix.lower() == '.jpg' else cfg.video_clip_duration, 'is_image': Path(p).suffix.lower() == '.jpg'} for p in remaining_assets])
-
-    final_visual_sequence, current_duration = [], 0
-    playlist_cycle = itertools.cycle(playlist)
-    while current_duration < duration:
-        item = next(playlist_cycle)
-        final_visual_sequence.append(item)
-        current_duration += item['duration']
-
-    print(f"  - Assembled a visual playlist of {len(final_visual_sequence)} items to cover {duration:.2f}s.")
-
-    ffmpeg_cmd = ["ffmpeg", "-y", "-v", "error"]
-    filter_chains = []
-
-    for i, item in enumerate(final_visual_sequence):
-        if item['is_image']:
-            ffmpeg_cmd.extend(["-loop", "1", "-t", str(item['duration']), "-i", item['path']])
-        else:
-            ffmpeg_cmd.extend(["-i", item['path']])
-        filter_chains.append(f"[{i}:v]scale=1920:1080:force_original_aspect_ratio=decrease,pad=1920:1080:(ow-iw)/2:(oh-ih)/2,setsar=1,format=yuv420p[v{i}]")
-
-    concat_inputs = "".join(f"[v{i}]" for i in range(len(final_visual_sequence)))
-    scaling_chain = ";".join(filter_chains)
-    concat_chain = f"{concat_inputs}concat=n={len(final_visual_sequence)}:v=1:a=0[timeline_v]"
-
-    audio_idx, bgm_idx, gif_idx, logo_idx = len(final_visual_sequence), len(final_visual_sequence)+1, len(final_visual_sequence)+2, len(final_visual_sequence)+3
-    ffmpeg_cmd.extend(["-i", str(cfg.voice_path), "-i", random.choice(cfg.bgm_files), "-ignore_loop", "0", "-i", str(cfg.like_file), "-loop", "1", "-i", str(cfg.logo_file)])
-
-    overlay_chains = [
-        f"[timeline_v]ass='{cfg.ass_path.as_posix()}'[sub]",
-        f"[{bgm_idx}:a]volume=0.08,afade=t=out:st={duration-3}:d=3[bgm]",
-        f"[{audio_idx}:a][bgm]amix=inputs=2:duration=first:dropout_transition=3[a]",
-        f"[{gif_idx}:v]scale=190:50[gif]", f"[{logo_idx}:v]scale=60:60[logo]",
-        f"[sub][logo]overlay=10:10[ol1]",
-        f"[ol1]drawtext=text='HotWired':fontfile='{cfg.font_text}':fontcolor=red:fontsize=36:x=75:y=18[ol2]",
-        f"[ol2][gif]overlay=W-w-10:10[v]"
-    ]
-
-    final_filter_complex = ";".join([scaling_chain, concat_chain] + overlay_chains)
-    ffmpeg_cmd.extend(["-filter_complex", final_filter_complex, "-map", "[v]", "-map", "[a]", "-c:v", "libx264", "-c:a", "aac", "-t", str(duration), "-movflags", "+faststart", str(cfg.final_video_path)])
+    if not images and not videos: raise RuntimeError("No visual assets available to render.")
+
+    plan = plan_render(images, videos, duration, cfg)
+    if not plan.shots: raise RuntimeError("No playable visual assets to render.")
+    print(f"  - Planned {len(plan.shots)} shots covering exactly {plan.total:.2f}s.")
+
+    g = Graph()
+    if needs_windows(len(plan.shots)):
+        timeline = render_timeline(plan.shots, "final")
+        timeline_v = g.input(timeline, "-f", "concat", "-safe", "0", size=(1920, 1080)).video
+    else:
+        canvas = []
+        for i, shot in enumerate(plan.shots):
+            visual = g.input(shot.path, *shot.input_options(), probe=True)
+            canvas.append(g.chain(visual.video, *fit(1920, 1080), "format=yuv420p", label=f"v{i}"))
+        timeline_v = g.chain(canvas, f"concat=n={len(canvas)}:v=1:a=0", label="timeline_v")
+
+    voice, bgm = g.input(str(cfg.voice_path)), g.input(random.choice(cfg.bgm_files))
+    short_seconds = short_narration(duration, cfg) if cfg.with_short else None
+    voice_a, bgm_a = voice.audio, bgm.audio
+    if short_seconds:
+        (timeline_v, portrait_v), (voice_a, short_voice), (bgm_a, short_bgm) = g.split(timeline_v, 2), g.split(voice_a, 2), g.split(bgm_a, 2)
+    sub = g.chain(timeline_v, f"ass='{cfg.ass_path.as_posix()}'", label="sub")
+    bgm_faded = g.chain(bgm_a, "volume=0.08", f"afade=t=out:st={duration-3}:d=3", label="bgm")
+    audio = g.chain([voice_a, bgm_faded], "amix=inputs=2:duration=first:dropout_transition=3", label="a")
+    video = add_branding(g, sub, "landscape", "v", cfg.logo_file, cfg.like_file, cfg.font_text)
+    if short_seconds:
+        # The trims end the 9:16 branch on its own, so the landscape output never waits on it.
+        fade = min(0.4, short_seconds / 2)
+        portrait = g.chain(portrait_v, f"trim=duration={short_seconds:.3f}", *recrop(1080, 1920), f"ass='{cfg.short_ass_path.as_posix()}'", "format=yuv420p", label="portrait")
+        short_video = add_branding(g, portrait, "portrait", "short_v", cfg.logo_file, cfg.like_file, cfg.font_text)
+        s_voice = g.chain(short_voice, f"atrim=duration={short_seconds:.3f}", f"afade=t=out:st={short_seconds - fade:.3f}:d={fade:.3f}", label="s_voice")
+        s_bgm = g.chain(short_bgm, "volume=0.05", label="s_bgm")
+        short_audio = g.chain([s_voice, s_bgm], "amix=inputs=2:duration=first:normalize=0", label="short_a")
+    ffmpeg_cmd = g.command(base=("ffmpeg", "-y", "-v", "error"))
+    outputs = [(["-map", g.map(video), "-map", g.map(audio), "-t", str(duration), "-movflags", "+faststart"], cfg.final_video_path, "longform", duration)]
+    if short_seconds:
+        outputs.append((["-map", g.map(short_video), "-map", g.map(short_audio), "-t", f"{short_seconds:.3f}", "-movflags", "+faststart"], cfg.short_video_path, "shorts", short_seconds))
 
     print("  - Executing final render command...")
     try:
-        subprocess.run(ffmpeg_cmd, check=True)
+        encode_ladder(ffmpeg_cmd, outputs)
+        if plan_only(): return planned(cfg.final_video_path)
+        shutil.rmtree(WINDOW_DIR / "final", ignore_errors=True)
         print(f"✅ Final video saved: {cfg.final_video_path}")
-    except subprocess.CalledProcessError:
-        print(f"❌ FFmpeg rendering failed. Full command was: {' '.join(ffmpeg_cmd)}"); sys.exit(1)
+        if short_seconds: print(f"✅ YouTube Short saved: {cfg.short_video_path}")
+        return str(cfg.final_video_path)
+    except subprocess.CalledProcessError as e:
+        print(f"    Full command was: {' '.join(ffmpeg_cmd)}")
+        raise RuntimeError(f"FFmpeg rendering failed: {e}") from e
 
 # --- Main Execution ---
-def main():
-    """Main function to run the single-story video generation workflow."""
-    cfg = Config()
-    cleanup(cfg)
-    cfg.image_dir.mkdir(exist_ok=True)
-    cfg.video_clip_dir.mkdir(exist_ok=True)
-    story_data = get_top_story(cfg)
-    if not story_data: sys.exit(1)
-
-    title, content = story_data
-    images, videos = get_visual_assets(title, cfg)
-    if not images and not videos:
-        print("❌ No visual assets could be found for the story. Exiting."); sys.exit(1)
+INTRO_LINE = "Welcome to Hot Wired. In today's top story:"
 
-    intro_line = "Welcome to Hot Wired. In today's top story:"
-    narration_text = f"{intro_line}\n\n{title}.\n\n{content}"
+def narration_for(story) -> str:
+    title, content, _ = story
+    return f"{INTRO_LINE}\n\n{title}.\n\n{content}"
 
-    metadata = {"title": title, "description": content, "tags": ["news", "Usa Today", "update", "daily"]}
+def write_metadata(story) -> str:
+    title, content, source = story
+    metadata = {"kind": "single", "title": title, "description": content, "tags": ["news", "Usa Today", "update", "daily"], "sources": [source]}
     with open(METADATA_PATH, "w") as f: json.dump(metadata, f, indent=2)
     print("✅ Saved video metadata to video_metadata.json")
+    return METADATA_PATH
+
+def render_stage(cfg: Config, images: list, youtube_videos: list, pexels_videos: list, duration: float):
+    videos = youtube_videos + pexels_videos
+    if not images and not videos:
+        print("❌ No visual assets could be found for the story. Exiting."); return None
+    return render_video(images, videos, duration, cfg)
+
+def build_pipeline(cfg: Config, manifest: RunManifest) -> Pipeline:
+    """Single-story graph: image, clip and voice acquisition overlap, then one render."""
+    return Pipeline([
+        Stage("story", lambda: get_top_story(cfg)),
+        Stage("metadata", write_metadata, deps=["story"], outputs=lambda r: [r]),
+        Stage("images", lambda story: search_and_download_images(story[0], cfg), deps=["story"], outputs=lambda r: r),
+        Stage("youtube_clips", lambda story: search_and_download_youtube_videos(story[0], cfg), deps=["story"], outputs=lambda r: r),
+        Stage("pexels_clips", lambda story: search_and_download_pexels_videos(story[0], cfg), deps=["story"], outputs=lambda r: r),
+        Stage("voice", lambda story: generate_audio_and_subs(narration_for(story), cfg), deps=["story"], outputs=lambda r: [cfg.voice_path, cfg.ass_path]),
+        Stage("render", render_stage, args=(cfg,), deps=["images", "youtube_clips", "pexels_clips", "voice"], kind=CPU, inputs=cfg.with_short,
+              outputs=lambda r: [r] + [p for p in [cfg.short_video_path] if cfg.with_short and p.exists()]),
+    ], manifest=manifest)
+
+def main(argv=None):
+    """Main function to run the single-story video generation workflow."""
+    parser = argparse.ArgumentParser(description="Create a single-story news video.")
+    parser.add_argument("--fresh", action="store_true", help="Ignore the run manifest and rebuild every stage.")
+    parser.add_argument("--plan", action="store_true", help="Acquire and probe assets, then print each render's ffmpeg command and cost estimate instead of encoding.")
+    parser.add_argument("--with-short", action="store_true", help="Also render a YouTube Short of the narration's opening from the same decoded timeline, in the same ffmpeg process.")
+    args = parser.parse_args(argv)
+    if args.plan: os.environ["RENDER_PLAN_ONLY"] = "1"
+    reset_visual_index()
 
-    duration = generate_audio_and_subs(narration_text, cfg)
-    if not duration: sys.exit(1)
+    cfg = Config()
+    cfg.with_short = args.with_short
+    manifest = RunManifest(fresh=args.fresh)
+    if manifest.is_new: cleanup(cfg)
+    cfg.image_dir.mkdir(exist_ok=True)
+    cfg.video_clip_dir.mkdir(exist_ok=True)
 
-    render_video(images, videos, duration, cfg)
+    results = build_pipeline(cfg, manifest).run()
+    if not results["render"]: sys.exit(1)
+    if args.plan: print("\n📝 Plan complete; nothing was encoded."); return
+    manifest.finish()
 
     print("\n🎉 Single-story video creation complete!")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with metrics.run("create_news_video"): main()
\ No newline at end of file
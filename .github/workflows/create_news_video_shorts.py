@@ -1,26 +1,42 @@
 import os
-import requests
-import mimetypes
+import argparse
 import subprocess
 import random
 import textwrap
 import json
+import itertools
 from pathlib import Path
-from pydub import AudioSegment
-from newspaper import Article
-from google.cloud import texttospeech
-from google.oauth2 import service_account
 import shutil
+from google_clients import tts_client
+from story_index import StoryIndex, story_source
+from news_source import fetch_headlines, parse_article
+from run_manifest import MANIFEST_PATH, RunManifest, file_digest
+from pipeline import Pipeline, Stage, CPU
+from encode_profiles import encode
+from render_cost import plan_only, planned
+from image_search import search_image_urls
+from image_ingest import fetch_image, ingest_image, PORTRAIT
+from visual_dedup import visual_index, reset_visual_index, drop_duplicate_image
+from timeline import plan_timeline
+from filtergraph import Graph, cover, recrop
+from branding import add_branding
+import metrics
 
 # === CONFIG ===
 GNEWS_API_KEY = os.getenv("GNEWS_KEY")
-GNEWS_API_ENDPOINT = "https://gnews.io/api/v4/top-headlines"
 IMAGE_DIR = "images"
 VOICE_PATH = "voice.mp3"
 VIDEO_PATH = "final_content_shorts.mp4"
 ASS_PATH = "subtitles.ass"
 METADATA_PATH = "video_metadata.json"
 IMAGE_COUNT = 10
+SHORTS_MAX_LENGTH = 58.0
+# --from-run: a derived Short ends on a sentence once it has this much narration, and fades the cut out.
+SHORTS_MIN_LENGTH = 30.0
+NARRATION_FADE_SECONDS = 0.4
+SENTENCE_ENDS = (".", "!", "?", '"')
+SHORT_IMAGE_SECONDS = 2
+SHORT_CLIP_SECONDS = 4
 FONT_TEXT = "/usr/share/fonts/truetype/noto/NotoSans-Regular.ttf"
 BGM_FILES = ["./assets/bkg1.mp3", "./assets/bkg2.mp3"]
 LOGO_FILE = "assets/icon.png"
@@ -29,6 +45,8 @@ SKIP_DOMAINS = [
     "washingtonpost.com", "navigacloud.com", "redlakenationnews.com",
     "imengine.public.prod.pdh.navigacloud.com", "arc-anglerfish-washpost-prod-washpost.s3.amazonaws.com"
 ]
+# MarginL and MarginR are 60 rather than 10 to keep captions inside the mobile safe area.
+ASS_HEADER = "[Script Info]\nScriptType: v4.00+\nPlayResX: 1080\nPlayResY: 1920\n\n[V4+ Styles]\nFormat: Name, Fontname, Fontsize, PrimaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding\nStyle: Default,Arial,96,&H0000FFFF,&H00000000,&H00000000,1,0,0,0,100,100,0,0,1,2,0,2,60,60,100,1\n\n[Events]\nFormat: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
 
 
 def cleanup():
@@ -81,50 +99,42 @@ def summarize_text(text_to_summarize, word_count=150):
     return summary
 
 def get_latest_news():
-    params = {"token": GNEWS_API_KEY, "lang": "en", "country": "us", "max": 5}
     try:
-        r = requests.get(GNEWS_API_ENDPOINT, params=params, timeout=10)
-        r.raise_for_status()
-        articles = r.json().get("articles", [])
-        if not articles: return None, None, None
-        a = articles[0]
+        articles = fetch_headlines(GNEWS_API_KEY, max_articles=5)
+        if not articles: return None, None, None, None
+        index = StoryIndex("short")
+        a = next((a for a in articles if not index.is_published(a.get("url", ""), a.get("title", ""), a.get("description", ""))), None)
+        if not a: print("❌ Every fetched story has already been published."); return None, None, None, None
         title, url = a.get("title", ""), a.get("url", "")
         try:
-            article = Article(url); article.download(); article.parse(); content = article.text
+            content = parse_article(url)
         except:
             content = a.get("description", "") or a.get("content", "")
-        return title, url, content
+        return title, url, content, story_source(a)
     except Exception as e:
-        print(f"❌ News fetch error: {e}"); return None, None, None
+        print(f"❌ News fetch error: {e}"); return None, None, None, None
 
 def search_images(query):
     API_KEY = os.getenv("GCP_API_KEY"); CSE_ID = os.getenv("GSEARCH_CSE_ID")
     try:
-        res = requests.get("https://www.googleapis.com/customsearch/v1", params={"key": API_KEY, "cx": CSE_ID, "q": query, "searchType": "image", "num": IMAGE_COUNT}, timeout=10)
-        res.raise_for_status()
-        items = res.json().get("items", [])
-        return [item["link"] for item in items if not any(d in item["link"] for d in SKIP_DOMAINS)]
+        return search_image_urls(query, IMAGE_COUNT, API_KEY, CSE_ID, os.getenv("PEXELS_API_KEY"), orientation="portrait", skip_domains=SKIP_DOMAINS)
     except Exception as e:
         print(f"❌ Image search failed: {e}"); return []
 
 def download_image(url, path):
+    if visual_index().known_duplicate(url): print(f"♊ Skipping known duplicate {url}"); return None
     try:
-        r = requests.get(url, timeout=10, headers={"User-Agent": "Mozilla/5.0"}, stream=True)
-        r.raise_for_status()
-        content_type = r.headers.get("Content-Type", "");
-        if not content_type.startswith("image"): return None
-        ext = mimetypes.guess_extension(content_type.split(";")[0]) or ".jpg"
-        path = Path(path).with_suffix(ext)
-        with open(path, "wb") as f:
-            for chunk in r.iter_content(1024): f.write(chunk)
-        return path
-    except: return None
+        path = fetch_image(url, path, timeout=10)
+        if drop_duplicate_image(path, url): return None
+        return ingest_image(path, canvas=PORTRAIT, mode="cover")
+    except:
+        if path and Path(path).exists(): Path(path).unlink()
+        return None
 
 def generate_voice(text, out_path):
     print("🎤 Generating natural voice with Google TTS...")
-    service_account_info = json.loads(os.environ["GCP_SA_KEY"])
-    creds = service_account.Credentials.from_service_account_info(service_account_info)
-    client = texttospeech.TextToSpeechClient(credentials=creds)
+    from google.cloud import texttospeech
+    client = tts_client(os.environ["GCP_SA_KEY"])
     max_bytes = 4900; chunks = []; current_chunk = ""
     for paragraph in text.split("\n"):
         if len(current_chunk.encode("utf-8")) + len(paragraph.encode("utf-8")) < max_bytes:
@@ -143,141 +153,90 @@ def generate_voice(text, out_path):
     with open(out_path, "wb") as out: out.write(full_audio)
     print(f"✅ Voiceover saved: {out_path}")
 
+def fmt_time(seconds):
+    h = int(seconds // 3600); m = int((seconds % 3600) // 60); s = int(seconds % 60)
+    cs = int((seconds - int(seconds)) * 100); return f"{h}:{m:02d}:{s:02d}.{cs:02d}"
+
+def parse_time(value):
+    h, m, s = value.split(":"); return int(h) * 3600 + int(m) * 60 + float(s)
+
+def write_ass_for_shorts(groups, ass_path):
+    """Writes (start, end, lines) caption groups with the Shorts style."""
+    dialogue_lines = []
+    for start, end, lines in groups:
+        text_block = "\\N".join(lines)
+        dialogue_lines.append(f"Dialogue: 0,{fmt_time(start)},{fmt_time(end)},Default,,0,0,0,,{text_block}")
+    with open(ass_path, "w") as f: f.write(ASS_HEADER + "\n".join(dialogue_lines))
+
 def generate_ass_for_shorts(text, audio_path, ass_path):
     """Generates subtitles with larger side margins for mobile safe area."""
     print("📝 Generating styled subtitles for Shorts (9:16)...")
+    from pydub import AudioSegment
     audio = AudioSegment.from_file(audio_path); duration = len(audio) / 1000.0
     lines = textwrap.wrap(text, width=35)
     three_line_groups = [lines[i:i + 3] for i in range(0, len(lines), 3)]
     if not three_line_groups:
         print("⚠️ No text to generate subtitles for."); return
     duration_per_group = duration / len(three_line_groups)
-
-    def fmt_time(seconds):
-        h = int(seconds // 3600); m = int((seconds % 3600) // 60); s = int(seconds % 60)
-        cs = int((seconds - int(seconds)) * 100); return f"{h}:{m:02d}:{s:02d}.{cs:02d}"
-
-    # MODIFICATION: Increased MarginL and MarginR from 10 to 60 for safe area
-    header = f"[Script Info]\nScriptType: v4.00+\nPlayResX: 1080\nPlayResY: 1920\n\n[V4+ Styles]\nFormat: Name, Fontname, Fontsize, PrimaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding\nStyle: Default,Arial,96,&H0000FFFF,&H00000000,&H00000000,1,0,0,0,100,100,0,0,1,2,0,2,60,60,100,1\n\n[Events]\nFormat: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
-
-    dialogue_lines = []
-    for i, group in enumerate(three_line_groups):
-        start_time = fmt_time(i * duration_per_group)
-        end_time = fmt_time((i + 1) * duration_per_group)
-        text_block = "\\N".join(group)
-        dialogue_lines.append(f"Dialogue: 0,{start_time},{end_time},Default,,0,0,0,,{text_block}")
-
-    dialogues = "\n".join(dialogue_lines)
-    with open(ass_path, "w") as f: f.write(header + dialogues)
+    write_ass_for_shorts([(i * duration_per_group, (i + 1) * duration_per_group, group) for i, group in enumerate(three_line_groups)], ass_path)
     print(f"✅ Subtitles created.")
 
-def create_shorts_video(image_dir, audio_path, output_path, ass_path, video_length, bgm_candidates, metadata):
-    """Creates a YouTube Short (9:16) with overlays positioned in the safe area."""
+def create_shorts_video(image_dir, audio_path, output_path, ass_path, video_length, bgm_candidates, metadata, visuals=None):
+    """
+    Creates a YouTube Short (9:16) with overlays positioned in the safe area. `visuals` are
+    (path, seconds, is_image) timeline items re-cropped from landscape assets; by default every
+    image in `image_dir`, already portrait, for two seconds each.
+    """
     print("🎞 Rendering YouTube Short video...")
-    images = sorted(Path(image_dir).glob("*"))
-    if not images:
+    items = visuals or [(img_path, SHORT_IMAGE_SECONDS, True) for img_path in sorted(Path(image_dir).glob("*"))]
+    if not items:
         print("❌ No images found."); return
 
-    image_duration = 2
-    num_slides = int(video_length // image_duration) + 1
-    looped_images = [images[i % len(images)] for i in range(num_slides)]
-
-    ffmpeg_cmd = ["ffmpeg", "-y"]
-
-    for img_path in looped_images:
-        ffmpeg_cmd.extend(["-loop", "1", "-t", str(image_duration), "-i", str(img_path)])
-
-    current_index = len(looped_images)
-
-    voice_input_index = current_index
-    ffmpeg_cmd.extend(["-i", audio_path]); current_index += 1
-    selected_bgm = random.choice(bgm_candidates)
-    bgm_input_index = current_index
-    ffmpeg_cmd.extend(["-i", selected_bgm]); current_index += 1
-    gif_input_index = current_index
-    ffmpeg_cmd.extend(["-ignore_loop", "0", "-i", LIKE_FILE]); current_index += 1
-    logo_input_index = current_index
-    ffmpeg_cmd.extend(["-loop", "1", "-i", LOGO_FILE]); current_index += 1
-
-    filter_chains = []
-    processed_slide_streams = []
-
-    for i in range(num_slides):
-        input_stream = f"[{i}:v]"
-        output_stream_name = f"[v{i}]"
-        scale_crop_filter = f"{input_stream}scale=1080:1920:force_original_aspect_ratio=increase,crop=1080:1920,setsar=1{output_stream_name}"
-        filter_chains.append(scale_crop_filter)
-        processed_slide_streams.append(output_stream_name)
-
-    concat_inputs = "".join(processed_slide_streams)
-    filter_chains.append(f"{concat_inputs}concat=n={num_slides}:v=1:a=0[slides_raw]")
-    filter_chains.append(f"[slides_raw]ass='{Path(ass_path).as_posix()}',format=yuv420p[subtitled_slides]")
-    filter_chains.append(f"[{gif_input_index}:v]scale=190:50[gif]")
-    filter_chains.append(f"[{logo_input_index}:v]scale=60:60[logo]")
-
-    # MODIFICATION: Changed overlay and drawtext coordinates for mobile safe area
-    filter_chains.append(
-        # Place the logo at x=90, y=90 (further from the corner)
-        f"[subtitled_slides][logo]overlay=90:90[tmp1];"
-        # Place the text next to the new logo position (x=90 + 60px width + 15px padding = 165)
-        f"[tmp1]drawtext=text='HotWired':fontfile='{FONT_TEXT}':fontcolor=red:fontsize=60:x=165:y=90[tmp2];"
-        # Place the GIF further from the top-right corner
-        f"[tmp2][gif]overlay=W-w-90:90[v]"
-    )
-
-    filter_chains.append(f"[{voice_input_index}:a]volume=1.0[a1];[{bgm_input_index}:a]volume=0.05[a2];[a1][a2]amix=inputs=2:duration=first:normalize=0[aout]")
-
-    full_filter_complex = ";".join(filter_chains)
-    ffmpeg_cmd.extend(["-filter_complex", full_filter_complex])
-
-    ffmpeg_cmd.extend([
-        "-map", "[v]", "-map", "[aout]",
-        "-c:v", "libx264", "-pix_fmt", "yuv420p",
-        "-c:a", "aac", "-t", str(video_length), "-shortest",
-        "-movflags", "+faststart", output_path
-    ])
-
-    subprocess.run(ffmpeg_cmd, check=True)
-    print(f"✅ YouTube Short saved: {output_path}")
+    plan = plan_timeline(items, video_length)
+    shape = recrop if visuals else cover
 
-if __name__ == "__main__":
-    cleanup()
-    os.makedirs(IMAGE_DIR, exist_ok=True)
+    g = Graph()
+    slides = []
+    for i, shot in enumerate(plan.shots):
+        slide = g.input(shot.path, *shot.input_options(), probe=True)
+        slides.append(g.chain(slide.video, *shape(1080, 1920), label=f"v{i}"))
+    voice, bgm = g.input(audio_path), g.input(random.choice(bgm_candidates))
 
-    print("📰 Fetching news...")
-    title, url, content = get_latest_news()
-    if not title or not url: print("❌ No news found."); exit()
+    slides_raw = g.chain(slides, f"concat=n={len(slides)}:v=1:a=0", label="slides_raw")
+    subtitled = g.chain(slides_raw, f"ass='{Path(ass_path).as_posix()}'", "format=yuv420p", label="subtitled_slides")
+    # The portrait layout keeps the logo, name and GIF inside the mobile safe area.
+    video = add_branding(g, subtitled, "portrait", "v", LOGO_FILE, LIKE_FILE, FONT_TEXT)
 
-    print("🤖 Summarizing content for a ~55 second narration...")
-    summarized_content = summarize_text(content, word_count=150)
+    a1, a2 = g.chain(voice.audio, "volume=1.0", label="a1"), g.chain(bgm.audio, "volume=0.05", label="a2")
+    audio = g.chain([a1, a2], "amix=inputs=2:duration=first:normalize=0", label="aout")
 
-    metadata = {"title": title, "description": content, "tags": ["news", "shorts", "update", "daily"]}
-    with open(METADATA_PATH, "w") as f: json.dump(metadata, f, indent=2)
-    print("✅ Saved video metadata to video_metadata.json")
+    ffmpeg_cmd = g.command(video, audio) + ["-t", str(video_length), "-shortest", "-movflags", "+faststart"]
 
-    print("🔍 Searching for images...")
-    image_urls = search_images(title)
-    if not image_urls: print("❌ Image search failed. Exiting."); exit()
+    encode(ffmpeg_cmd, output_path, "shorts", video_length)
+    if plan_only(): return planned(output_path)
+    print(f"✅ YouTube Short saved: {output_path}")
+    return output_path
 
+def download_images(image_urls):
     print("📥 Downloading images...")
-    downloaded = 0
+    downloaded = []
     for i, img_url in enumerate(image_urls):
-        path = os.path.join(IMAGE_DIR, f"img_{i:03d}")
-        if download_image(img_url, path): downloaded += 1
-    if downloaded == 0: print("❌ No images downloaded, exiting."); exit()
+        path = download_image(img_url, os.path.join(IMAGE_DIR, f"img_{i:03d}"))
+        if path: downloaded.append(str(path))
+    visual_index().save()
+    return downloaded or None
 
-    narration_text = f"Welcome to today's update. Here's what you need to know in under a minute.\n\n{summarized_content}"
+def synthesize_narration(narration_text):
     print("🎤 Creating voiceover from summarized text...")
     generate_voice(narration_text, VOICE_PATH)
 
     original_narration_duration = get_media_duration(VOICE_PATH)
     if not original_narration_duration:
-        print("❌ Could not determine narration duration. Exiting."); exit()
+        print("❌ Could not determine narration duration. Exiting."); return None
 
     final_audio_path = VOICE_PATH
     final_video_duration = original_narration_duration
 
-    SHORTS_MAX_LENGTH = 58.0
     if original_narration_duration > SHORTS_MAX_LENGTH:
         print(f"⚠️ Narration duration ({original_narration_duration:.2f}s) is over the target. Trimming to {SHORTS_MAX_LENGTH}s.")
         trimmed_voice_path = "voice_trimmed.mp3"
@@ -290,13 +249,152 @@ if __name__ == "__main__":
 
     print("📝 Creating subtitles...")
     generate_ass_for_shorts(narration_text, VOICE_PATH, ASS_PATH)
+    return {"audio_path": final_audio_path, "duration": final_video_duration}
+
+def fetch_story():
+    print("📰 Fetching news...")
+    title, url, content, source = get_latest_news()
+    if not title or not url: print("❌ No news found."); return None
+    return [title, url, content, source]
+
+def write_metadata(story):
+    title, url, content, source = story
+    metadata = {"kind": "short", "title": title, "description": content, "tags": ["news", "shorts", "update", "daily"], "sources": [source]}
+    with open(METADATA_PATH, "w") as f: json.dump(metadata, f, indent=2)
+    print("✅ Saved video metadata to video_metadata.json")
+    return metadata
+
+def fetch_images(story):
+    print("🔍 Searching for images...")
+    image_urls = search_images(story[0])
+    if not image_urls: print("❌ Image search failed."); return None
+    return download_images(image_urls)
 
-    create_shorts_video(
+def narration_for(story):
+    print("🤖 Summarizing content for a ~55 second narration...")
+    summarized_content = summarize_text(story[2], word_count=150)
+    return f"Welcome to today's update. Here's what you need to know in under a minute.\n\n{summarized_content}"
+
+def render_stage(metadata, images, narration):
+    return create_shorts_video(
         image_dir=IMAGE_DIR,
-        audio_path=final_audio_path,
+        audio_path=narration["audio_path"],
         output_path=VIDEO_PATH,
         ass_path=ASS_PATH,
-        video_length=final_video_duration,
+        video_length=narration["duration"],
         bgm_candidates=BGM_FILES,
         metadata=metadata
-    )
\ No newline at end of file
+    )
+
+# --- Deriving the Short from a finished single-story run (--from-run) ---
+def run_stages(run_dir):
+    """Stage results recorded by create_news_video.py's run manifest in `run_dir`."""
+    data = json.loads((Path(run_dir) / MANIFEST_PATH.name).read_text())
+    return {name: record["result"] for name, record in data.get("stages", {}).items()}
+
+def read_cues(ass_path):
+    """(start, end, text) of every subtitle line in an .ass file, in order."""
+    cues = []
+    for line in Path(ass_path).read_text(encoding="utf-8").splitlines():
+        if not line.startswith("Dialogue:"): continue
+        fields = line.split(",", 9)
+        cues.append((parse_time(fields[1]), parse_time(fields[2]), fields[9].replace("\\N", " ")))
+    return cues
+
+def narration_span(cues, max_seconds=SHORTS_MAX_LENGTH, min_seconds=SHORTS_MIN_LENGTH):
+    """
+    The leading cues that fit in a Short, ending on the last one that closes a sentence once
+    `min_seconds` are covered, so the cut falls between sentences rather than mid-thought.
+    """
+    fitting = list(itertools.takewhile(lambda cue: cue[1] <= max_seconds, cues))
+    sentence_ends = [i for i, (_, end, text) in enumerate(fitting) if end >= min_seconds and text.rstrip().endswith(SENTENCE_ENDS)]
+    return fitting[:sentence_ends[-1] + 1] if sentence_ends else fitting
+
+def shorts_captions(cues):
+    """Re-wraps long-form subtitle cues into Shorts caption groups of up to three lines, keeping their timing."""
+    groups = []
+    for start, end, text in cues:
+        lines = textwrap.wrap(text, width=35)
+        blocks = [lines[i:i + 3] for i in range(0, len(lines), 3)]
+        step = (end - start) / max(len(blocks), 1)
+        groups += [(start + k * step, start + (k + 1) * step, block) for k, block in enumerate(blocks)]
+    return groups
+
+def story_from_run(run_dir):
+    title, content, source = run_stages(run_dir)["story"]
+    print(f"📰 Deriving the Short from the long-form story: {title}")
+    return [title, source.get("url", ""), content, source]
+
+def visuals_from_run(run_dir):
+    """The run's normalized stills and clips, interleaved, as timeline items to re-crop."""
+    stages = run_stages(run_dir)
+    existing = lambda paths: [str(Path(run_dir, p).resolve()) for p in paths or [] if Path(run_dir, p).exists()]
+    images = [(p, SHORT_IMAGE_SECONDS, True) for p in existing(stages.get("images"))]
+    clips = [(p, min(get_media_duration(p) or SHORT_CLIP_SECONDS, SHORT_CLIP_SECONDS), False)
+             for p in existing((stages.get("youtube_clips") or []) + (stages.get("pexels_clips") or []))]
+    if not images and not clips: print("❌ The run has no visuals left to re-crop."); return None
+    print(f"🖼️ Re-using {len(images)} image(s) and {len(clips)} clip(s) from {run_dir}")
+    return [item for pair in itertools.zip_longest(images, clips) for item in pair if item]
+
+def narration_from_run(run_dir):
+    """Cuts the opening of the run's voiceover, up to a sentence end, and re-styles its subtitles for 9:16."""
+    print("✂️ Cutting the Short's narration from the long-form voiceover...")
+    cues = narration_span(read_cues(Path(run_dir) / ASS_PATH))
+    if not cues: print("❌ The run's subtitles have no lines that fit in a Short."); return None
+    duration = cues[-1][1]
+    fade = min(NARRATION_FADE_SECONDS, duration / 2)
+    trim_cmd = ["ffmpeg", "-y", "-v", "error", "-i", str(Path(run_dir) / VOICE_PATH), "-t", f"{duration:.3f}",
+                "-af", f"afade=t=out:st={duration - fade:.3f}:d={fade:.3f}", VOICE_PATH]
+    subprocess.run(trim_cmd, check=True)
+    write_ass_for_shorts(shorts_captions(cues), ASS_PATH)
+    print(f"✅ Narration cut to {duration:.2f}s ({len(cues)} of the run's subtitle lines).")
+    return {"audio_path": VOICE_PATH, "duration": duration}
+
+def derived_render_stage(metadata, visuals, narration):
+    return create_shorts_video(IMAGE_DIR, narration["audio_path"], VIDEO_PATH, ASS_PATH, narration["duration"], BGM_FILES, metadata, visuals=visuals)
+
+def build_derived_pipeline(run_dir, manifest):
+    """Short graph for --from-run: no network stage and no TTS, only a narration cut and one render."""
+    source = [str(run_dir), file_digest(Path(run_dir) / MANIFEST_PATH.name)]
+    return Pipeline([
+        Stage("story", story_from_run, args=(run_dir,), inputs=source),
+        Stage("metadata", write_metadata, deps=["story"], outputs=lambda r: [METADATA_PATH]),
+        Stage("visuals", visuals_from_run, args=(run_dir,), inputs=source, outputs=lambda r: [p for p, _, _ in r]),
+        Stage("voice", narration_from_run, args=(run_dir,), inputs=source, outputs=lambda r: [r["audio_path"], ASS_PATH]),
+        Stage("render", derived_render_stage, deps=["metadata", "visuals", "voice"], kind=CPU, outputs=lambda r: [r]),
+    ], manifest=manifest)
+
+def build_pipeline(manifest):
+    """Shorts graph: image download and voice synthesis overlap once the story is chosen."""
+    return Pipeline([
+        Stage("story", fetch_story),
+        Stage("metadata", write_metadata, deps=["story"], outputs=lambda r: [METADATA_PATH]),
+        Stage("images", fetch_images, deps=["story"], outputs=lambda r: r),
+        Stage("voice", lambda story: synthesize_narration(narration_for(story)), deps=["story"], outputs=lambda r: [r["audio_path"], ASS_PATH]),
+        Stage("render", render_stage, deps=["metadata", "images", "voice"], kind=CPU, outputs=lambda r: [r]),
+    ], manifest=manifest)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create a YouTube Short for the latest story.")
+    parser.add_argument("--fresh", action="store_true", help="Ignore the run manifest and rebuild every stage.")
+    parser.add_argument("--plan", action="store_true", help="Acquire and probe assets, then print each render's ffmpeg command and cost estimate instead of encoding.")
+    parser.add_argument("--from-run", type=Path, metavar="DIR", help="Derive the Short from a finished single-story run in DIR: its story, visuals and voiceover, with nothing fetched or synthesized.")
+    args = parser.parse_args(argv)
+    if args.plan: os.environ["RENDER_PLAN_ONLY"] = "1"
+    reset_visual_index()
+    if args.from_run:
+        # cleanup() would delete the run's own voice.mp3 and subtitles.ass.
+        if args.from_run.resolve() == Path.cwd().resolve(): parser.error("--from-run needs a working directory other than the run's")
+        missing = [name for name in (MANIFEST_PATH.name, VOICE_PATH, ASS_PATH) if not (args.from_run / name).exists()]
+        if missing: parser.error(f"{args.from_run} is not a single-story run directory (missing {', '.join(missing)})")
+
+    manifest = RunManifest(fresh=args.fresh)
+    if manifest.is_new: cleanup()
+    os.makedirs(IMAGE_DIR, exist_ok=True)
+
+    pipeline = build_derived_pipeline(args.from_run.resolve(), manifest) if args.from_run else build_pipeline(manifest)
+    results = pipeline.run()
+    if results["render"] and not args.plan: manifest.finish()
+
+if __name__ == "__main__":
+    with metrics.run("create_news_video_shorts"): main()
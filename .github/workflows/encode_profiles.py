@@ -0,0 +1,120 @@
+import os
+import time
+import shlex
+import subprocess
+import tempfile
+import metrics
+from pathlib import Path
+from filtergraph import graph_size
+from render_cost import CostModel, plan_only, deadline_seconds, read_progress, encoded_seconds
+
+# crf: quality-only (old behaviour); capped: CRF with a VBV bitrate ceiling; 2pass: exact bitrate target.
+ENCODE_MODE = os.getenv("ENCODE_MODE", "capped")
+PROFILES = {
+    # Bitrate ceiling and whole-file budget per output type; the tighter of the two wins.
+    "longform": {"crf": 23, "maxrate_kbps": 6000, "budget_mb": 200, "audio_kbps": 128, "preset": "medium"},
+    "combined": {"crf": 24, "maxrate_kbps": 5000, "budget_mb": 400, "audio_kbps": 192, "preset": "medium"},
+    "shorts": {"crf": 23, "maxrate_kbps": 6000, "budget_mb": 45, "audio_kbps": 128, "preset": "medium"},
+}
+MIN_VIDEO_KBPS = 800
+
+
+def target_video_kbps(kind, duration):
+    """Video bitrate that keeps `duration` seconds of this output type inside its budget and ceiling."""
+    profile = PROFILES[kind]
+    budget_kbps = profile["budget_mb"] * 8 * 1000 / max(duration, 1) - profile["audio_kbps"]
+    return int(max(MIN_VIDEO_KBPS, min(profile["maxrate_kbps"], budget_kbps)))
+
+
+def predicted_bytes(kind, duration):
+    return int((target_video_kbps(kind, duration) + PROFILES[kind]["audio_kbps"]) * 1000 / 8 * duration)
+
+
+def encode_args(kind, duration, mode=None, pass_num=None, passlog=None, preset=None):
+    """libx264 + AAC output arguments for an output type under the selected encode mode."""
+    profile, mode = PROFILES[kind], mode or ENCODE_MODE
+    args = ["-c:v", "libx264", "-preset", preset or profile["preset"], "-pix_fmt", "yuv420p"]
+    kbps = target_video_kbps(kind, duration)
+    if mode == "2pass":
+        args += ["-b:v", f"{kbps}k", "-maxrate", f"{int(kbps * 1.5)}k", "-bufsize", f"{kbps * 2}k", "-pass", str(pass_num or 2), "-passlogfile", passlog]
+    elif mode == "capped":
+        args += ["-crf", str(profile["crf"]), "-maxrate", f"{kbps}k", "-bufsize", f"{kbps * 2}k"]
+    else:
+        args += ["-crf", str(profile["crf"])]
+    return args + ["-c:a", "aac", "-b:a", f"{profile['audio_kbps']}k"]
+
+
+def encode(cmd, output_path, kind, duration, mode=None):
+    """
+    Runs `cmd` (inputs, filters, maps and output options, without codecs or output file)
+    through the encoder for this output type, then reports predicted vs actual size.
+    Under RENDER_DEADLINE_S a faster preset is used when the cost model says the profile's
+    would not finish in time; in --plan mode the command and estimates are only printed.
+    Raises subprocess.CalledProcessError like subprocess.run(check=True).
+    """
+    encode_ladder(cmd, [([], output_path, kind, duration)], mode)
+
+
+def encode_ladder(cmd, outputs, mode=None):
+    """
+    Like encode(), for several outputs written by one ffmpeg process, so the inputs are decoded
+    and the shared filters run once. `cmd` holds the inputs and filtergraph; each output is
+    (options, path, kind, duration), its options mapping its streams (-map, -t, ...). A ladder's
+    wall time is shared by its outputs, so only single-output encodes calibrate the cost model.
+    """
+    mode, model, deadline = mode or ENCODE_MODE, CostModel(), deadline_seconds()
+    specs = []
+    for options, output_path, kind, duration in outputs:
+        preset = PROFILES[kind]["preset"]
+        if deadline:
+            faster = model.choose_preset(kind, mode, preset, duration, deadline)
+            if faster != preset:
+                print(f"    ⏱️ '{preset}' is estimated at {duration / model.speed(kind, mode, preset):.0f}s, over the {deadline:.0f}s deadline; using '{faster}'")
+                preset = faster
+        predicted = predicted_bytes(kind, duration)
+        specs.append((list(options), output_path, kind, duration, preset, predicted, model.estimate(kind, mode, preset, duration, predicted)))
+
+    def output_args(pass_num=None, passlog=None):
+        args = []
+        for i, (options, output_path, kind, duration, preset, _, _) in enumerate(specs):
+            args += options + encode_args(kind, duration, mode, pass_num, passlog and f"{passlog}_{i}", preset)
+            args += ["-f", "null", os.devnull] if pass_num == 1 else [str(output_path)]
+        return args
+
+    if plan_only():
+        inputs, chains, filters = graph_size(cmd)
+        for _, output_path, kind, duration, preset, _, (estimated_seconds, estimated_bytes) in specs:
+            print(f"    📝 Plan for {output_path}: {inputs} inputs, {chains} chains / {filters} filters, {duration:.1f}s of '{kind}' at preset '{preset}'")
+            print(f"       Estimated {estimated_seconds:.0f}s to encode, {estimated_bytes / 1e6:.1f} MB")
+        print(f"       {shlex.join(cmd + output_args())}")
+        return
+    for _, output_path, kind, duration, preset, predicted, (estimated_seconds, _) in specs:
+        print(f"    - Encoding '{kind}' in {mode} mode at ≤{target_video_kbps(kind, duration)} kb/s video, preset '{preset}' (predicted ≤ {predicted / 1e6:.1f} MB, ~{estimated_seconds:.0f}s)")
+    with tempfile.TemporaryDirectory() as tmp:
+        progress = Path(tmp) / "progress"
+        final_cmd = cmd[:1] + ["-progress", str(progress)] + cmd[1:]
+        started = time.monotonic()
+        if mode == "2pass":
+            passlog = str(Path(tmp) / "x264")
+            subprocess.run(cmd + output_args(1, passlog), check=True)
+            subprocess.run(final_cmd + output_args(2, passlog), check=True)
+        else:
+            subprocess.run(final_cmd + output_args(), check=True)
+        wall = time.monotonic() - started
+        out_seconds = encoded_seconds(read_progress(progress))
+    metrics.observe("encode_duration_seconds", wall, kind="+".join(spec[2] for spec in specs))
+    for _, output_path, kind, duration, preset, predicted, _ in specs:
+        report_size(output_path, predicted)
+        if not Path(output_path).exists(): continue
+        size, name = Path(output_path).stat().st_size, Path(output_path).name
+        seconds = out_seconds if len(specs) == 1 else duration
+        if len(specs) == 1: model.record(kind, mode, preset, out_seconds, wall, size)
+        metrics.gauge("output_bytes", size, kind=kind, output=name)
+        metrics.gauge("output_duration_seconds", seconds or duration, kind=kind, output=name)
+        if seconds: metrics.gauge("encode_speed_ratio", seconds / wall, kind=kind, output=name)
+
+
+def report_size(output_path, predicted):
+    if not Path(output_path).exists(): return
+    actual = Path(output_path).stat().st_size
+    print(f"    📦 {output_path}: {actual / 1e6:.1f} MB (predicted ≤ {predicted / 1e6:.1f} MB, {actual * 100 / max(predicted, 1):.0f}%)")
@@ -0,0 +1,321 @@
+import os
+import json
+import subprocess
+from functools import lru_cache
+from pathlib import Path
+
+# Set FILTERGRAPH_OPTIMIZE=0 to emit graphs exactly as built (e.g. to compare render times).
+OPTIMIZE = os.getenv("FILTERGRAPH_OPTIMIZE", "1") != "0"
+# Filters that read their inputs one after another: sharing a chain between their inputs via split
+# would buffer every frame of the later copies, so the share pass leaves them alone.
+SEQUENTIAL_FILTERS = {"concat"}
+# Multi-input filters whose inputs the format negotiation already brings to one pixel format.
+FORMAT_JOIN_FILTERS = {"concat", "xfade"}
+# Adjacent repeats of these collapse to the last one.
+LAST_WINS_FILTERS = {"format", "setsar", "fps", "aformat"}
+
+
+def _split_args(args):
+    """Splits filter arguments on ':' outside single quotes."""
+    parts, current, quoted = [], "", False
+    for ch in args:
+        if ch == "'": quoted = not quoted
+        if ch == ":" and not quoted: parts.append(current); current = ""
+        else: current += ch
+    return parts + [current]
+
+
+def graph_size(cmd):
+    """(inputs, chains, filters) of an ffmpeg command, for plans and logs."""
+    graph = cmd[cmd.index("-filter_complex") + 1] if "-filter_complex" in cmd else ""
+    chains = filters = 1 if graph else 0
+    quoted = False
+    for ch in graph:
+        if ch == "'": quoted = not quoted
+        elif not quoted and ch in ",;": filters += 1; chains += ch == ";"
+    return cmd.count("-i"), chains, filters
+
+
+class Filter:
+    """One filter, e.g. Filter("scale=1920:1080:force_original_aspect_ratio=decrease")."""
+    def __init__(self, spec):
+        self.name, _, self.args = str(spec).partition("=")
+        parts = _split_args(self.args) if self.args else []
+        self.positional = [p for p in parts if "=" not in p or p.startswith("'")]
+        self.options = dict(p.split("=", 1) for p in parts if "=" in p and not p.startswith("'"))
+
+    def __str__(self): return f"{self.name}={self.args}" if self.args else self.name
+    def __eq__(self, other): return isinstance(other, Filter) and str(self) == str(other)
+    def __hash__(self): return hash(str(self))
+
+    def option(self, name, index, aliases=()):
+        for key in (name, *aliases):
+            if key in self.options: return self.options[key]
+        return self.positional[index] if len(self.positional) > index else None
+
+    def dims(self):
+        """(width, height) for scale/pad/crop with literal sizes, else None."""
+        try: return int(self.option("w", 0, ("width", "out_w"))), int(self.option("h", 1, ("height", "out_h")))
+        except (TypeError, ValueError): return None
+
+
+class Input:
+    """An ffmpeg input. `size` is its (width, height) with square pixels when known."""
+    def __init__(self, index, path, options, size):
+        self.index, self.path, self.options, self.size = index, str(path), list(options), size
+        self.video, self.audio = Stream("v", input=self), Stream("a", input=self)
+
+    def args(self):
+        return self.options + ["-i", self.path]
+
+
+class Stream:
+    def __init__(self, kind, input=None, label=None):
+        self.kind, self.input, self.label = kind, input, label
+
+    def ref(self):
+        return f"{self.input.index}:{self.kind}" if self.input else self.label
+
+
+class Chain:
+    """Linear run of filters from `sources` to `outs`: '[a][b]f1,f2[out]'."""
+    def __init__(self, sources, filters, outs):
+        self.sources, self.filters, self.outs = list(sources), list(filters), list(outs)
+
+    @property
+    def head(self): return self.filters[0].name if self.filters else None
+
+    def __str__(self):
+        return "".join(f"[{s.ref()}]" for s in self.sources) + ",".join(map(str, self.filters)) + "".join(f"[{o.label}]" for o in self.outs)
+
+
+# --- Size tracking: state is (known (width, height) or None, whether pixels are known square) ---
+SIZE_PRESERVING_FILTERS = {"format", "fps", "ass", "subtitles", "drawtext", "trim", "setpts", "split", "null"}
+
+def _is_noop(f, state):
+    dims, square = state
+    if f.name == "volume":
+        try: return float(f.option("volume", 0)) == 1.0
+        except (TypeError, ValueError): return False
+    if f.name in ("scale", "pad", "crop"): return dims is not None and f.dims() == dims
+    if f.name == "setsar": return square and f.option("sar", 0) in ("1", "1/1", "1:1")
+    return False
+
+
+def _state_after(f, state):
+    dims, square = state
+    if f.name == "scale":
+        if "force_original_aspect_ratio" in f.options: return (dims if dims == f.dims() else None), square
+        return (f.dims(), square) if f.dims() == dims else (f.dims(), False)
+    if f.name in ("pad", "crop"): return f.dims(), square
+    if f.name == "setsar": return dims, f.option("sar", 0) in ("1", "1/1", "1:1")
+    if f.name in SIZE_PRESERVING_FILTERS: return dims, square
+    return None, False
+
+
+def fit(width, height):
+    """Letterbox onto the canvas: scale down to fit, pad with black, square pixels."""
+    return [f"scale={width}:{height}:force_original_aspect_ratio=decrease", f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2", "setsar=1"]
+
+
+def cover(width, height):
+    """Fill the canvas: scale up to cover, centre-crop, square pixels."""
+    return [f"scale={width}:{height}:force_original_aspect_ratio=increase", f"crop={width}:{height}", "setsar=1"]
+
+
+def recrop(width, height):
+    """Like cover(), but crops to the canvas aspect before scaling, so larger sources are never scaled up whole first."""
+    crop = f"crop='min(iw,ih*{width}/{height})':'min(ih,iw*{height}/{width})'"
+    return [crop, f"scale={width}:{height}", "setsar=1"]
+
+
+@lru_cache(maxsize=512)
+def _probe(path, mtime):
+    cmd = ["ffprobe", "-v", "error", "-select_streams", "v:0", "-show_entries", "stream=width,height,sample_aspect_ratio", "-of", "json", path]
+    try: stream = json.loads(subprocess.run(cmd, capture_output=True, text=True, check=True).stdout)["streams"][0]
+    except Exception: return None
+    if stream.get("sample_aspect_ratio", "1:1") not in ("1:1", "1/1"): return None
+    return stream["width"], stream["height"]
+
+
+def media_size(path):
+    """(width, height) of a file's first video stream when its pixels are square, else None."""
+    try: return _probe(str(path), Path(path).stat().st_mtime)
+    except OSError: return None
+
+
+class Graph:
+    """
+    Builds an ffmpeg command's inputs and filter_complex from typed chains instead of string
+    concatenation, then runs optimization passes over it before emitting:
+    drop no-ops, merge redundant conversions, move pixel-format conversion past concat/xfade
+    to the end of the video path, and share identical chains through split.
+    """
+    def __init__(self, optimize=None):
+        self.inputs, self.chains, self.stats = [], [], {}
+        self.optimize_enabled = OPTIMIZE if optimize is None else optimize
+        self._optimized = False
+
+    def input(self, path, *options, size=None, probe=False):
+        """Adds an input; `probe=True` reads its size so size-dependent no-ops can be dropped."""
+        inp = Input(len(self.inputs), path, options, size if size or not probe else media_size(path))
+        self.inputs.append(inp)
+        return inp
+
+    def chain(self, sources, *filters, label=None, kind=None):
+        """Appends '[sources]filters[label]' and returns the output stream."""
+        sources = [sources] if isinstance(sources, Stream) else list(sources)
+        out = Stream(kind or sources[0].kind, label=label)
+        self.chains.append(Chain(sources, [f if isinstance(f, Filter) else Filter(f) for f in filters], [out]))
+        return out
+
+    def split(self, source, count, labels=None):
+        """Fans one stream out to `count` branches (split/asplit), e.g. one per output format."""
+        outs = [Stream(source.kind, label=label) for label in (labels or [None] * count)]
+        self.chains.append(Chain([source], [Filter(f"{'split' if source.kind == 'v' else 'asplit'}={count}")], outs))
+        return outs
+
+    # --- Passes ---
+    def _consumers(self):
+        consumers = {}
+        for c in self.chains:
+            for s in c.sources: consumers.setdefault(id(s), []).append(c)
+        return consumers
+
+    def _producer(self, stream):
+        return next((c for c in self.chains if any(o is stream for o in c.outs)), None)
+
+    def _drop_noops(self):
+        """Drops filters that cannot change their input, e.g. volume=1.0 or a scale/pad to the size the input already has."""
+        states, dropped = {}, 0
+        for c in self.chains:
+            src = c.sources[0] if len(c.sources) == 1 else None
+            if src is None: state = (None, False)
+            elif src.input: state = (src.input.size, src.input.size is not None)
+            else: state = states.get(id(src), (None, False))
+            kept = []
+            for i, f in enumerate(c.filters):
+                if (src is not None or i > 0) and _is_noop(f, state): dropped += 1; continue
+                kept.append(f); state = _state_after(f, state)
+            c.filters = kept
+            for o in c.outs: states[id(o)] = state
+        self.stats["noops_dropped"] = self.stats.get("noops_dropped", 0) + dropped
+
+    def _merge_redundant(self):
+        merged = 0
+        for c in self.chains:
+            kept = []
+            for f in c.filters:
+                prev = kept[-1] if kept else None
+                if prev and prev.name == f.name and f.name in LAST_WINS_FILTERS: kept[-1] = f; merged += 1; continue
+                if prev and prev.name == f.name == "scale" and f.dims() and "force_original_aspect_ratio" not in f.options: kept[-1] = f; merged += 1; continue
+                kept.append(f)
+            c.filters = kept
+        self.stats["conversions_merged"] = merged
+
+    def _sink(self, chain, consumers):
+        """Last chain of the linear video path starting at `chain`; a split into branches ends it."""
+        while len(chain.outs) == 1 and len(consumers.get(id(chain.outs[0]), [])) == 1:
+            following = consumers[id(chain.outs[0])][0]
+            if len(following.outs) != 1 or following.outs[0].kind != "v": break
+            chain = following
+        return chain
+
+    def _late_format(self):
+        """
+        Moves pixel-format conversions to the end of the video path: one conversion shared by
+        every input of concat/xfade becomes a single one after it, and a trailing conversion
+        before overlays or subtitles moves past them.
+        """
+        moved = 0
+        for join in list(self.chains):
+            if join.head not in FORMAT_JOIN_FILTERS: continue
+            producers = [self._producer(s) for s in join.sources]
+            if not producers or any(p is None or len(p.outs) != 1 or not p.filters or p.filters[-1].name != "format" for p in producers): continue
+            if len({str(p.filters[-1]) for p in producers}) != 1: continue
+            fmt = producers[0].filters[-1]
+            for p in producers: p.filters.pop()
+            sink = self._sink(join, self._consumers())
+            if not sink.filters or sink.filters[-1] != fmt: sink.filters.append(fmt)
+            moved += len(producers) - 1
+        consumers = self._consumers()
+        for c in self.chains:
+            if not c.filters or c.filters[-1].name != "format" or len(c.outs) != 1 or c.outs[0].kind != "v": continue
+            following = consumers.get(id(c.outs[0]), [])
+            if len(following) != 1 or following[0].head in FORMAT_JOIN_FILTERS: continue
+            sink = self._sink(c, consumers)
+            if sink is c: continue
+            fmt = c.filters.pop()
+            if not sink.filters or sink.filters[-1] != fmt: sink.filters.append(fmt)
+        self.stats["format_conversions_saved"] = moved
+
+    def _share_identical(self):
+        """Runs identical chains on the same source once and fans the result out with split."""
+        consumers, groups = self._consumers(), {}
+        for c in self.chains:
+            if len(c.sources) == 1 and len(c.outs) == 1 and c.filters:
+                groups.setdefault((id(c.sources[0]), tuple(map(str, c.filters))), []).append(c)
+        shared = 0
+        for group in groups.values():
+            if len(group) < 2: continue
+            if any(d.head in SEQUENTIAL_FILTERS for c in group for d in consumers.get(id(c.outs[0]), [])): continue
+            first, kind = group[0], group[0].outs[0].kind
+            mid = Stream(kind, label=None)
+            outs = [c.outs[0] for c in group]
+            first.outs = [mid]
+            self.chains.insert(self.chains.index(first) + 1, Chain([mid], [Filter(f"{'split' if kind == 'v' else 'asplit'}={len(group)}")], outs))
+            for c in group[1:]: self.chains.remove(c)
+            shared += len(group) - 1
+        self.stats["chains_shared"] = shared
+
+    def _remove_empty(self):
+        """Chains left without filters become aliases of their source."""
+        alias = {}
+        for c in list(self.chains):
+            if not c.filters and len(c.sources) == 1 and len(c.outs) == 1:
+                alias[id(c.outs[0])] = c.sources[0]; self.chains.remove(c)
+        resolve = lambda s: resolve(alias[id(s)]) if id(s) in alias else s
+        for c in self.chains: c.sources = [resolve(s) for s in c.sources]
+        self._alias = resolve
+
+    def optimize(self):
+        if self._optimized: return self
+        before = sum(len(c.filters) for c in self.chains)
+        if self.optimize_enabled:
+            self._drop_noops(); self._merge_redundant(); self._drop_noops(); self._late_format(); self._share_identical()
+        self._remove_empty()
+        self.stats.update({"filters_before": before, "filters_after": sum(len(c.filters) for c in self.chains)})
+        self._optimized = True
+        return self
+
+    # --- Emission ---
+    def _assign_labels(self):
+        used, n = set(), 0
+        for c in self.chains:
+            for o in c.outs:
+                if o.label and o.label not in used: used.add(o.label); continue
+                while f"s{n}" in used: n += 1
+                o.label = f"s{n}"; used.add(o.label)
+
+    def filter_complex(self):
+        self.optimize(); self._assign_labels()
+        return ";".join(str(c) for c in self.chains)
+
+    def map(self, stream):
+        """-map argument for a stream: '[label]' for filter outputs, 'i:v' for untouched input streams."""
+        self.optimize(); self._assign_labels()
+        stream = self._alias(stream)
+        return stream.ref() if stream.input else f"[{stream.label}]"
+
+    def input_args(self):
+        return [arg for inp in self.inputs for arg in inp.args()]
+
+    def command(self, *maps, base=("ffmpeg", "-y")):
+        """Full command: inputs, filter_complex and -map for each given stream."""
+        graph = self.filter_complex()
+        cmd = list(base) + self.input_args() + (["-filter_complex", graph] if graph else [])
+        for stream in maps: cmd += ["-map", self.map(stream)]
+        if self.optimize_enabled and self.stats.get("filters_after") != self.stats.get("filters_before"):
+            print(f"    🧮 Filtergraph: {self.stats['filters_before']} -> {self.stats['filters_after']} filters "
+                  f"({', '.join(f'{k}={v}' for k, v in self.stats.items() if k not in ('filters_before', 'filters_after') and v)})")
+        return cmd
@@ -0,0 +1,11 @@
+import json
+from functools import lru_cache
+
+
+@lru_cache(maxsize=4)
+def tts_client(service_account_json):
+    """Text-to-Speech client for a service-account key, built once per process so a warm worker keeps its gRPC channel."""
+    from google.cloud import texttospeech
+    from google.oauth2 import service_account
+    creds = service_account.Credentials.from_service_account_info(json.loads(service_account_json))
+    return texttospeech.TextToSpeechClient(credentials=creds)
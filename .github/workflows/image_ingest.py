@@ -0,0 +1,120 @@
+from pathlib import Path
+import requests
+import metrics
+
+LANDSCAPE = (1920, 1080)
+PORTRAIT = (1080, 1920)
+JPEG_QUALITY = 90
+# Orientations where EXIF rotation swaps width and height.
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+# Download limits: anything outside them is rejected from the headers or first few KB.
+MIN_IMAGE_BYTES = 8 * 1024
+MAX_IMAGE_BYTES = 15 * 1024 * 1024
+MIN_SHORT_SIDE = 360
+MAX_PIXELS = 50_000_000
+SNIFF_BYTES = 16 * 1024
+# JPEG EXIF/ICC blocks can push the frame header well past the first chunk.
+MAX_HEADER_BYTES = 256 * 1024
+ACCEPTED_TYPES = ("image/", "application/octet-stream", "binary/octet-stream")
+
+
+class RejectedImage(Exception):
+    """Raised when a download is abandoned because the headers or first bytes rule the asset out."""
+
+
+def sniff_format(head):
+    """File extension from magic bytes, or None for anything we cannot render."""
+    if head.startswith(b"\xff\xd8\xff"): return ".jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"): return ".png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP": return ".webp"
+    if head.startswith((b"GIF87a", b"GIF89a")): return ".gif"
+    text = head.lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+    if text.startswith((b"<?xml", b"<svg", b"<!doctype svg")) and b"<svg" in text: return ".svg"
+    return None
+
+
+def fetch_image(url, dest_base, timeout=15):
+    """
+    Streams an image to `dest_base` + sniffed extension, checking Content-Type and Content-Length
+    first and then the magic bytes and Pillow-parsed dimensions in the first few KB, so HTML error
+    pages, icons and oversized originals are dropped before the body is downloaded.
+    Returns the written path; raises RejectedImage or a requests error.
+    """
+    try: path, written = _stream_image(url, dest_base, timeout)
+    except RejectedImage: metrics.inc("download_rejections", kind="image"); raise
+    metrics.inc("downloads", kind="image"); metrics.inc("download_bytes", written, kind="image")
+    return path
+
+
+def _stream_image(url, dest_base, timeout):
+    with requests.get(url, timeout=timeout, headers={"User-Agent": "Mozilla/5.0"}, stream=True) as r:
+        r.raise_for_status()
+        content_type = r.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type and not content_type.startswith(ACCEPTED_TYPES): raise RejectedImage(f"content type {content_type}")
+        length = int(r.headers.get("Content-Length") or 0)
+        if length > MAX_IMAGE_BYTES or (length and length < MIN_IMAGE_BYTES and "svg" not in content_type): raise RejectedImage(f"{length} bytes")
+
+        chunks = r.iter_content(8192)
+        head = b""
+        for chunk in chunks:
+            head += chunk
+            if len(head) >= SNIFF_BYTES: break
+        ext = sniff_format(head)
+        if not ext: raise RejectedImage("not a supported image format")
+        if ext != ".svg":
+            from PIL import ImageFile
+            parser = ImageFile.Parser()
+            parser.feed(head)
+            while parser.image is None and len(head) < MAX_HEADER_BYTES:
+                chunk = next(chunks, b"")
+                if not chunk: break
+                head += chunk; parser.feed(chunk)
+            if parser.image is None: raise RejectedImage("unreadable image header")
+            width, height = parser.image.size
+            if min(width, height) < MIN_SHORT_SIDE or width * height > MAX_PIXELS: raise RejectedImage(f"{width}x{height}")
+
+        path, written = Path(dest_base).with_suffix(ext), len(head)
+        try:
+            with open(path, "wb") as f:
+                f.write(head)
+                for chunk in chunks:
+                    written += len(chunk)
+                    if written > MAX_IMAGE_BYTES: raise RejectedImage(f"more than {MAX_IMAGE_BYTES} bytes")
+                    f.write(chunk)
+        except Exception:
+            path.unlink(missing_ok=True); raise
+        if written < MIN_IMAGE_BYTES and ext != ".svg":
+            path.unlink(missing_ok=True); raise RejectedImage(f"{written} bytes")
+    return path, written
+
+
+def ingest_image(src, dest=None, canvas=LANDSCAPE, mode="fit"):
+    """
+    Decodes an image once at reduced size and writes a JPEG at exactly `canvas`, so ffmpeg never
+    decodes or scales full-size originals. "fit" letterboxes on black like scale=decrease+pad;
+    "cover" fills and centre-crops like scale=increase+crop. JPEGs are downsampled during decode
+    with draft(); other formats go through reduce() via resize's reducing_gap.
+    Returns the written path; raises if the image cannot be decoded.
+    """
+    src = Path(src)
+    dest = Path(dest) if dest else src.with_suffix(".jpg")
+    from PIL import Image, ImageOps
+    with Image.open(src) as img:
+        transposed = img.getexif().get(0x0112) in TRANSPOSED_ORIENTATIONS
+        width, height = (img.height, img.width) if transposed else img.size
+        scale = (min if mode == "fit" else max)(canvas[0] / width, canvas[1] / height)
+        needed = (max(1, round(width * scale)), max(1, round(height * scale)))
+        img.draft("RGB", (needed[1], needed[0]) if transposed else needed)
+        img = ImageOps.exif_transpose(img).convert("RGB")
+
+        if mode == "fit":
+            resized = img.resize(needed, Image.LANCZOS, reducing_gap=3.0)
+            frame = Image.new("RGB", canvas)
+            frame.paste(resized, ((canvas[0] - needed[0]) // 2, (canvas[1] - needed[1]) // 2))
+        else:
+            crop_w, crop_h = canvas[0] / scale * img.width / width, canvas[1] / scale * img.height / height
+            left, top = (img.width - crop_w) / 2, (img.height - crop_h) / 2
+            frame = img.resize(canvas, Image.LANCZOS, box=(left, top, left + crop_w, top + crop_h), reducing_gap=3.0)
+    frame.save(dest, "jpeg", quality=JPEG_QUALITY, optimize=True)
+    if dest != src: src.unlink(missing_ok=True)
+    return str(dest)
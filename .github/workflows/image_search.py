@@ -0,0 +1,35 @@
+import os
+import requests
+from quota import ledger
+
+CSE_ENDPOINT = os.getenv("CSE_ENDPOINT", "https://www.googleapis.com/customsearch/v1")
+PEXELS_PHOTO_ENDPOINT = os.getenv("PEXELS_PHOTO_ENDPOINT", "https://api.pexels.com/v1/search")
+# Custom Search returns at most 10 results per query.
+CSE_MAX_RESULTS = 10
+
+
+def cse_image_urls(query, count, api_key, cse_id):
+    """Google Custom Search image links, or None when the daily quota is spent or the API rate-limits us."""
+    if not api_key or not cse_id or not ledger().try_acquire("cse"): return None
+    res = requests.get(CSE_ENDPOINT, params={"key": api_key, "cx": cse_id, "q": query, "searchType": "image", "num": min(count, CSE_MAX_RESULTS)}, timeout=10)
+    if not ledger().note_response("cse", res): return None
+    res.raise_for_status()
+    return [item["link"] for item in res.json().get("items", [])]
+
+
+def pexels_photo_urls(query, count, api_key, orientation="landscape"):
+    """Pexels stock photo links, used when Custom Search is unavailable."""
+    if not api_key or not ledger().try_acquire("pexels"): return []
+    res = requests.get(PEXELS_PHOTO_ENDPOINT, headers={"Authorization": api_key}, params={"query": query, "per_page": count, "orientation": orientation}, timeout=10)
+    if not ledger().note_response("pexels", res): return []
+    res.raise_for_status()
+    return [photo["src"]["large2x"] for photo in res.json().get("photos", [])]
+
+
+def search_image_urls(query, count, api_key, cse_id, pexels_api_key=None, orientation="landscape", skip_domains=()):
+    """Image links for `query` from Custom Search, degrading to Pexels photos before CSE starts returning 429s."""
+    urls = cse_image_urls(query, count, api_key, cse_id)
+    if urls is None:
+        print(f"    - Custom Search unavailable; using Pexels photos for '{query}'.")
+        urls = pexels_photo_urls(query, count, pexels_api_key, orientation)
+    return [url for url in urls if not any(d in url for d in skip_domains)]
@@ -1,6 +1,9 @@
 import subprocess
 import shutil
 import json
+from encode_profiles import encode
+import metrics
+from filtergraph import Graph
 
 def get_video_duration(video_path):
     """Gets the duration of a video file in seconds using ffprobe."""
@@ -22,10 +25,11 @@ def get_video_duration(video_path):
         return None
 
 
-def merge_videos_with_transition(intro_path, content_path, output_path, transition_type="fade", transition_duration=1):
+def merge_videos_with_transition(intro_path, content_path, output_path, transition_type="fade", transition_duration=1, output_kind="longform"):
     """
     Merges an intro with a content video, adding a visual transition and
-    joining their respective audio tracks.
+    joining their respective audio tracks. `output_kind` selects the size/bitrate
+    budget from encode_profiles.
     """
     if not shutil.which("ffmpeg"):
         print("❌ Error: ffmpeg is not installed or not in your system's PATH.")
@@ -46,42 +50,23 @@ def merge_videos_with_transition(intro_path, content_path, output_path, transiti
     # 2. Calculate the offset for the transition to start
     xfade_offset = intro_duration - transition_duration
 
-    # 3. Construct the ffmpeg command
-    ffmpeg_command = [
-        "ffmpeg",
-        "-y",
-        "-i", intro_path,
-        "-i", content_path,
-        "-filter_complex",
-        (
-            # --- VIDEO CHAIN ---
-            # Conform both video streams to the same frame rate (30fps) and pixel format
-            "[0:v]fps=30,format=yuv420p[v0];"
-            "[1:v]fps=30,format=yuv420p[v1];"
-
-            # Apply the crossfade transition to the conformed video streams
-            f"[v0][v1]xfade=transition={transition_type}:duration={transition_duration}:offset={xfade_offset}[outv];"
-
-            # --- AUDIO CHAIN ---
-            # Conform both audio streams to a standard sample rate (44.1kHz) and channel layout (stereo)
-            "[0:a]aformat=sample_rates=44100:channel_layouts=stereo[a0];"
-            "[1:a]aformat=sample_rates=44100:channel_layouts=stereo[a1];"
-
-            # Concatenate the conformed audio streams
-            "[a0][a1]concat=n=2:v=0:a=1[outa]"
-        ),
-        "-map", "[outv]",  # Map the final video stream
-        "-map", "[outa]",  # Map the final audio stream
-        "-c:v", "libx264",
-        "-c:a", "aac",
-        "-shortest",
-        output_path
-    ]
+    # 3. Build the graph: conform both videos to 30fps/yuv420p and crossfade them;
+    # conform both audio tracks to 44.1kHz stereo and join them back to back.
+    g = Graph()
+    intro, content = g.input(intro_path), g.input(content_path)
+    v0 = g.chain(intro.video, "fps=30", "format=yuv420p", label="v0")
+    v1 = g.chain(content.video, "fps=30", "format=yuv420p", label="v1")
+    outv = g.chain([v0, v1], f"xfade=transition={transition_type}:duration={transition_duration}:offset={xfade_offset}", label="outv")
+    a0 = g.chain(intro.audio, "aformat=sample_rates=44100:channel_layouts=stereo", label="a0")
+    a1 = g.chain(content.audio, "aformat=sample_rates=44100:channel_layouts=stereo", label="a1")
+    outa = g.chain([a0, a1], "concat=n=2:v=0:a=1", label="outa")
+    ffmpeg_command = g.command(outv, outa) + ["-shortest"]
+    total_duration = xfade_offset + (get_video_duration(content_path) or 0)
 
     # 4. Execute the command
     print(f"🎬 Starting merge with a {transition_duration}s '{transition_type}' transition and combined audio...")
     try:
-        subprocess.run(ffmpeg_command, check=True)
+        encode(ffmpeg_command, output_path, output_kind, total_duration)
         print(f"✅ Success! Video with transition and intro audio saved to '{output_path}'")
     except subprocess.CalledProcessError as e:
         print("❌ An error occurred during the ffmpeg merge process.")
@@ -103,10 +88,12 @@ if __name__ == "__main__":
     TRANSITION = "fade"
     TRANSITION_SECONDS = 1
 
-    merge_videos_with_transition(
-        INTRO_VIDEO_PATH,
-        CONTENT_VIDEO_PATH,
-        FINAL_OUTPUT_PATH,
-        transition_type=TRANSITION,
-        transition_duration=TRANSITION_SECONDS
-    )
\ No newline at end of file
+    with metrics.run("merge_intro_content"):
+        merge_videos_with_transition(
+            INTRO_VIDEO_PATH,
+            CONTENT_VIDEO_PATH,
+            FINAL_OUTPUT_PATH,
+            transition_type=TRANSITION,
+            transition_duration=TRANSITION_SECONDS,
+            output_kind="longform"
+        )
@@ -0,0 +1,149 @@
+import os
+import sys
+import json
+import time
+import uuid
+from pathlib import Path
+from contextlib import contextmanager
+
+METRICS_DIR = Path(os.getenv("METRICS_DIR", ".cache/metrics"))
+PREFIX = "newsvideo_"
+# Set by run() for the process tree of one run; stage workers in other processes append to the same spool.
+SPOOL_ENV = "METRICS_SPOOL"
+DURATION_BUCKETS = (0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+METRICS = {
+    # name: (type, help)
+    "stage_duration_seconds": ("histogram", "Wall time of pipeline stages, by stage and outcome."),
+    "stage_cache_hits": ("counter", "Stages skipped because the run manifest held a valid result."),
+    "stage_failures": ("counter", "Stages that raised or returned no result."),
+    "api_calls": ("counter", "API requests allowed by the quota ledger, by provider."),
+    "api_quota_rejections": ("counter", "API requests refused because the provider's quota or rate was spent."),
+    "downloads": ("counter", "Assets downloaded, by kind."),
+    "download_bytes": ("counter", "Bytes of assets downloaded, by kind."),
+    "download_rejections": ("counter", "Downloads refused before or while fetching, by kind."),
+    "duplicates_dropped": ("counter", "Visually duplicate assets dropped, by kind."),
+    "cache_hits": ("counter", "Artifacts reused from .cache instead of fetched or rendered, by cache."),
+    "cache_evictions": ("counter", "Artifacts deleted from .cache to keep it within its size limit, by cache."),
+    "retries": ("counter", "Retried operations, by operation."),
+    "encode_duration_seconds": ("histogram", "Wall time of final encodes, by output type."),
+    "encode_speed_ratio": ("gauge", "Seconds of output encoded per wall second in the last encode, by output type."),
+    "output_bytes": ("gauge", "Size of the last rendered output, by output type."),
+    "output_duration_seconds": ("gauge", "Duration of the last rendered output, by output type."),
+    "render_window_peak_rss_bytes": ("gauge", "Largest peak RSS of a windowed render part, by timeline."),
+    "run_duration_seconds": ("gauge", "Wall time of the last run."),
+    "run_success": ("gauge", "1 if the last run succeeded, 0 if it failed."),
+    "run_failed_stage": ("gauge", "1 for the first stage that failed in the last run."),
+    "run_timestamp_seconds": ("gauge", "Unix time the last run finished."),
+}
+
+
+def _record(kind, name, value, labels):
+    spool = os.getenv(SPOOL_ENV)
+    if not spool: return
+    line = json.dumps({"k": kind, "n": name, "v": value, "l": {k: str(v) for k, v in labels.items()}, "t": time.time()}) + "\n"
+    # One short O_APPEND write per event keeps lines from concurrent processes intact.
+    fd = os.open(spool, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try: os.write(fd, line.encode("utf-8"))
+    finally: os.close(fd)
+
+
+def inc(metric, value=1, **labels):
+    _record("counter", metric, value, labels)
+
+
+def observe(metric, value, **labels):
+    _record("histogram", metric, value, labels)
+
+
+def gauge(metric, value, **labels):
+    _record("gauge", metric, value, labels)
+
+
+def _number(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _series(name, labels, suffix=""):
+    escape = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    rendered = ",".join(f'{k}="{escape(v)}"' for k, v in sorted(labels.items()))
+    return f"{PREFIX}{name}{suffix}{{{rendered}}}" if rendered else f"{PREFIX}{name}{suffix}"
+
+
+def _aggregate(events):
+    """Folds spooled events into {name: {label tuple: value}}; histograms keep their observations."""
+    series = {}
+    for e in events:
+        values = series.setdefault(e["n"], {})
+        key = tuple(sorted(e["l"].items()))
+        if e["k"] == "counter": values[key] = values.get(key, 0) + e["v"]
+        elif e["k"] == "histogram": values.setdefault(key, []).append(e["v"])
+        else: values[key] = e["v"]
+    return series
+
+
+def exposition(series):
+    """Prometheus text exposition of aggregated series, as read by node_exporter's textfile collector."""
+    lines = []
+    for name, values in sorted(series.items()):
+        kind, help_text = METRICS.get(name, ("gauge", name))
+        full = f"{name}_total" if kind == "counter" else name
+        lines += [f"# HELP {PREFIX}{full} {help_text}", f"# TYPE {PREFIX}{full} {kind}"]
+        for key, value in sorted(values.items()):
+            labels = dict(key)
+            if kind != "histogram":
+                lines.append(f"{_series(full, labels)} {_number(value)}"); continue
+            for bound in DURATION_BUCKETS:
+                lines.append(f"{_series(name, {**labels, 'le': f'{bound:g}'}, '_bucket')} {sum(v <= bound for v in value)}")
+            lines += [f"{_series(name, {**labels, 'le': '+Inf'}, '_bucket')} {len(value)}",
+                      f"{_series(name, labels, '_sum')} {_number(sum(value))}", f"{_series(name, labels, '_count')} {len(value)}"]
+    return "\n".join(lines) + "\n"
+
+
+def flush(job, spool, started, ok):
+    """Writes <job>.prom (replaced each run) and appends the run's summary to <job>.jsonl."""
+    try: events = [json.loads(line) for line in Path(spool).read_text().splitlines() if line.strip()]
+    except OSError: events = []
+    failures = sorted((e for e in events if e["n"] == "stage_failures"), key=lambda e: e["t"])
+    failed_stage = failures[0]["l"].get("stage") if failures else None
+    finished = time.time()
+    events += [{"k": "gauge", "n": "run_duration_seconds", "v": round(finished - started, 3), "l": {}},
+               {"k": "gauge", "n": "run_success", "v": int(ok), "l": {}},
+               {"k": "gauge", "n": "run_timestamp_seconds", "v": int(finished), "l": {}}]
+    if failed_stage: events.append({"k": "gauge", "n": "run_failed_stage", "v": 1, "l": {"stage": failed_stage}})
+    for e in events: e["l"] = {"job": job, **e["l"]}
+    series = _aggregate(events)
+
+    METRICS_DIR.mkdir(parents=True, exist_ok=True)
+    prom_path = METRICS_DIR / f"{job}.prom"
+    tmp_path = prom_path.with_suffix(".prom.tmp")
+    tmp_path.write_text(exposition(series))
+    tmp_path.replace(prom_path)
+    summary = {"job": job, "run_id": Path(spool).stem, "started": started, "finished": finished, "ok": ok, "failed_stage": failed_stage,
+               "series": {_series(name, dict(key)): ({"count": len(v), "sum": round(sum(v), 3)} if isinstance(v, list) else v)
+                          for name, values in series.items() for key, v in values.items()}}
+    with open(METRICS_DIR / f"{job}.jsonl", "a") as f: f.write(json.dumps(summary) + "\n")
+    Path(spool).unlink(missing_ok=True)
+    print(f"📈 Metrics written to {prom_path}")
+
+
+@contextmanager
+def run(job):
+    """
+    Collects metrics for one script run and writes them when it ends, however it ends. A run
+    nested in another (a creator inside batch_news) reports into the outer run instead.
+    """
+    if os.getenv(SPOOL_ENV):
+        yield; return
+    (METRICS_DIR / "spool").mkdir(parents=True, exist_ok=True)
+    spool = (METRICS_DIR / "spool" / f"{job}-{uuid.uuid4().hex[:12]}.jsonl").resolve()
+    os.environ[SPOOL_ENV] = str(spool)
+    started, ok = time.time(), False
+    try:
+        yield
+        ok = True
+    except SystemExit as e:
+        ok = not e.code; raise
+    finally:
+        os.environ.pop(SPOOL_ENV, None)
+        try: flush(job, spool, started, ok)
+        except Exception as e: print(f"⚠️ Could not write metrics: {e}", file=sys.stderr)
@@ -0,0 +1,55 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+import requests
+import metrics
+from quota import ledger
+
+GNEWS_API_ENDPOINT = os.getenv("GNEWS_API_ENDPOINT", "https://gnews.io/api/v4/top-headlines")
+ARTICLE_CACHE_DIR = Path(".cache/articles")
+# Set by batch_news.py so every deliverable works from one shared headline fetch.
+HEADLINES_ENV = "HEADLINES_PATH"
+# Last successful GNews response, reused when the daily quota is spent.
+LAST_HEADLINES_PATH = Path(".cache/last_headlines.json")
+
+
+def fetch_headlines(api_key, max_articles=10):
+    """
+    Top US headlines from GNews, or the batch's pre-fetched list when HEADLINES_PATH is set.
+    Falls back to the last successful fetch when the GNews quota is spent or it rate-limits.
+    """
+    headlines_path = os.getenv(HEADLINES_ENV)
+    if headlines_path:
+        articles = json.loads(Path(headlines_path).read_text())
+        print(f"📰 Using {len(articles)} pre-fetched headline(s) from {headlines_path}")
+        return articles[:max_articles]
+    params = {"token": api_key, "lang": "en", "country": "us", "max": max_articles}
+    if ledger().try_acquire("gnews"):
+        r = requests.get(GNEWS_API_ENDPOINT, params=params, timeout=10)
+        if ledger().note_response("gnews", r):
+            r.raise_for_status()
+            articles = r.json().get("articles", [])
+            LAST_HEADLINES_PATH.parent.mkdir(parents=True, exist_ok=True)
+            LAST_HEADLINES_PATH.write_text(json.dumps(articles))
+            return articles
+    if not LAST_HEADLINES_PATH.exists(): raise RuntimeError("GNews quota exhausted and no cached headlines to fall back on.")
+    print(f"📰 Reusing cached headlines from {LAST_HEADLINES_PATH} until the GNews quota resets.")
+    metrics.inc("cache_hits", cache="headlines")
+    return json.loads(LAST_HEADLINES_PATH.read_text())[:max_articles]
+
+
+def parse_article(url):
+    """Article body text via newspaper, cached on disk by URL so batch outputs and reruns scrape each article once."""
+    cache_path = ARTICLE_CACHE_DIR / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.json"
+    if cache_path.exists():
+        try:
+            text = json.loads(cache_path.read_text())["text"]
+            metrics.inc("cache_hits", cache="articles"); return text
+        except (OSError, ValueError, KeyError): pass
+    from newspaper import Article
+    article = Article(url)
+    article.download(); article.parse()
+    ARTICLE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    cache_path.write_text(json.dumps({"url": url, "text": article.text}))
+    return article.text
@@ -0,0 +1,76 @@
+import os
+import subprocess
+import metrics
+from pathlib import Path
+
+PEXELS_VIDEO_ENDPOINT = os.getenv("PEXELS_VIDEO_ENDPOINT", "https://api.pexels.com/videos/search")
+MEZZANINE_DIR = Path(".cache/pexels")
+MEZZANINE_FPS = 30
+MEZZANINE_CRF = 18
+# The directory is saved by the workflow's actions/cache step, so it is kept to this size, least recently used first.
+MEZZANINE_CACHE_MB = int(os.getenv("MEZZANINE_CACHE_MB", "1024"))
+LANDSCAPE = (1920, 1080)
+
+
+def _cost(rendition):
+    """Bytes to fetch, from the size hint when Pexels gives one, otherwise pixels per second."""
+    return rendition.get("size") or rendition["width"] * rendition["height"] * min(rendition.get("fps") or MEZZANINE_FPS, 60)
+
+
+def pick_rendition(video_files, canvas=LANDSCAPE):
+    """
+    Smallest MP4 rendition that still fills `canvas` without upscaling, preferring ones at or
+    below the mezzanine frame rate; the largest available one when none is big enough.
+    """
+    renditions = [f for f in video_files if f.get("file_type") == "video/mp4" and f.get("width") and f.get("height") and f.get("link")]
+    meeting = [f for f in renditions if min(canvas[0] / f["width"], canvas[1] / f["height"]) <= 1]
+    if meeting: return min(meeting, key=lambda f: ((f.get("fps") or MEZZANINE_FPS) > MEZZANINE_FPS + 0.5, _cost(f)))
+    return max(renditions, key=lambda f: f["width"] * f["height"], default=None)
+
+
+def prune_mezzanines(keep=None, limit_mb=None):
+    """Deletes the least recently used mezzanines until the cache fits in `limit_mb`; `keep` is never deleted."""
+    limit = (MEZZANINE_CACHE_MB if limit_mb is None else limit_mb) * 1024 * 1024
+    clips = []
+    for path in MEZZANINE_DIR.glob("*.mp4"):
+        if path.name.endswith(".tmp.mp4"): continue
+        try: stat = path.stat()
+        except FileNotFoundError: continue
+        clips.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in clips)
+    for _, size, path in sorted(clips, key=lambda c: c[0]):
+        if total <= limit: break
+        if path == keep: continue
+        path.unlink(missing_ok=True); total -= size
+        metrics.inc("cache_evictions", cache="pexels_mezzanine")
+    return total
+
+
+def mezzanine_clip(video, duration, start=0, canvas=LANDSCAPE):
+    """
+    Trims [start, start + duration) of a Pexels video and normalizes it to the canvas, frame rate and
+    pixel format of the render, cached by video id. ffmpeg reads the rendition over HTTP with
+    input-side seeking, so only the needed window is transferred. Returns the cached path or None.
+    """
+    path = MEZZANINE_DIR / f"{video['id']}_{canvas[0]}x{canvas[1]}_{start:g}_{duration:g}.mp4"
+    if path.exists():
+        print(f"      ♻️ Pexels clip {video['id']} from cache")
+        os.utime(path)  # The mtime is the last use, for prune_mezzanines.
+        metrics.inc("cache_hits", cache="pexels_mezzanine"); return path
+    rendition = pick_rendition(video.get("video_files", []), canvas)
+    if not rendition: return None
+    w, h = canvas
+    print(f"      - Pexels {video['id']}: {rendition['width']}x{rendition['height']}@{rendition.get('fps') or '?'} rendition, {duration:g}s window")
+    MEZZANINE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp.mp4")
+    cmd = ["ffmpeg", "-y", "-v", "error", "-ss", str(start), "-t", str(duration), "-i", rendition["link"], "-an",
+           "-vf", f"scale={w}:{h}:force_original_aspect_ratio=decrease,pad={w}:{h}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={MEZZANINE_FPS},format=yuv420p",
+           "-c:v", "libx264", "-preset", "veryfast", "-crf", str(MEZZANINE_CRF), "-movflags", "+faststart", str(tmp_path)]
+    try:
+        subprocess.run(cmd, check=True)
+    except subprocess.CalledProcessError:
+        tmp_path.unlink(missing_ok=True); raise
+    tmp_path.replace(path)
+    metrics.inc("downloads", kind="pexels_mezzanine"); metrics.inc("download_bytes", path.stat().st_size, kind="pexels_mezzanine")
+    prune_mezzanines(keep=path)
+    return path
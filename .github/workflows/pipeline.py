@@ -0,0 +1,104 @@
+import asyncio
+import multiprocessing
+import os
+import time
+import metrics
+from render_cost import Planned
+from concurrent.futures import ProcessPoolExecutor
+
+IO, CPU = "io", "cpu"
+
+
+class Stage:
+    """
+    One node of a pipeline graph. `fn(*args, *dep_results)` produces the stage result.
+    IO stages (network, TTS, LLM) run on threads; CPU stages (ffmpeg renders) run in a
+    process pool, so their fn and args must be picklable module-level objects.
+    A None result marks the stage as failed; dependents are skipped unless allow_missing.
+    A Planned result (--plan) is passed to dependents but never recorded in the manifest.
+    """
+    def __init__(self, name, fn, deps=(), args=(), kind=IO, inputs=None, outputs=None, allow_missing=False):
+        self.name, self.fn, self.deps, self.args, self.kind = name, fn, list(deps), tuple(args), kind
+        self.inputs, self.outputs, self.allow_missing = inputs, outputs, allow_missing
+
+
+class Pipeline:
+    """Runs a DAG of stages, overlapping independent stages and resuming through a RunManifest."""
+    def __init__(self, stages, manifest=None, max_io=4, max_cpu=None):
+        self.stages = {s.name: s for s in stages}
+        self.manifest = manifest
+        self.max_io = max_io
+        self.max_cpu = max_cpu or max(1, (os.cpu_count() or 2) // 2)
+        self.results = {}
+        for stage in stages:
+            missing = [d for d in stage.deps if d not in self.stages]
+            if missing: raise ValueError(f"Stage '{stage.name}' depends on unknown stage(s): {', '.join(missing)}")
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        state = {}
+        def visit(name):
+            if state.get(name) == "done": return
+            if state.get(name) == "visiting": raise ValueError(f"Pipeline has a dependency cycle through '{name}'")
+            state[name] = "visiting"
+            for dep in self.stages[name].deps: visit(dep)
+            state[name] = "done"
+        for name in self.stages: visit(name)
+
+    def _stage_inputs(self, stage):
+        upstream = [self.manifest.digest(d) for d in stage.deps] if self.manifest else []
+        return [stage.inputs, upstream]
+
+    async def _run_stage(self, stage, tasks, io_slots, cpu_pool):
+        dep_results = [await tasks[d] for d in stage.deps]
+        if not stage.allow_missing and any(r is None for r in dep_results):
+            print(f"⏭️ Skipping stage '{stage.name}': an upstream stage failed.")
+            return None
+        inputs = self._stage_inputs(stage)
+        if self.manifest:
+            hit, result = self.manifest.lookup(stage.name, inputs)
+            if hit: return result
+        started = time.time()
+        loop = asyncio.get_running_loop()
+        try:
+            if stage.kind == CPU:
+                result = await loop.run_in_executor(cpu_pool, stage.fn, *stage.args, *dep_results)
+            else:
+                async with io_slots:
+                    result = await asyncio.to_thread(stage.fn, *stage.args, *dep_results)
+        except Exception as e:
+            print(f"❌ Stage '{stage.name}' failed: {e}")
+            result = None
+        elapsed = time.time() - started
+        metrics.observe("stage_duration_seconds", elapsed, stage=stage.name, outcome="ok" if result is not None else "failed")
+        if result is None: metrics.inc("stage_failures", stage=stage.name)
+        # A planned render wrote nothing, so a later real run must not find it up to date.
+        if self.manifest and not isinstance(result, Planned):
+            outputs = stage.outputs(result) if stage.outputs and result is not None else ()
+            self.manifest.record(stage.name, inputs, result, outputs, elapsed)
+        if result is not None: print(f"✔️ Stage '{stage.name}' finished in {elapsed:.1f}s.")
+        return result
+
+    async def _run(self):
+        io_slots = asyncio.Semaphore(self.max_io)
+        # spawn, not fork: the TTS/gRPC clients running on IO threads are not fork-safe.
+        with ProcessPoolExecutor(max_workers=self.max_cpu, mp_context=multiprocessing.get_context("spawn")) as cpu_pool:
+            tasks = {}
+            for name in self._topological_order():
+                tasks[name] = asyncio.ensure_future(self._run_stage(self.stages[name], tasks, io_slots, cpu_pool))
+            for name, task in tasks.items(): self.results[name] = await task
+        return self.results
+
+    def _topological_order(self):
+        order, seen = [], set()
+        def visit(name):
+            if name in seen: return
+            seen.add(name)
+            for dep in self.stages[name].deps: visit(dep)
+            order.append(name)
+        for name in self.stages: visit(name)
+        return order
+
+    def run(self):
+        """Runs every stage and returns {stage name: result}."""
+        return asyncio.run(self._run())
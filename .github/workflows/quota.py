@@ -0,0 +1,115 @@
+import json
+import time
+import fcntl
+import datetime
+import threading
+import metrics
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+LEDGER_PATH = Path(".cache/quota_ledger.json")
+# Google and GNews quotas reset at midnight Pacific time.
+QUOTA_TZ = ZoneInfo("America/Los_Angeles")
+MAX_THROTTLE_SECONDS = 30
+PROVIDERS = {
+    # budget: units per window (free tiers); rate_per_min: token-bucket refill; burst: bucket size.
+    "gnews": {"window": "day", "budget": 100, "rate_per_min": 10, "burst": 5},
+    "cse": {"window": "day", "budget": 100, "rate_per_min": 60, "burst": 10},
+    "youtube": {"window": "day", "budget": 10000, "rate_per_min": 1800, "burst": 500},
+    "pexels": {"window": "hour", "budget": 200, "rate_per_min": 60, "burst": 10},
+    "gemini": {"window": "day", "budget": 1500, "rate_per_min": 15, "burst": 3},
+}
+# Units charged per call where it is not 1 (YouTube Data API search().list costs 100).
+COSTS = {("youtube", "search"): 100}
+
+
+def _window_key(window):
+    now = datetime.datetime.now(QUOTA_TZ)
+    return now.strftime("%Y-%m-%d") if window == "day" else now.strftime("%Y-%m-%dT%H")
+
+
+class QuotaLedger:
+    """
+    Per-provider quota accounting that persists across runs (and across processes, via a file
+    lock), plus a token bucket per provider to smooth bursts. Callers ask before each API call
+    and fall back to cached or alternative sources when the answer is no.
+    """
+    def __init__(self, path=LEDGER_PATH):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+
+    def _update(self, fn):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.lock, open(self.path.with_suffix(".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try: data = json.loads(self.path.read_text()) if self.path.exists() else {}
+            except ValueError: data = {}
+            result = fn(data)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(data, indent=1))
+            tmp_path.replace(self.path)
+            return result
+
+    @staticmethod
+    def _state(data, provider):
+        limits = PROVIDERS[provider]
+        state = data.setdefault(provider, {})
+        window = _window_key(limits["window"])
+        if state.get("window") != window:
+            state.update({"window": window, "used": 0, "calls": 0, "exhausted": False})
+        state.setdefault("tokens", limits["burst"]); state.setdefault("refilled_at", time.time())
+        now = time.time()
+        state["tokens"] = min(limits["burst"], state["tokens"] + (now - state["refilled_at"]) * limits["rate_per_min"] / 60)
+        state["refilled_at"] = now
+        return state
+
+    def remaining(self, provider):
+        return self._update(lambda data: 0 if self._state(data, provider)["exhausted"] else PROVIDERS[provider]["budget"] - self._state(data, provider)["used"])
+
+    def try_acquire(self, provider, units=1, operation=None):
+        """
+        Reserves `units` of the provider's quota, sleeping briefly if the token bucket is empty.
+        Returns False (without spending anything) when the window budget is exhausted.
+        """
+        units = COSTS.get((provider, operation), units)
+        deadline = time.time() + MAX_THROTTLE_SECONDS
+        while True:
+            def attempt(data):
+                state = self._state(data, provider)
+                if state["exhausted"] or state["used"] + units > PROVIDERS[provider]["budget"]: return "exhausted"
+                needed = min(units, PROVIDERS[provider]["burst"])
+                if state["tokens"] < needed: return (needed - state["tokens"]) * 60 / PROVIDERS[provider]["rate_per_min"]
+                state["tokens"] -= needed; state["used"] += units; state["calls"] += 1
+                return "ok"
+            outcome = self._update(attempt)
+            if outcome == "ok":
+                metrics.inc("api_calls", provider=provider); return True
+            if outcome == "exhausted":
+                print(f"    🚦 {provider} quota exhausted for this window; degrading.")
+                metrics.inc("api_quota_rejections", provider=provider); return False
+            if time.time() + outcome > deadline:
+                print(f"    🚦 {provider} is rate-limited beyond {MAX_THROTTLE_SECONDS}s; degrading.")
+                metrics.inc("api_quota_rejections", provider=provider); return False
+            time.sleep(outcome)
+
+    def note_response(self, provider, response):
+        """Marks the provider exhausted for the window after a 429 or a quota error, before more calls fail."""
+        quota_error = response.status_code == 429 or (response.status_code == 403 and "quota" in response.text.lower())
+        if quota_error:
+            def mark(data): self._state(data, provider)["exhausted"] = True
+            self._update(mark)
+            print(f"    🚦 {provider} returned {response.status_code}; no more calls until its quota resets.")
+        return not quota_error
+
+    def note_rejected(self, provider):
+        def mark(data): self._state(data, provider)["exhausted"] = True
+        self._update(mark)
+
+
+_ledger = None
+
+def ledger():
+    """Process-wide ledger instance."""
+    global _ledger
+    if _ledger is None: _ledger = QuotaLedger()
+    return _ledger
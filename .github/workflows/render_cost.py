@@ -0,0 +1,102 @@
+import os
+import json
+import fcntl
+from pathlib import Path
+
+COST_MODEL_PATH = Path(".cache/render_cost.json")
+# x264 presets from slowest to fastest, with speed relative to "medium" for presets not yet measured.
+PRESET_SPEEDUP = {"medium": 1.0, "fast": 1.3, "faster": 1.6, "veryfast": 2.4, "superfast": 3.5, "ultrafast": 5.0}
+# Output seconds per wall second for a 1080p "medium" encode before any run has been measured.
+DEFAULT_SPEED = 1.0
+# Weight of the newest run in the moving averages.
+SMOOTHING = 0.3
+
+
+def plan_only():
+    """True when renders should only be planned (--plan): commands and estimates are printed, nothing is encoded."""
+    return os.getenv("RENDER_PLAN_ONLY") == "1"
+
+
+class Planned(str):
+    """Result of a render stage under --plan: the path it would have written. The run manifest never records one."""
+
+
+def planned(path):
+    print(f"📝 Plan only: {path} was not written.")
+    return Planned(path)
+
+
+def deadline_seconds():
+    """Wall-clock budget for one encode (RENDER_DEADLINE_S), or None when renders are not time-boxed."""
+    value = float(os.getenv("RENDER_DEADLINE_S") or 0)
+    return value if value > 0 else None
+
+
+def _key(kind, mode, preset):
+    return f"{kind}/{mode}/{preset}"
+
+
+class CostModel:
+    """
+    Encode speed and output bitrate per output type, encode mode and preset, calibrated from the
+    -progress reports of previous renders and kept in .cache so estimates improve run over run.
+    """
+    def __init__(self, path=COST_MODEL_PATH):
+        self.path = Path(path)
+        try: self.data = json.loads(self.path.read_text()) if self.path.exists() else {}
+        except ValueError: self.data = {}
+
+    def speed(self, kind, mode, preset):
+        """Estimated output seconds per wall second; unmeasured presets are scaled from a measured one."""
+        measured = self.data.get(_key(kind, mode, preset), {}).get("speed")
+        if measured: return measured
+        for other, factor in PRESET_SPEEDUP.items():
+            known = self.data.get(_key(kind, mode, other), {}).get("speed")
+            if known: return known * PRESET_SPEEDUP.get(preset, 1.0) / factor
+        return DEFAULT_SPEED * PRESET_SPEEDUP.get(preset, 1.0) / (2 if mode == "2pass" else 1)
+
+    def estimate(self, kind, mode, preset, duration, fallback_bytes):
+        """(wall seconds, output bytes) for encoding `duration` seconds."""
+        rate = self.data.get(_key(kind, mode, preset), {}).get("bytes_per_s")
+        return duration / self.speed(kind, mode, preset), int(rate * duration) if rate else fallback_bytes
+
+    def choose_preset(self, kind, mode, preset, duration, deadline):
+        """`preset`, or the slowest faster one whose estimate fits `deadline` (the fastest if none does)."""
+        ladder = list(PRESET_SPEEDUP)
+        candidates = ladder[ladder.index(preset):] if preset in ladder else [preset]
+        for candidate in candidates:
+            if duration / self.speed(kind, mode, candidate) <= deadline: return candidate
+        return candidates[-1]
+
+    def record(self, kind, mode, preset, out_seconds, wall_seconds, output_bytes):
+        """Folds one finished encode into the model, under a file lock since renders run in parallel processes."""
+        if out_seconds <= 0 or wall_seconds <= 0: return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_suffix(".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try: self.data = json.loads(self.path.read_text()) if self.path.exists() else {}
+            except ValueError: self.data = {}
+            entry = self.data.setdefault(_key(kind, mode, preset), {"runs": 0})
+            for name, value in (("speed", out_seconds / wall_seconds), ("bytes_per_s", output_bytes / out_seconds)):
+                entry[name] = value if not entry.get(name) else (1 - SMOOTHING) * entry[name] + SMOOTHING * value
+            entry["runs"] += 1
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(self.data, indent=1))
+            tmp_path.replace(self.path)
+
+
+def read_progress(path):
+    """Last complete block of an ffmpeg -progress report as a dict (out_time_us, speed, progress, ...)."""
+    blocks, block = [], {}
+    try: lines = Path(path).read_text().splitlines()
+    except OSError: return block
+    for line in lines:
+        key, _, value = line.partition("=")
+        block[key.strip()] = value.strip()
+        if key.strip() == "progress": blocks.append(block); block = {}
+    return blocks[-1] if blocks else block
+
+
+def encoded_seconds(progress):
+    try: return int(progress.get("out_time_us", 0)) / 1e6
+    except ValueError: return 0.0
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import time
+import metrics
+from pathlib import Path
+
+MANIFEST_PATH = Path("run_manifest.json")
+
+
+def file_digest(path):
+    """sha256 of a file's contents, or None if it is missing."""
+    path = Path(path)
+    if not path.is_file(): return None
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""): h.update(block)
+    return h.hexdigest()
+
+
+def _digest(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class RunManifest:
+    """
+    Records each stage's inputs, result and output file hashes so an interrupted run
+    resumes from the first incomplete or invalidated stage instead of starting over.
+    A finished run (or --fresh) starts a new manifest.
+    """
+    def __init__(self, path=MANIFEST_PATH, fresh=False):
+        self.path = Path(path)
+        data = {}
+        if self.path.exists() and not fresh:
+            try: data = json.loads(self.path.read_text())
+            except (OSError, ValueError) as e: print(f"⚠️ Run manifest unreadable, starting fresh: {e}")
+        self.is_new = not data.get("stages") or data.get("finished", False)
+        self.stages = {} if self.is_new else data["stages"]
+        if self.is_new: print("🆕 Starting a new run." if not fresh else "🆕 --fresh given: rebuilding every stage.")
+        else: print(f"♻️ Resuming previous run from {self.path} ({len(self.stages)} completed stage(s)).")
+        self.save()
+
+    def save(self, finished=False):
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"stages": self.stages, "finished": finished}, indent=2))
+        tmp_path.replace(self.path)
+
+    def _is_valid(self, record, inputs_digest):
+        if record.get("inputs") != inputs_digest: return False
+        return all(digest is not None and file_digest(p) == digest for p, digest in record.get("outputs", {}).items())
+
+    def lookup(self, name, inputs=None):
+        """Returns (True, result) if `name` completed with these inputs and its outputs are unchanged on disk."""
+        record = self.stages.get(name)
+        if record and self._is_valid(record, _digest(inputs)):
+            print(f"⏩ Stage '{name}' is up to date, skipping.")
+            metrics.inc("stage_cache_hits", stage=name)
+            return True, record["result"]
+        if record:
+            print(f"🔁 Stage '{name}' was invalidated, re-running.")
+            del self.stages[name]
+        return False, None
+
+    def record(self, name, inputs, result, output_paths=(), seconds=0.0):
+        """Stores a completed stage. A None result is not recorded, so the stage retries next run."""
+        if result is not None:
+            paths = [str(p) for p in output_paths]
+            self.stages[name] = {
+                "inputs": _digest(inputs), "result": result,
+                "outputs": {p: file_digest(p) for p in paths},
+                "seconds": round(seconds, 2),
+            }
+        self.save()
+
+    def stage(self, name, fn, inputs=None, outputs=None):
+        """
+        Returns the recorded result of `name` if it is still valid; otherwise runs fn() and
+        records it. `outputs` maps the result to the files it produced.
+        """
+        hit, result = self.lookup(name, inputs)
+        if hit: return result
+        started = time.time()
+        result = fn()
+        metrics.observe("stage_duration_seconds", time.time() - started, stage=name, outcome="ok" if result is not None else "failed")
+        if result is None: metrics.inc("stage_failures", stage=name)
+        self.record(name, inputs, result, outputs(result) if outputs and result is not None else (), time.time() - started)
+        return result
+
+    def digest(self, name):
+        """Fingerprint of a completed stage, for use in downstream stages' inputs."""
+        record = self.stages.get(name)
+        return _digest([record["result"], record["outputs"]]) if record else None
+
+    def finish(self):
+        self.save(finished=True)
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import re
+import time
+from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Persisted between scheduled runs through the `.cache` directory (see the workflow cache step).
+# One index per deliverable ("single", "combined", "short"): a story told in the long-form video
+# is still fair game for the Short, but never twice in the same deliverable.
+STORY_INDEX_DIR = Path(".cache")
+DEFAULT_KIND = "single"
+SIMHASH_BITS = 64
+# Two fingerprints within this Hamming distance are treated as the same story.
+MAX_HAMMING_DISTANCE = 3
+# Pigeonhole: with <= 3 differing bits, at least one of 4 bands matches exactly.
+BANDS = MAX_HAMMING_DISTANCE + 1
+BAND_BITS = SIMHASH_BITS // BANDS
+MAX_AGE_DAYS = 30
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid", "ocid", "cmpid", "taid", "ref")
+
+
+def canonical_url(url):
+    """Normalizes a story URL so the same article from different feeds compares equal."""
+    if not url: return ""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."): host = host[4:]
+    if host.startswith("m."): host = host[2:]
+    path = re.sub(r"/(amp|index\.html?)?/?$", "", parts.path) or "/"
+    query = [(k, v) for k, v in parse_qsl(parts.query) if not k.lower().startswith(TRACKING_PARAMS)]
+    return urlunsplit(("https", host, path, urlencode(sorted(query)), ""))
+
+
+def _shingles(text, size=3):
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    if len(words) < size: return [" ".join(words)] if words else []
+    return [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+def simhash(text):
+    """64-bit SimHash over word 3-shingles."""
+    weights = [0] * SIMHASH_BITS
+    for shingle in _shingles(text):
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+    return sum(1 << bit for bit in range(SIMHASH_BITS) if weights[bit] > 0)
+
+
+def story_index_path(kind=DEFAULT_KIND):
+    return STORY_INDEX_DIR / f"story_index_{kind}.json"
+
+
+def _bands(fingerprint):
+    mask = (1 << BAND_BITS) - 1
+    return [f"{b}:{(fingerprint >> (b * BAND_BITS)) & mask:x}" for b in range(BANDS)]
+
+
+class StoryIndex:
+    """Persistent index of the stories already published as one kind of deliverable (canonical URL + SimHash of title and body)."""
+    def __init__(self, kind=DEFAULT_KIND, path=None):
+        self.path = Path(path or story_index_path(kind))
+        self.entries = []
+        if self.path.exists():
+            try: self.entries = json.loads(self.path.read_text()).get("stories", [])
+            except (OSError, ValueError) as e: print(f"    ⚠️ Story index unreadable, starting fresh: {e}")
+        cutoff = time.time() - MAX_AGE_DAYS * 86400
+        self.entries = [e for e in self.entries if e.get("published_at", 0) >= cutoff]
+        self._rebuild()
+
+    def _rebuild(self):
+        self.urls = {e["url"] for e in self.entries if e.get("url")}
+        self.buckets = {}
+        for i, entry in enumerate(self.entries):
+            for band in _bands(entry["simhash"]): self.buckets.setdefault(band, []).append(i)
+
+    def find(self, url, title, body=""):
+        """Returns the matching published entry, or None if the story is new."""
+        canon = canonical_url(url)
+        if canon and canon in self.urls:
+            return next(e for e in self.entries if e.get("url") == canon)
+        fingerprint = simhash(f"{title}\n{body}")
+        candidates = {i for band in _bands(fingerprint) for i in self.buckets.get(band, [])}
+        for i in sorted(candidates):
+            if bin(self.entries[i]["simhash"] ^ fingerprint).count("1") <= MAX_HAMMING_DISTANCE:
+                return self.entries[i]
+        return None
+
+    def is_published(self, url, title, body=""):
+        match = self.find(url, title, body)
+        if match: print(f"    ⏭️ Already published on {time.strftime('%Y-%m-%d %H:%M', time.gmtime(match['published_at']))}: {match['title']}")
+        return match is not None
+
+    def add(self, url, title, body=""):
+        self.entries.append({"url": canonical_url(url), "title": title, "simhash": simhash(f"{title}\n{body}"), "published_at": int(time.time())})
+        self._rebuild()
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"stories": self.entries}, indent=1))
+        tmp_path.replace(self.path)
+
+
+def story_source(article_data):
+    """The fields fingerprinted for a GNews article; stored in video_metadata.json for the upload step."""
+    return {"url": article_data.get("url", ""), "title": article_data.get("title", ""), "description": article_data.get("description", "") or ""}
+
+
+def record_published(metadata, kind=None, path=None):
+    """Adds every source story of an uploaded video to the index of its deliverable (`kind`, else the metadata's own)."""
+    sources = metadata.get("sources", [])
+    if not sources: return
+    index = StoryIndex(kind or metadata.get("kind", DEFAULT_KIND), path)
+    for source in sources:
+        if not index.find(source["url"], source["title"], source.get("description", "")):
+            index.add(source["url"], source["title"], source.get("description", ""))
+    index.save()
+    print(f"🗂️ Recorded {len(sources)} published stor{'y' if len(sources) == 1 else 'ies'} in {index.path}")
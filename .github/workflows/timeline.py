@@ -0,0 +1,58 @@
+import itertools
+
+# Shortest shot worth cutting to; a shorter remainder is folded into its neighbour instead.
+MIN_SHOT_SECONDS = 1.5
+
+
+class Shot:
+    """One visual on the timeline: `seconds` of `path`, starting `start` seconds into it for clips."""
+    def __init__(self, path, seconds, is_image, start=0.0):
+        self.path, self.seconds, self.is_image, self.start = str(path), seconds, is_image, start
+
+    def input_options(self):
+        """Input-side options so ffmpeg decodes exactly this shot and nothing past it."""
+        if self.is_image: return ["-loop", "1", "-t", f"{self.seconds:.3f}"]
+        return (["-ss", f"{self.start:.3f}"] if self.start else []) + ["-t", f"{self.seconds:.3f}"]
+
+    def __repr__(self):
+        return f"Shot({self.path!r}, {self.seconds:.3f}s{', image' if self.is_image else ''})"
+
+
+class TimelinePlan:
+    """Shots that add up to exactly `duration` seconds."""
+    def __init__(self, shots, duration):
+        self.shots, self.duration = shots, duration
+
+    @property
+    def total(self):
+        return sum(s.seconds for s in self.shots)
+
+    def summary(self):
+        """Counts for logs and the benchmark: shots, distinct assets, planned and shortest shot seconds."""
+        return {"shots": len(self.shots), "assets": len({s.path for s in self.shots}), "planned_s": round(self.total, 3),
+                "target_s": round(self.duration, 3), "shortest_s": round(min((s.seconds for s in self.shots), default=0), 3)}
+
+
+def plan_timeline(items, duration, min_shot=MIN_SHOT_SECONDS):
+    """
+    Cycles through `items` - (path, natural seconds, is_image) in play order - until `duration` is
+    covered, cutting the last shot short instead of overshooting. A last shot shorter than `min_shot`
+    is absorbed by the one before it when that one can stretch (a still, or a clip with footage
+    to spare), otherwise the one before is shortened so the last gets `min_shot`.
+    """
+    items = [(str(path), seconds, is_image) for path, seconds, is_image in items if seconds and seconds > 0]
+    shots, lengths, covered = [], [], 0.0
+    for path, seconds, is_image in itertools.cycle(items) if items else ():
+        remaining = duration - covered
+        if remaining <= 1e-3: break
+        shots.append(Shot(path, min(seconds, remaining), is_image)); lengths.append(seconds)
+        covered += shots[-1].seconds
+    if len(shots) > 1 and shots[-1].seconds < min_shot:
+        last, prev = shots[-1], shots[-2]
+        if prev.is_image or prev.seconds + last.seconds <= lengths[-2]:
+            prev.seconds += last.seconds; shots.pop()
+        else:
+            room = float("inf") if last.is_image else lengths[-1] - last.seconds
+            moved = min(min_shot - last.seconds, max(prev.seconds - min_shot, 0), room)
+            prev.seconds -= moved; last.seconds += moved
+    return TimelinePlan(shots, duration)
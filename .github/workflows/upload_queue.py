@@ -0,0 +1,145 @@
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import threading
+from pathlib import Path
+import metrics
+from story_index import record_published
+from youtube_uploader import upload_video, request_body_for, authorized_session
+
+QUEUE_PATH = Path(".cache/upload_queue.sqlite")
+MAX_ATTEMPTS = 3
+POLL_SECONDS = 2
+
+
+class UploadQueue:
+    """
+    Durable SQLite queue of finished videos waiting for upload. Items left 'uploading' by a
+    crashed process go back to 'pending' on open; the uploader then resumes their sessions.
+    """
+    def __init__(self, path=QUEUE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("""CREATE TABLE IF NOT EXISTS uploads (
+            id INTEGER PRIMARY KEY, video TEXT NOT NULL, metadata TEXT NOT NULL, shorts INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0, video_id TEXT, error TEXT,
+            enqueued_at REAL NOT NULL, updated_at REAL NOT NULL)""")
+        recovered = self.db.execute("UPDATE uploads SET status = 'pending', updated_at = ? WHERE status = 'uploading'", (time.time(),)).rowcount
+        if recovered: print(f"♻️ Re-queued {recovered} upload(s) interrupted by a previous crash.")
+
+    def enqueue(self, video, metadata, shorts=False):
+        """Queues a video; `metadata` is a dict or a path to video_metadata.json (copied, so the file may be reused)."""
+        if not isinstance(metadata, dict): metadata = json.loads(Path(metadata).read_text())
+        now = time.time()
+        with self.lock:
+            item_id = self.db.execute("INSERT INTO uploads (video, metadata, shorts, enqueued_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                                      (str(Path(video).resolve()), json.dumps(metadata), int(shorts), now, now)).lastrowid
+        print(f"📥 Queued upload #{item_id}: {metadata['title']}")
+        return item_id
+
+    def claim(self):
+        """Atomically takes the oldest pending item, or returns None."""
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            row = self.db.execute("SELECT * FROM uploads WHERE status = 'pending' ORDER BY id LIMIT 1").fetchone()
+            if row: self.db.execute("UPDATE uploads SET status = 'uploading', attempts = attempts + 1, updated_at = ? WHERE id = ?", (time.time(), row["id"]))
+            self.db.execute("COMMIT")
+        return row
+
+    def complete(self, item_id, video_id):
+        with self.lock:
+            self.db.execute("UPDATE uploads SET status = 'done', video_id = ?, error = NULL, updated_at = ? WHERE id = ?", (video_id, time.time(), item_id))
+
+    def fail(self, item_id, error):
+        with self.lock:
+            attempts = self.db.execute("SELECT attempts FROM uploads WHERE id = ?", (item_id,)).fetchone()["attempts"]
+            status = "pending" if attempts < MAX_ATTEMPTS else "failed"
+            self.db.execute("UPDATE uploads SET status = ?, error = ?, updated_at = ? WHERE id = ?", (status, str(error)[:500], time.time(), item_id))
+        return status
+
+    def items(self):
+        with self.lock:
+            return [dict(r) for r in self.db.execute("SELECT * FROM uploads ORDER BY id")]
+
+
+class UploadWorker:
+    """Uploads queued videos on background threads while the caller keeps rendering."""
+    def __init__(self, queue, concurrency=2):
+        self.queue, self.concurrency = queue, concurrency
+        self.draining = threading.Event()
+        self.threads, self.given_up = [], 0
+
+    def _upload(self, item):
+        metadata = json.loads(item["metadata"])
+        print(f"📤 [#{item['id']}] Uploading {Path(item['video']).name} (attempt {item['attempts'] + 1}/{MAX_ATTEMPTS})...")
+        response = upload_video(item["video"], request_body_for(metadata, shorts=bool(item["shorts"])), session=authorized_session())
+        self.queue.complete(item["id"], response["id"])
+        print(f"✅ [#{item['id']}] Uploaded Video ID: {response['id']}")
+        # The video is live; failing to index its story must not send the item back to the queue.
+        try: record_published(metadata, kind="short" if item["shorts"] else None)
+        except Exception as e: print(f"⚠️ [#{item['id']}] Uploaded, but the story index was not updated: {e}")
+
+    def _run(self):
+        while True:
+            item = self.queue.claim()
+            if not item:
+                if self.draining.is_set(): return
+                time.sleep(POLL_SECONDS); continue
+            try:
+                self._upload(item)
+            except Exception as e:
+                status = self.queue.fail(item["id"], e)
+                if status == "failed": self.given_up += 1
+                print(f"❌ [#{item['id']}] Upload failed ({'will retry' if status == 'pending' else 'giving up'}): {e}")
+
+    def start(self):
+        for _ in range(self.concurrency):
+            thread = threading.Thread(target=self._run, daemon=True)
+            thread.start(); self.threads.append(thread)
+        return self
+
+    def drain(self):
+        """Lets the workers exit once nothing is pending and waits for them."""
+        self.draining.set()
+        for thread in self.threads: thread.join()
+
+
+def print_status(queue):
+    icons = {"pending": "⏳", "uploading": "📤", "done": "✅", "failed": "❌"}
+    items = queue.items()
+    if not items: print("📭 Upload queue is empty."); return
+    for item in items:
+        title = json.loads(item["metadata"])["title"]
+        detail = f"video {item['video_id']}" if item["video_id"] else (item["error"] or "")
+        print(f"{icons.get(item['status'], '?')} #{item['id']:<4} {item['status']:<9} tries={item['attempts']}  {title[:60]}  {detail}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Durable background upload queue.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    enqueue = sub.add_parser("enqueue", help="Queue a finished video.")
+    enqueue.add_argument("video")
+    enqueue.add_argument("metadata", nargs="?", default="video_metadata.json")
+    enqueue.add_argument("--shorts", action="store_true")
+    run = sub.add_parser("run", help="Upload everything pending, then exit.")
+    run.add_argument("--concurrency", type=int, default=2)
+    sub.add_parser("status", help="Show every item and its status.")
+    args = parser.parse_args(argv)
+
+    queue = UploadQueue()
+    if args.command == "enqueue": queue.enqueue(args.video, args.metadata, shorts=args.shorts)
+    elif args.command == "run":
+        with metrics.run("upload_queue"):
+            worker = UploadWorker(queue, args.concurrency).start()
+            worker.drain()
+            print_status(queue)
+            if worker.given_up: sys.exit(1)
+    else: print_status(queue)
+
+if __name__ == "__main__":
+    main()
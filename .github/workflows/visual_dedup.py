@@ -0,0 +1,136 @@
+import json
+import threading
+import subprocess
+import metrics
+from pathlib import Path
+
+VISUAL_INDEX_PATH = Path(".cache/visual_hashes.json")
+# dHash bits that may differ for two images to count as the same picture (recompression, resizing, watermarks).
+IMAGE_DISTANCE = 6
+CLIP_FRAME_DISTANCE = 10
+CLIP_KEYFRAMES = 4
+MAX_URLS = 20000
+
+
+def _hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def _dhash_bytes(pixels):
+    """64-bit difference hash from a 9x8 grayscale raster: one bit per horizontally adjacent pair."""
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = bits << 1 | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return bits
+
+
+def image_dhash(path):
+    from PIL import Image
+    with Image.open(path) as img:
+        img.draft("L", (64, 64))
+        return _dhash_bytes(img.convert("L").resize((9, 8), Image.LANCZOS).tobytes())
+
+
+def clip_hashes(path):
+    """dHashes of the clip's first few keyframes, decoded without touching the frames in between."""
+    cmd = ["ffmpeg", "-v", "error", "-skip_frame", "nokey", "-i", str(path), "-an", "-fps_mode", "passthrough",
+           "-frames:v", str(CLIP_KEYFRAMES), "-vf", "scale=9:8:flags=area,format=gray", "-f", "rawvideo", "-"]
+    raw = subprocess.run(cmd, capture_output=True, check=True).stdout
+    return [_dhash_bytes(raw[i:i + 72]) for i in range(0, len(raw) - 71, 72)]
+
+
+class VisualIndex:
+    """
+    Perceptual hashes of the visuals accepted in this run, plus a persistent URL -> hash map so
+    a URL that was hashed in an earlier run can be recognised as a duplicate before downloading it.
+    """
+    def __init__(self, path=VISUAL_INDEX_PATH):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        try: self.urls = json.loads(self.path.read_text()) if self.path.exists() else {}
+        except ValueError: self.urls = {}
+        self.images, self.clips = [], []
+
+    def _image_seen(self, value):
+        return any(_hamming(value, seen) <= IMAGE_DISTANCE for seen in self.images)
+
+    def _clip_seen(self, values):
+        for seen in self.clips:
+            matches = sum(any(_hamming(v, s) <= CLIP_FRAME_DISTANCE for s in seen) for v in values)
+            if values and matches * 2 > len(values): return True
+        return False
+
+    def known_duplicate(self, url):
+        """True when `url` was hashed before and matches something already accepted in this run."""
+        with self.lock:
+            known = self.urls.get(url)
+            if known is None: return False
+            return self._clip_seen(known) if isinstance(known, list) else self._image_seen(known)
+
+    def add_image(self, path, url=None):
+        """Records a downloaded image; returns False if it duplicates one accepted earlier in this run."""
+        value = image_dhash(path)
+        with self.lock:
+            if url: self.urls[url] = value
+            if self._image_seen(value): return False
+            self.images.append(value)
+            return True
+
+    def add_clip(self, path, url=None):
+        """Records a downloaded clip by its keyframe hashes; returns False for a near-identical clip."""
+        values = clip_hashes(path)
+        with self.lock:
+            if url: self.urls[url] = values
+            if self._clip_seen(values): return False
+            self.clips.append(values)
+            return True
+
+    def save(self):
+        with self.lock:
+            urls = dict(list(self.urls.items())[-MAX_URLS:])
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(urls))
+            tmp_path.replace(self.path)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+def visual_index():
+    """Process-wide index, shared by the image and clip stages of one run."""
+    global _index
+    with _index_lock:
+        if _index is None: _index = VisualIndex()
+    return _index
+
+
+def reset_visual_index():
+    """Starts a new run: duplicates are judged per video, so a warm worker must not carry over earlier runs' visuals."""
+    global _index
+    with _index_lock: _index = None
+
+
+def drop_duplicate_image(path, url=None):
+    """Deletes `path` and returns True if it repeats an image already accepted in this run."""
+    index = visual_index()
+    try: duplicate = not index.add_image(path, url)
+    except Exception: return False
+    if duplicate:
+        print(f"      ♊ Dropping duplicate image {Path(path).name}")
+        metrics.inc("duplicates_dropped", kind="image")
+        Path(path).unlink(missing_ok=True)
+    return duplicate
+
+
+def drop_duplicate_clip(path, url=None):
+    """Deletes `path` and returns True if it repeats a clip already accepted in this run."""
+    index = visual_index()
+    try: duplicate = not index.add_clip(path, url)
+    except Exception: return False
+    if duplicate:
+        print(f"      ♊ Dropping near-identical clip {Path(path).name}")
+        metrics.inc("duplicates_dropped", kind="clip")
+        Path(path).unlink(missing_ok=True)
+    return duplicate
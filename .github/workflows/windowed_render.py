@@ -0,0 +1,72 @@
+import os
+import math
+import shlex
+import shutil
+import subprocess
+import metrics
+from pathlib import Path
+from filtergraph import Graph, fit
+from render_cost import plan_only
+
+# Memory the render may use, in MB. Timelines needing more open inputs than fit in it are rendered in windows.
+RENDER_MEMORY_MB = int(os.getenv("RENDER_MEMORY_MB", "3072"))
+# Rough 1080p costs: the final pass (encoder, subtitles, branding) and one open input (decoder plus frame queues).
+BASE_MB = 400
+INPUT_MB = 90
+MIN_WINDOW_INPUTS = 2
+WINDOW_FPS = 30
+WINDOW_DIR = Path("render_windows")
+
+
+def max_open_inputs(budget_mb=None):
+    """Visual inputs one ffmpeg process may open under the memory budget."""
+    budget_mb = RENDER_MEMORY_MB if budget_mb is None else budget_mb
+    return max(MIN_WINDOW_INPUTS, (budget_mb - BASE_MB) // INPUT_MB)
+
+
+def needs_windows(input_count, budget_mb=None):
+    return input_count > max_open_inputs(budget_mb)
+
+
+def run_measured(cmd):
+    """Runs `cmd` like subprocess.run(check=True) and returns its peak resident set size in MB."""
+    proc = subprocess.Popen(cmd)
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if proc.returncode: raise subprocess.CalledProcessError(proc.returncode, cmd)
+    return usage.ru_maxrss / 1024
+
+
+def render_timeline(shots, name, canvas=(1920, 1080), shape=fit, budget_mb=None):
+    """
+    Renders a timeline plan's shots in windows of at most max_open_inputs() inputs, each to a
+    lossless intermediate part, and returns a concat list that stitches the parts back together
+    without re-encoding. Read it with Graph.input(list, "-f", "concat", "-safe", "0").
+    """
+    per_window = max_open_inputs(budget_mb)
+    windows = math.ceil(len(shots) / per_window)
+    size = math.ceil(len(shots) / windows)
+    out_dir = WINDOW_DIR / name
+    shutil.rmtree(out_dir, ignore_errors=True); out_dir.mkdir(parents=True)
+    print(f"  - Windowed render: {len(shots)} inputs in {windows} window(s) of ≤{size} (budget {budget_mb or RENDER_MEMORY_MB} MB)")
+    parts, peak_rss = [], 0
+    for w in range(windows):
+        g = Graph()
+        streams = []
+        for i, shot in enumerate(shots[w * size:(w + 1) * size]):
+            visual = g.input(shot.path, *shot.input_options(), probe=True)
+            streams.append(g.chain(visual.video, *shape(*canvas), "format=yuv420p", label=f"v{i}"))
+        video = g.chain(streams, f"concat=n={len(streams)}:v=1:a=0", f"fps={WINDOW_FPS}", label="v")
+        part = out_dir / f"part_{w:03d}.mkv"
+        cmd = g.command(video, base=("ffmpeg", "-y", "-v", "error")) + ["-an", "-c:v", "libx264", "-preset", "ultrafast", "-qp", "0", str(part)]
+        if plan_only():
+            print(f"    📝 Window {w + 1}/{windows}: {shlex.join(cmd)}")
+        else:
+            peak = run_measured(cmd)
+            print(f"    🧠 Window {w + 1}/{windows} ({len(streams)} inputs): peak RSS {peak:.0f} MB")
+            peak_rss = max(peak_rss, peak)
+        parts.append(part)
+    if peak_rss: metrics.gauge("render_window_peak_rss_bytes", int(peak_rss * 1024 * 1024), timeline=name)
+    list_path = out_dir / "timeline.txt"
+    list_path.write_text("".join(f"file '{p.name}'\n" for p in parts))
+    return list_path
@@ -0,0 +1,256 @@
+import os
+import json
+import time
+import signal
+import shutil
+import sqlite3
+import argparse
+import importlib
+import threading
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+import metrics
+from batch_news import DELIVERABLES, prepare_workdir, run_deliverable
+from story_index import record_published
+from youtube_uploader import upload_video, request_body_for, authorized_session
+
+JOBS_PATH = Path(".cache/jobs.sqlite")
+DAEMON_DIR = Path("daemon")
+UPLOAD_KIND = "upload"
+MAX_ATTEMPTS = 2
+POLL_SECONDS = 2
+# Imported once per render worker so jobs skip the import and extractor setup a fresh process would pay.
+WARM_IMPORTS = ("create_news_video", "create_combined_news", "create_news_video_shorts", "merge_intro_content",
+                "google.generativeai", "google.cloud.texttospeech", "googleapiclient.discovery",
+                "yt_dlp", "yt_dlp.extractor", "newspaper", "PIL.Image", "pydub", "cairosvg")
+_home = None
+_sessions = threading.local()
+
+
+class JobQueue:
+    """
+    Durable SQLite queue of render and upload jobs. Jobs left 'running' by a crashed daemon go
+    back to 'pending' on open, so a restart picks them up again.
+    """
+    def __init__(self, path=JOBS_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("""CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY, kind TEXT NOT NULL, args TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0, result TEXT, error TEXT,
+            enqueued_at REAL NOT NULL, updated_at REAL NOT NULL)""")
+        recovered = self.db.execute("UPDATE jobs SET status = 'pending', updated_at = ? WHERE status = 'running'", (time.time(),)).rowcount
+        if recovered: print(f"♻️ Re-queued {recovered} job(s) interrupted by a previous crash.")
+
+    def enqueue(self, kind, args):
+        now = time.time()
+        with self.lock:
+            job_id = self.db.execute("INSERT INTO jobs (kind, args, enqueued_at, updated_at) VALUES (?, ?, ?, ?)",
+                                     (kind, json.dumps(args), now, now)).lastrowid
+        print(f"📥 Queued {kind} job #{job_id}")
+        return job_id
+
+    def claim(self, kinds):
+        """Atomically takes the oldest pending job of one of `kinds`, or returns None."""
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            row = self.db.execute(f"SELECT * FROM jobs WHERE status = 'pending' AND kind IN ({', '.join('?' * len(kinds))}) ORDER BY id LIMIT 1",
+                                  tuple(kinds)).fetchone()
+            if row: self.db.execute("UPDATE jobs SET status = 'running', attempts = attempts + 1, updated_at = ? WHERE id = ?", (time.time(), row["id"]))
+            self.db.execute("COMMIT")
+        return row
+
+    def complete(self, job_id, result):
+        with self.lock:
+            self.db.execute("UPDATE jobs SET status = 'done', result = ?, error = NULL, updated_at = ? WHERE id = ?", (json.dumps(result), time.time(), job_id))
+
+    def fail(self, job_id, error):
+        with self.lock:
+            attempts = self.db.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()["attempts"]
+            status = "pending" if attempts < MAX_ATTEMPTS else "failed"
+            self.db.execute("UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?", (status, str(error)[:500], time.time(), job_id))
+        return status
+
+    def requeue(self, job_id):
+        """Puts back a job stopped by shutdown without counting the attempt against it."""
+        with self.lock:
+            self.db.execute("UPDATE jobs SET status = 'pending', attempts = MAX(attempts - 1, 0), updated_at = ? WHERE id = ?", (time.time(), job_id))
+
+    def items(self):
+        with self.lock:
+            return [dict(r) for r in self.db.execute("SELECT * FROM jobs ORDER BY id")]
+
+
+def warm_worker(home):
+    """Render worker initializer: imports and the TTS client are set up once per worker, not once per video."""
+    global _home
+    _home = home
+    # The daemon decides when jobs stop; a Ctrl+C or service stop must not kill a render half way.
+    signal.signal(signal.SIGINT, signal.SIG_IGN); signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    for name in WARM_IMPORTS:
+        try: importlib.import_module(name)
+        except ImportError as e: print(f"⚠️ Could not preload {name}: {e}")
+    if os.getenv("GCP_SA_KEY"):
+        from google_clients import tts_client
+        try: tts_client(os.environ["GCP_SA_KEY"])
+        except Exception as e: print(f"⚠️ Could not create the Text-to-Speech client: {e}")
+
+
+def render_job(kind, workdir, args):
+    """Runs one render job in a warm worker. Raises on failure so the daemon records it."""
+    try:
+        with metrics.run(f"daemon_{kind}"):
+            argv = ["--stream"] if args.get("stream") else []
+            result = run_deliverable(kind, workdir, args.get("headlines"), argv)
+            if not result["ok"]: raise RuntimeError(result["error"])
+        return result
+    finally:
+        os.chdir(_home)
+
+
+def upload_job(args):
+    """Uploads one finished video on a daemon thread, reusing that thread's authorized session."""
+    if not hasattr(_sessions, "session"): _sessions.session = authorized_session()
+    metadata = args["metadata"]
+    response = upload_video(args["video"], request_body_for(metadata, shorts=args.get("shorts", False)), session=_sessions.session)
+    # The video is live; failing to index its story must not fail the job and re-upload it.
+    try: record_published(metadata, kind="short" if args.get("shorts") else None)
+    except Exception as e: print(f"⚠️ Uploaded {response['id']}, but the story index was not updated: {e}")
+    return {"video_id": response["id"]}
+
+
+class Daemon:
+    """
+    Claims jobs from the queue and runs renders in warm worker processes and uploads on threads,
+    within the given concurrency limits. The first SIGTERM/SIGINT stops claiming and lets running
+    jobs finish; a second one re-queues them and stops immediately.
+    """
+    def __init__(self, queue, jobs=1, uploads=2, exit_when_idle=False, clean=False):
+        self.queue, self.jobs, self.uploads = queue, jobs, uploads
+        self.exit_when_idle, self.clean = exit_when_idle, clean
+        self.root = Path.cwd().resolve()
+        self.stopping, self.forced = threading.Event(), False
+        self.running = {}  # future -> job row
+        self.render_pool = self.upload_pool = None
+
+    def _signal(self, signum, frame):
+        if self.stopping.is_set():
+            self.forced = True; return
+        print(f"🛑 {signal.Signals(signum).name}: finishing {len(self.running)} running job(s); signal again to stop now.")
+        self.stopping.set()
+
+    def _start_render_pool(self):
+        self.render_pool = ProcessPoolExecutor(max_workers=self.jobs, mp_context=multiprocessing.get_context("spawn"),
+                                               initializer=warm_worker, initargs=(str(self.root),))
+
+    def _workdir(self, job):
+        workdir = DAEMON_DIR / f"job_{job['id']}"
+        shutil.rmtree(workdir, ignore_errors=True)
+        return prepare_workdir(workdir, self.root).resolve()
+
+    def _fill(self):
+        """Claims jobs until both pools are at their limit or nothing is pending."""
+        busy = lambda upload: sum((job["kind"] == UPLOAD_KIND) == upload for job in self.running.values())
+        while busy(False) < self.jobs and (job := self.queue.claim(tuple(DELIVERABLES))):
+            args = json.loads(job["args"])
+            print(f"🎬 [#{job['id']}] Rendering {job['kind']} (attempt {job['attempts'] + 1}/{MAX_ATTEMPTS})...")
+            self.running[self.render_pool.submit(render_job, job["kind"], str(self._workdir(job)), args)] = job
+        while busy(True) < self.uploads and (job := self.queue.claim((UPLOAD_KIND,))):
+            args = json.loads(job["args"])
+            print(f"📤 [#{job['id']}] Uploading {Path(args['video']).name} (attempt {job['attempts'] + 1}/{MAX_ATTEMPTS})...")
+            self.running[self.upload_pool.submit(upload_job, args)] = job
+
+    def _finish(self, future):
+        job = self.running.pop(future)
+        args = json.loads(job["args"])
+        try:
+            result = future.result()
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool) and not self.stopping.is_set():
+                # A worker died (usually the OOM killer); the pool cannot be reused, so start a fresh one.
+                self.render_pool.shutdown(wait=False); self._start_render_pool()
+            status = self.queue.fail(job["id"], e)
+            print(f"❌ [#{job['id']}] {job['kind']} failed ({'will retry' if status == 'pending' else 'giving up'}): {e}")
+            return
+        self.queue.complete(job["id"], result)
+        if job["kind"] == UPLOAD_KIND:
+            print(f"✅ [#{job['id']}] Uploaded Video ID: {result['video_id']}")
+            if self.clean and args.get("workdir"): shutil.rmtree(args["workdir"], ignore_errors=True)
+            return
+        print(f"✅ [#{job['id']}] {job['kind']} rendered to {result['video']} ({result['seconds']:.0f}s)")
+        if args.get("upload"):
+            self.queue.enqueue(UPLOAD_KIND, {"video": result["video"], "metadata": json.loads(Path(result["metadata"]).read_text()),
+                                             "shorts": job["kind"] == "short", "workdir": result["workdir"]})
+
+    def _abort(self):
+        for job in self.running.values(): self.queue.requeue(job["id"])
+        for child in multiprocessing.active_children(): child.kill()
+        print(f"🛑 Stopped now; re-queued {len(self.running)} running job(s).")
+        # Upload threads cannot be interrupted; their resumable sessions pick up where they stopped on the next run.
+        os._exit(130)
+
+    def run(self):
+        for signum in (signal.SIGTERM, signal.SIGINT): signal.signal(signum, self._signal)
+        self._start_render_pool()
+        self.upload_pool = ThreadPoolExecutor(max_workers=self.uploads, thread_name_prefix="upload")
+        print(f"👷 Worker daemon started: {self.jobs} render worker(s), {self.uploads} upload thread(s), queue {self.queue.path}")
+        while True:
+            if self.forced: self._abort()
+            if not self.stopping.is_set(): self._fill()
+            if not self.running:
+                if self.stopping.is_set() or self.exit_when_idle: break
+                time.sleep(POLL_SECONDS); continue
+            done, _ = wait(list(self.running), timeout=POLL_SECONDS, return_when=FIRST_COMPLETED)
+            for future in done: self._finish(future)
+        self.render_pool.shutdown(); self.upload_pool.shutdown()
+        print("👋 Worker daemon stopped.")
+
+
+def print_status(queue):
+    icons = {"pending": "⏳", "running": "⚙️", "done": "✅", "failed": "❌"}
+    items = queue.items()
+    if not items: print("📭 Job queue is empty."); return
+    for item in items:
+        result = json.loads(item["result"]) if item["result"] else {}
+        detail = result.get("video_id") or result.get("video") or item["error"] or ""
+        print(f"{icons.get(item['status'], '?')} #{item['id']:<4} {item['kind']:<8} {item['status']:<7} tries={item['attempts']}  {detail}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Long-running worker that renders and uploads queued videos.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    enqueue = sub.add_parser("enqueue", help="Queue a render or upload job.")
+    enqueue.add_argument("kind", choices=(*DELIVERABLES, UPLOAD_KIND))
+    enqueue.add_argument("video", nargs="?", help="Video to upload (upload jobs only).")
+    enqueue.add_argument("metadata", nargs="?", default="video_metadata.json", help="Its metadata (upload jobs only).")
+    enqueue.add_argument("--upload", action="store_true", help="Queue an upload once the render finishes.")
+    enqueue.add_argument("--headlines", help="Headlines JSON to use instead of fetching fresh ones.")
+    enqueue.add_argument("--stream", action="store_true", help="Pass --stream to the combined roundup.")
+    enqueue.add_argument("--shorts", action="store_true", help="Upload as a Short (upload jobs only).")
+    run = sub.add_parser("run", help="Claim and run jobs until stopped.")
+    run.add_argument("--jobs", type=int, default=1, help="Renders run concurrently, each in a warm worker process.")
+    run.add_argument("--uploads", type=int, default=2, help="Uploads run concurrently.")
+    run.add_argument("--exit-when-idle", action="store_true", help="Exit once nothing is pending or running.")
+    run.add_argument("--clean", action="store_true", help="Delete a job's working directory once its video is uploaded.")
+    sub.add_parser("status", help="Show every job and its status.")
+    args = parser.parse_args(argv)
+
+    queue = JobQueue()
+    if args.command == "enqueue":
+        if args.kind == UPLOAD_KIND:
+            if not args.video: parser.error("upload jobs need a video")
+            queue.enqueue(UPLOAD_KIND, {"video": str(Path(args.video).resolve()), "metadata": json.loads(Path(args.metadata).read_text()), "shorts": args.shorts})
+        else:
+            headlines = str(Path(args.headlines).resolve()) if args.headlines else None
+            queue.enqueue(args.kind, {"upload": args.upload, "headlines": headlines, "stream": args.stream})
+    elif args.command == "run":
+        Daemon(queue, args.jobs, args.uploads, args.exit_when_idle, args.clean).run()
+    else: print_status(queue)
+
+if __name__ == "__main__":
+    main()
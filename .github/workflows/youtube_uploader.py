@@ -0,0 +1,160 @@
+import os
+import json
+import time
+import random
+import hashlib
+from pathlib import Path
+import requests
+import metrics
+
+UPLOAD_ENDPOINT = os.getenv("YOUTUBE_UPLOAD_ENDPOINT", "https://www.googleapis.com/upload/youtube/v3/videos")
+TOKEN_URI = "https://oauth2.googleapis.com/token"
+SCOPES = ['https://www.googleapis.com/auth/youtube.upload']
+# Resumable chunks must be a multiple of 256 KiB.
+CHUNK_ALIGNMENT = 256 * 1024
+DEFAULT_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_MB", "16")) * 1024 * 1024
+MAX_RETRIES = 8
+RETRIABLE_STATUS = {500, 502, 503, 504}
+RETRIABLE_ERRORS = (requests.ConnectionError, requests.Timeout, ConnectionError, TimeoutError)
+# Session URIs are kept here so a restarted process resumes instead of re-sending every byte.
+SESSION_DIR = Path(".cache/upload_sessions")
+
+
+class UploadError(Exception):
+    """Non-retriable failure from the upload endpoint."""
+
+
+def request_body_for(metadata, shorts=False):
+    """videos.insert body from video_metadata.json; Shorts get '#Shorts' in the title within the 100-character limit."""
+    title = metadata['title']
+    if shorts and "#shorts" not in title.lower():
+        title = f"{title[:100 - len(' #Shorts')]} #Shorts"
+    return {
+        'snippet': {
+            'title': title,
+            'description': metadata['description'],
+            'tags': metadata['tags'],
+            'categoryId': '25'  # 'News & Politics'
+        },
+        'status': {
+            'privacyStatus': 'public'
+        }
+    }
+
+
+def youtube_credentials():
+    """OAuth credentials for the channel, from the YT_* secrets."""
+    from google.oauth2.credentials import Credentials
+    return Credentials(
+        None,
+        refresh_token=os.environ['YT_REFRESH_TOKEN'],
+        token_uri=TOKEN_URI,
+        client_id=os.environ['YT_CLIENT_ID'],
+        client_secret=os.environ['YT_CLIENT_SECRET'],
+        scopes=SCOPES,
+    )
+
+
+def authorized_session():
+    from google.auth.transport.requests import AuthorizedSession
+    return AuthorizedSession(youtube_credentials())
+
+
+def _session_file(video_path, body):
+    stat = Path(video_path).stat()
+    key = json.dumps([str(Path(video_path).resolve()), stat.st_size, int(stat.st_mtime), body], sort_keys=True)
+    return SESSION_DIR / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json"
+
+
+def _backoff(attempt, reason):
+    if attempt > MAX_RETRIES: raise UploadError(f"Giving up after {MAX_RETRIES} retries: {reason}")
+    metrics.inc("retries", operation="upload")
+    delay = min(2 ** attempt, 64) + random.random()
+    print(f"    ⚠️ {reason}. Retry {attempt}/{MAX_RETRIES} in {delay:.1f}s...")
+    time.sleep(delay)
+
+
+def _start_session(session, endpoint, body, total, timeout):
+    r = session.post(
+        endpoint, params={"uploadType": "resumable", "part": ",".join(body.keys())}, json=body, timeout=timeout,
+        headers={"X-Upload-Content-Type": "video/mp4", "X-Upload-Content-Length": str(total)},
+    )
+    if r.status_code != 200 or "Location" not in r.headers:
+        raise UploadError(f"Could not open an upload session ({r.status_code}): {r.text[:300]}")
+    return r.headers["Location"]
+
+
+def _committed_bytes(response):
+    """Bytes the server already holds, from a 308 response's Range header ('bytes=0-N')."""
+    byte_range = response.headers.get("Range")
+    return int(byte_range.rsplit("-", 1)[1]) + 1 if byte_range else 0
+
+
+def _query_offset(session, uri, total, timeout):
+    """Asks the server how much of the file it has. Returns None if the session is gone."""
+    r = session.put(uri, headers={"Content-Range": f"bytes */{total}"}, timeout=timeout)
+    if r.status_code in (200, 201): return total
+    if r.status_code == 308: return _committed_bytes(r)
+    if r.status_code in (404, 410): return None
+    if r.status_code in RETRIABLE_STATUS: raise requests.ConnectionError(f"status query returned {r.status_code}")
+    raise UploadError(f"Unexpected status query response ({r.status_code}): {r.text[:300]}")
+
+
+def upload_video(video_path, body, session=None, chunk_size=DEFAULT_CHUNK_SIZE, endpoint=UPLOAD_ENDPOINT, timeout=120):
+    """
+    Uploads a video with the YouTube resumable protocol in `chunk_size` pieces, retrying
+    5xx and socket errors with exponential backoff and reporting progress and throughput.
+    The session URI is persisted so a rerun after a crash continues where the last one stopped.
+    Returns the created video resource.
+    """
+    session = session or authorized_session()
+    chunk_size = max(CHUNK_ALIGNMENT, chunk_size // CHUNK_ALIGNMENT * CHUNK_ALIGNMENT)
+    total = Path(video_path).stat().st_size
+    state_path = _session_file(video_path, body)
+    uri, offset, attempt = None, 0, 0
+
+    if state_path.exists():
+        uri = json.loads(state_path.read_text())["uri"]
+        try: offset = _query_offset(session, uri, total, timeout)
+        except RETRIABLE_ERRORS: offset = None
+        if offset is None: print("    ⚠️ Saved upload session expired, starting a new one."); uri, offset = None, 0
+        else: print(f"♻️ Resuming upload at {offset / 1e6:.1f} / {total / 1e6:.1f} MB")
+    if not uri:
+        uri = _start_session(session, endpoint, body, total, timeout)
+        SESSION_DIR.mkdir(parents=True, exist_ok=True)
+        state_path.write_text(json.dumps({"uri": uri, "video": str(video_path)}))
+
+    started, sent_at_start = time.time(), offset
+    with open(video_path, "rb") as f:
+        while True:
+            f.seek(offset)
+            chunk = f.read(chunk_size)
+            headers = {"Content-Range": f"bytes {offset}-{offset + len(chunk) - 1}/{total}" if chunk else f"bytes */{total}"}
+            try:
+                r = session.put(uri, data=chunk, headers=headers, timeout=timeout)
+            except RETRIABLE_ERRORS as e:
+                attempt += 1; _backoff(attempt, f"Network error: {e}")
+                try: offset = _query_offset(session, uri, total, timeout)
+                except RETRIABLE_ERRORS: pass
+                if offset is None: raise UploadError("Upload session expired during retries.")
+                continue
+            if r.status_code in (200, 201):
+                elapsed = max(time.time() - started, 1e-6)
+                print(f"    📶 100% of {total / 1e6:.1f} MB, avg {(total - sent_at_start) / 1e6 / elapsed:.2f} MB/s")
+                state_path.unlink(missing_ok=True)
+                return r.json()
+            if r.status_code == 308:
+                offset, attempt = _committed_bytes(r), 0
+                elapsed = max(time.time() - started, 1e-6)
+                print(f"    📶 {offset * 100 / total:5.1f}% ({offset / 1e6:.1f}/{total / 1e6:.1f} MB) at {(offset - sent_at_start) / 1e6 / elapsed:.2f} MB/s")
+            elif r.status_code in RETRIABLE_STATUS:
+                attempt += 1; _backoff(attempt, f"Server error {r.status_code}")
+                try: offset = _query_offset(session, uri, total, timeout)
+                except RETRIABLE_ERRORS: pass
+                if offset is None: raise UploadError("Upload session expired during retries.")
+            elif r.status_code in (404, 410):
+                attempt += 1; _backoff(attempt, "Upload session expired, starting a new one")
+                uri, offset, started, sent_at_start = _start_session(session, endpoint, body, total, timeout), 0, time.time(), 0
+                state_path.write_text(json.dumps({"uri": uri, "video": str(video_path)}))
+            else:
+                raise UploadError(f"Upload failed ({r.status_code}): {r.text[:300]}")
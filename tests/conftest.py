@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The pipeline scripts run as `python .github/workflows/X.py` and import their siblings directly.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / ".github" / "workflows"))
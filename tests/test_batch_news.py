@@ -0,0 +1,32 @@
+from pathlib import Path
+
+import batch_news
+import create_news_video_shorts
+import visual_dedup
+
+
+class FakeShortPipeline:
+    """Stands in for the Short's graph: downloads the same photo every run and renders if it was kept."""
+    kept = []
+
+    def run(self):
+        Path("images").mkdir(exist_ok=True)
+        image = Path("images/img_000.jpg")
+        image.write_bytes(b"the same photo")
+        kept = not visual_dedup.drop_duplicate_image(str(image), "https://example.com/photo.jpg")
+        FakeShortPipeline.kept.append(kept)
+        if kept: Path(create_news_video_shorts.VIDEO_PATH).write_bytes(b"video")
+        return {"render": create_news_video_shorts.VIDEO_PATH if kept else None}
+
+
+def test_each_deliverable_in_a_worker_judges_duplicates_on_its_own(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(visual_dedup, "image_dhash", lambda path: 0x0123456789ABCDEF)
+    monkeypatch.setattr(create_news_video_shorts, "build_pipeline", lambda manifest: FakeShortPipeline())
+    FakeShortPipeline.kept = []
+
+    results = [batch_news.run_deliverable("short", batch_news.prepare_workdir(tmp_path / name, tmp_path)) for name in ("first", "second")]
+
+    assert FakeShortPipeline.kept == [True, True]
+    assert [result["ok"] for result in results] == [True, True]
+    assert (tmp_path / "second" / "images" / "img_000.jpg").exists()
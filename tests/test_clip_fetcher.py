@@ -0,0 +1,42 @@
+import time
+from pathlib import Path
+
+import pytest
+
+import clip_fetcher
+
+
+@pytest.fixture
+def fake_downloads(tmp_path, monkeypatch):
+    """Writes a clip per URL; URLs containing 'broken' fail like an unavailable video."""
+    calls = []
+    def fetch_clip(url, out_dir, start, duration, cookies=None):
+        calls.append(url)
+        time.sleep(0.01)
+        if "broken" in url: raise RuntimeError("Video unavailable")
+        path = Path(out_dir) / f"yt_{url}.mp4"
+        path.write_bytes(b"clip")
+        return str(path)
+    monkeypatch.setattr(clip_fetcher, "fetch_clip", fetch_clip)
+    return calls
+
+
+def test_fetches_only_as_many_clips_as_needed(tmp_path, fake_downloads):
+    clips = clip_fetcher.fetch_clips(["a", "b", "c", "d", "e"], tmp_path, 2)
+
+    assert clips == [str(tmp_path / "yt_a.mp4"), str(tmp_path / "yt_b.mp4")]
+    assert fake_downloads == ["a", "b"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["yt_a.mp4", "yt_b.mp4"]
+
+
+def test_failed_and_vetoed_clips_are_replaced_by_later_candidates(tmp_path, fake_downloads):
+    def accept(path, url):
+        """Vetoes 'c' as a duplicate, deleting it like drop_duplicate_clip does."""
+        if url != "c": return True
+        Path(path).unlink(); return False
+
+    clips = clip_fetcher.fetch_clips(["broken", "b", "c", "d", "e"], tmp_path, 2, accept=accept)
+
+    assert clips == [str(tmp_path / "yt_b.mp4"), str(tmp_path / "yt_d.mp4")]
+    assert sorted(fake_downloads) == ["b", "broken", "c", "d"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["yt_b.mp4", "yt_d.mp4"]
@@ -0,0 +1,51 @@
+import pytest
+
+import filtergraph as fg
+
+
+def slideshow():
+    """Pre-sized stills: the fit chains vanish and the format conversion moves past subtitles and logo."""
+    g = fg.Graph(optimize=True)
+    slides = [g.chain(g.input(f"i{i}.jpg", "-loop", "1", size=(1080, 1920)).video, *fg.cover(1080, 1920), label=f"v{i}") for i in range(2)]
+    raw = g.chain(slides, "concat=n=2:v=1:a=0", label="raw")
+    subbed = g.chain(raw, "ass='x.ass'", "format=yuv420p", label="sub")
+    logo = g.chain(g.input("logo.png").video, "scale=60:60", label="logo")
+    return g, [g.chain([subbed, logo], "overlay=90:90", label="v")]
+
+
+def transition():
+    """Per-input conversions feeding xfade collapse into one; repeated identical chains share a split."""
+    g = fg.Graph(optimize=True)
+    a, b = g.input("a.mp4"), g.input("b.mp4")
+    v0 = g.chain(a.video, "fps=30", "format=yuv420p", label="v0")
+    v1 = g.chain(b.video, "fps=30", "format=yuv420p", label="v1")
+    faded = g.chain([v0, v1], "xfade=transition=fade:duration=1:offset=4", label="outv")
+    left, right = g.chain(a.video, "scale=60:60", label="p"), g.chain(a.video, "scale=60:60", label="q")
+    return g, [faded, g.chain([left, right], "hstack", label="h")]
+
+
+def ladder():
+    """One decoded timeline split into 16:9 and 9:16 branches: the format conversion stops at the split."""
+    g = fg.Graph(optimize=True)
+    shots = [g.chain(g.input(f"i{i}.jpg", "-loop", "1", size=(1920, 1080)).video, *fg.fit(1920, 1080), "format=yuv420p", label=f"v{i}") for i in range(2)]
+    landscape, portrait = g.split(g.chain(shots, "concat=n=2:v=1:a=0", label="timeline"), 2)
+    wide = g.chain(landscape, "ass='x.ass'", label="wide")
+    tall = g.chain(portrait, "trim=duration=5", *fg.recrop(1080, 1920), "ass='y.ass'", label="tall")
+    return g, [wide, tall]
+
+
+GOLDENS = {
+    "slideshow": (slideshow, "[0:v][1:v]concat=n=2:v=1:a=0[raw];[raw]ass='x.ass'[sub];[2:v]scale=60:60[logo];"
+                             "[sub][logo]overlay=90:90,format=yuv420p[v]"),
+    "transition": (transition, "[0:v]fps=30[v0];[1:v]fps=30[v1];[v0][v1]xfade=transition=fade:duration=1:offset=4,format=yuv420p[outv];"
+                               "[0:v]scale=60:60[s0];[s0]split=2[p][q];[p][q]hstack[h]"),
+    "ladder": (ladder, "[0:v][1:v]concat=n=2:v=1:a=0,format=yuv420p[timeline];[timeline]split=2[s0][s1];[s0]ass='x.ass'[wide];"
+                       "[s1]trim=duration=5,crop='min(iw,ih*1080/1920)':'min(ih,iw*1920/1080)',scale=1080:1920,setsar=1,ass='y.ass'[tall]"),
+}
+
+
+@pytest.mark.parametrize("build, expected", GOLDENS.values(), ids=GOLDENS.keys())
+def test_optimized_graph_matches_golden(build, expected):
+    g, _ = build()
+
+    assert g.filter_complex() == expected
@@ -0,0 +1,115 @@
+import io
+
+import pytest
+
+import image_ingest
+from image_ingest import RejectedImage, fetch_image, sniff_format
+
+SVG = b'\xef\xbb\xbf\n<?xml version="1.0"?>\n<svg xmlns="http://www.w3.org/2000/svg" width="1920" height="1080"></svg>'
+HTML = b"<!DOCTYPE html><html><head><title>403 Forbidden</title></head><body>Access denied</body></html>"
+
+
+class FakeResponse:
+    """A streamed requests response over in-memory bytes, recording how much of the body was read."""
+    def __init__(self, body, headers):
+        self.body, self.headers, self.read = body, headers, 0
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): pass
+    def raise_for_status(self): pass
+
+    def iter_content(self, size):
+        for i in range(0, len(self.body), size):
+            self.read = i + size
+            yield self.body[i:i + size]
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    """Serves `body` with `headers` for the next fetch_image call and returns the response."""
+    def serve(body, headers=None):
+        response = FakeResponse(body, headers or {})
+        monkeypatch.setattr(image_ingest.requests, "get", lambda url, **kwargs: response)
+        return response
+    return serve
+
+
+@pytest.mark.parametrize("head, ext", [
+    (b"\xff\xd8\xff\xe0\x00\x10JFIF", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n\x00\x00", ".png"),
+    (b"RIFF\x00\x00\x00\x00WEBPVP8 ", ".webp"),
+    (b"GIF89a\x01\x00", ".gif"),
+    (SVG, ".svg"),
+    (b"<svg xmlns='http://www.w3.org/2000/svg'/>", ".svg"),
+    (b'<?xml version="1.0"?><rss version="2.0"></rss>', None),
+    (HTML, None),
+    (b"\x89PN", None),
+    (b"", None),
+])
+def test_sniff_format(head, ext):
+    assert sniff_format(head) == ext
+
+
+def test_non_image_content_type_is_rejected_before_the_body(serve, tmp_path):
+    response = serve(HTML, {"Content-Type": "text/html; charset=utf-8"})
+
+    with pytest.raises(RejectedImage, match="content type text/html"):
+        fetch_image("https://example.com/photo.jpg", tmp_path / "img_0")
+    assert response.read == 0
+
+
+@pytest.mark.parametrize("length", [image_ingest.MAX_IMAGE_BYTES + 1, image_ingest.MIN_IMAGE_BYTES - 1])
+def test_content_length_outside_the_limits_is_rejected(serve, tmp_path, length):
+    response = serve(b"\xff\xd8\xff" + b"\0" * 10, {"Content-Type": "image/jpeg", "Content-Length": str(length)})
+
+    with pytest.raises(RejectedImage, match=f"{length} bytes"):
+        fetch_image("https://example.com/photo.jpg", tmp_path / "img_0")
+    assert response.read == 0
+
+
+def test_html_body_behind_an_image_content_type_is_rejected(serve, tmp_path):
+    serve(HTML * 200, {"Content-Type": "application/octet-stream"})
+
+    with pytest.raises(RejectedImage, match="not a supported image format"):
+        fetch_image("https://example.com/photo.jpg", tmp_path / "img_0")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_svg_is_written_with_its_sniffed_extension(serve, tmp_path):
+    serve(SVG, {"Content-Type": "image/svg+xml", "Content-Length": str(len(SVG))})
+
+    path = fetch_image("https://example.com/logo", tmp_path / "img_0")
+
+    assert path == tmp_path / "img_0.svg"
+    assert path.read_bytes() == SVG
+
+
+def test_oversize_stream_is_abandoned_and_the_partial_file_deleted(serve, tmp_path, monkeypatch):
+    monkeypatch.setattr(image_ingest, "MAX_IMAGE_BYTES", 64 * 1024)
+    body = SVG[:-6] + b"<g/>" * 100_000 + b"</svg>"
+    response = serve(body, {"Content-Type": "image/svg+xml"})
+
+    with pytest.raises(RejectedImage, match="more than 65536 bytes"):
+        fetch_image("https://example.com/huge.svg", tmp_path / "img_0")
+    assert list(tmp_path.iterdir()) == []
+    assert response.read < len(body)
+
+
+def test_truncated_raster_header_is_rejected(serve, tmp_path):
+    pytest.importorskip("PIL")
+    serve(b"\xff\xd8\xff\xe0\x00\x10JFIF\x00" + b"\x01" * 200, {"Content-Type": "image/jpeg"})
+
+    with pytest.raises(RejectedImage, match="unreadable image header"):
+        fetch_image("https://example.com/photo.jpg", tmp_path / "img_0")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_small_raster_is_rejected_by_its_dimensions(serve, tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    buffer = io.BytesIO()
+    Image.effect_noise((320, 240), 64).convert("RGB").save(buffer, "png")
+    serve(buffer.getvalue(), {"Content-Type": "image/png"})
+
+    with pytest.raises(RejectedImage, match="320x240"):
+        fetch_image("https://example.com/icon.png", tmp_path / "img_0")
+    assert list(tmp_path.iterdir()) == []
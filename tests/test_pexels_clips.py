@@ -0,0 +1,64 @@
+import os
+import subprocess
+
+import create_news_video
+import pexels_clips
+
+
+def test_prune_deletes_least_recently_used_mezzanines(tmp_path, monkeypatch):
+    monkeypatch.setattr(pexels_clips, "MEZZANINE_DIR", tmp_path)
+    clips = []
+    for i in range(4):
+        path = tmp_path / f"{i}_1920x1080_0_5.mp4"
+        path.write_bytes(b"x" * 400 * 1024)
+        os.utime(path, (1000 + i, 1000 + i))
+        clips.append(path)
+    (tmp_path / "9_1920x1080_0_5.tmp.mp4").write_bytes(b"x" * 400 * 1024)
+    os.utime(clips[0], (2000, 2000))  # A cache hit makes the oldest clip the most recently used.
+
+    remaining = pexels_clips.prune_mezzanines(keep=clips[1], limit_mb=1)
+
+    assert remaining == 2 * 400 * 1024
+    assert sorted(p.name for p in tmp_path.glob("*.mp4")) == ["0_1920x1080_0_5.mp4", "1_1920x1080_0_5.mp4", "9_1920x1080_0_5.tmp.mp4"]
+
+
+class FakeResponse:
+    status_code, text = 200, ""
+    def __init__(self, videos): self.videos = videos
+    def raise_for_status(self): pass
+    def json(self): return {"videos": self.videos}
+
+
+class AllowAll:
+    def try_acquire(self, provider, units=1, operation=None): return True
+    def note_response(self, provider, response): return True
+
+
+class NoDuplicates:
+    def known_duplicate(self, url): return False
+    def save(self): pass
+
+
+def test_one_failed_mezzanine_skips_only_that_video(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for name in ("GNEWS_KEY", "GCP_API_KEY", "GCP_SA_KEY", "GSEARCH_CSE_ID", "PEXELS_API_KEY"): monkeypatch.setenv(name, "x")
+    cfg = create_news_video.Config()
+    cfg.video_clip_dir.mkdir()
+    searches = []
+    def get(url, headers=None, params=None, timeout=None):
+        searches.append(params["query"]); return FakeResponse([{"id": i, "url": f"https://pexels.com/video/{i}"} for i in (1, 2, 3)])
+    def mezzanine_clip(video, duration):
+        if video["id"] == 1: raise subprocess.CalledProcessError(1, ["ffmpeg"])
+        path = tmp_path / f"mezzanine_{video['id']}.mp4"
+        path.write_bytes(b"clip"); return path
+    monkeypatch.setattr(create_news_video.requests, "get", get)
+    monkeypatch.setattr(create_news_video, "ledger", lambda: AllowAll())
+    monkeypatch.setattr(create_news_video, "visual_index", lambda: NoDuplicates())
+    monkeypatch.setattr(create_news_video, "drop_duplicate_clip", lambda path, url=None: False)
+    monkeypatch.setattr(create_news_video, "extract_keywords", lambda query: "storm coast")
+    monkeypatch.setattr(create_news_video, "mezzanine_clip", mezzanine_clip)
+
+    clips = create_news_video.search_and_download_pexels_videos("Storm hits the coast", cfg)
+
+    assert clips == [str(cfg.video_clip_dir / "px_clip_2.mp4"), str(cfg.video_clip_dir / "px_clip_3.mp4")]
+    assert searches == ["Storm hits the coast"]
@@ -0,0 +1,19 @@
+from pipeline import Pipeline, Stage
+from render_cost import Planned
+from run_manifest import RunManifest
+
+
+def test_planned_render_is_not_recorded(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "voice.mp3").write_bytes(b"voice")
+    manifest = RunManifest()
+    results = Pipeline([
+        Stage("voice", lambda: "voice.mp3", outputs=lambda r: [r]),
+        Stage("render", lambda voice: Planned("final_content.mp4"), deps=["voice"], outputs=lambda r: [r]),
+        Stage("upload", lambda render: f"uploaded {render}", deps=["render"]),
+    ], manifest=manifest).run()
+
+    assert results["render"] == "final_content.mp4" and isinstance(results["render"], Planned)
+    assert results["upload"] == "uploaded final_content.mp4"
+    stages = RunManifest().stages
+    assert "voice" in stages and "render" not in stages
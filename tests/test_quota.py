@@ -0,0 +1,95 @@
+import datetime
+import types
+
+import pytest
+
+import quota
+
+# 10:00 Pacific time.
+START = datetime.datetime(2026, 10, 19, 10, 0, tzinfo=quota.QUOTA_TZ).timestamp()
+
+
+class FakeClock:
+    """Stands in for the time and datetime modules: sleeping advances the clock instead of waiting."""
+    def __init__(self, now):
+        self.now, self.slept = now, []
+        self.datetime = types.SimpleNamespace(now=lambda tz: datetime.datetime.fromtimestamp(self.now, tz))
+
+    def time(self): return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds); self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock(START)
+    monkeypatch.setattr(quota, "time", clock)
+    monkeypatch.setattr(quota, "datetime", clock)
+    return clock
+
+
+@pytest.fixture
+def ledger(tmp_path, clock):
+    return quota.QuotaLedger(tmp_path / "quota_ledger.json")
+
+
+def test_burst_is_spent_then_refilled_at_the_provider_rate(ledger, clock):
+    burst, rate = quota.PROVIDERS["gnews"]["burst"], quota.PROVIDERS["gnews"]["rate_per_min"]
+
+    assert all(ledger.try_acquire("gnews") for _ in range(burst))
+    assert clock.slept == []
+    assert ledger.try_acquire("gnews")
+    assert sum(clock.slept) == pytest.approx(60 / rate)
+
+    clock.now += 3600
+    assert all(ledger.try_acquire("gnews") for _ in range(burst))
+    assert sum(clock.slept) == pytest.approx(60 / rate)
+    assert ledger.remaining("gnews") == quota.PROVIDERS["gnews"]["budget"] - 2 * burst - 1
+
+
+def test_throttle_longer_than_the_limit_degrades_instead_of_waiting(ledger, clock, monkeypatch):
+    monkeypatch.setattr(quota, "MAX_THROTTLE_SECONDS", 5)
+    for _ in range(quota.PROVIDERS["gnews"]["burst"]): ledger.try_acquire("gnews")
+
+    assert not ledger.try_acquire("gnews")
+    assert clock.slept == []
+
+
+def test_daily_budget_resets_at_midnight_pacific(ledger, clock, tmp_path):
+    assert ledger.try_acquire("youtube", operation="search")
+    assert ledger.remaining("youtube") == quota.PROVIDERS["youtube"]["budget"] - 100
+    assert ledger.try_acquire("gnews", units=quota.PROVIDERS["gnews"]["budget"])
+    assert not ledger.try_acquire("gnews")
+    # The ledger is shared through its file, so a later run sees the spent budget too.
+    assert not quota.QuotaLedger(tmp_path / "quota_ledger.json").try_acquire("gnews")
+
+    clock.now += 13 * 3600 + 59 * 60
+    assert not ledger.try_acquire("gnews")
+    clock.now += 60
+    assert ledger.try_acquire("gnews")
+    assert ledger.remaining("youtube") == quota.PROVIDERS["youtube"]["budget"]
+
+
+def test_rejected_provider_backs_off_until_its_window_resets(ledger, clock):
+    ledger.note_rejected("pexels")
+
+    assert not ledger.try_acquire("pexels")
+    assert ledger.remaining("pexels") == 0
+    assert ledger.try_acquire("gnews")
+
+    clock.now += 3600
+    assert ledger.try_acquire("pexels")
+
+
+def test_quota_error_responses_mark_the_provider_exhausted(ledger):
+    ok = types.SimpleNamespace(status_code=200, text="")
+    forbidden = types.SimpleNamespace(status_code=403, text="Forbidden")
+    quota_exceeded = types.SimpleNamespace(status_code=403, text='{"reason": "quotaExceeded"}')
+
+    assert ledger.note_response("cse", ok) and ledger.note_response("cse", forbidden)
+    assert ledger.try_acquire("cse")
+    assert not ledger.note_response("cse", quota_exceeded)
+    assert not ledger.try_acquire("cse")
+    assert not ledger.note_response("gemini", types.SimpleNamespace(status_code=429, text=""))
+    assert not ledger.try_acquire("gemini")
@@ -0,0 +1,85 @@
+from pathlib import Path
+
+import pytest
+
+from pipeline import Pipeline, Stage
+from run_manifest import RunManifest
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def counted(calls, name, fn):
+    def run(*args):
+        calls.append(name); return fn(*args)
+    return run
+
+
+def test_resumed_stage_is_skipped_until_its_inputs_change():
+    calls = []
+    write = counted(calls, "voice", lambda: Path("voice.mp3").write_text("hello") and "voice.mp3")
+    RunManifest().stage("voice", write, inputs=["hello"], outputs=lambda r: [r])
+
+    assert RunManifest().stage("voice", write, inputs=["hello"], outputs=lambda r: [r]) == "voice.mp3"
+    assert calls == ["voice"]
+    RunManifest().stage("voice", write, inputs=["hello again"], outputs=lambda r: [r])
+    assert calls == ["voice", "voice"]
+
+
+def test_missing_or_changed_output_reruns_the_stage():
+    calls = []
+    write = counted(calls, "voice", lambda: Path("voice.mp3").write_text("hello") and "voice.mp3")
+    RunManifest().stage("voice", write, outputs=lambda r: [r])
+
+    Path("voice.mp3").unlink()
+    RunManifest().stage("voice", write, outputs=lambda r: [r])
+    Path("voice.mp3").write_text("edited by hand")
+    RunManifest().stage("voice", write, outputs=lambda r: [r])
+
+    assert calls == ["voice", "voice", "voice"]
+
+
+def test_fresh_and_finished_runs_start_over():
+    calls = []
+    fetch = counted(calls, "story", lambda: "Storm hits the coast")
+    RunManifest().stage("story", fetch)
+
+    fresh = RunManifest(fresh=True)
+    assert fresh.is_new and fresh.stages == {}
+    fresh.stage("story", fetch)
+    fresh.finish()
+    assert RunManifest().is_new
+    assert calls == ["story", "story"]
+
+
+def test_failed_stage_is_not_recorded():
+    RunManifest().stage("story", lambda: None)
+
+    assert RunManifest().stages == {}
+
+
+def test_changed_upstream_reruns_downstream_stages():
+    calls = []
+    def pipeline(text):
+        return Pipeline([
+            Stage("voice", counted(calls, "voice", lambda: Path("voice.mp3").write_text(text) and "voice.mp3"), inputs=[text], outputs=lambda r: [r]),
+            Stage("images", counted(calls, "images", lambda: ["img_000.jpg"])),
+            Stage("render", counted(calls, "render", lambda voice, images: "final_content.mp4"), deps=["voice", "images"]),
+        ], manifest=RunManifest())
+
+    pipeline("Storm hits the coast").run()
+    pipeline("Storm hits the coast").run()
+    assert sorted(calls) == ["images", "render", "voice"]
+
+    del calls[:]
+    pipeline("Storm hits the coast, thousands without power").run()
+    assert sorted(calls) == ["render", "voice"]
+
+    # A hand-edited output re-runs its stage; the rerun writes the same narration back, so the render stays valid.
+    del calls[:]
+    Path("voice.mp3").write_text("edited by hand")
+    pipeline("Storm hits the coast, thousands without power").run()
+    assert calls == ["voice"]
@@ -0,0 +1,60 @@
+import time
+
+import story_index
+from story_index import StoryIndex, canonical_url, record_published, simhash
+
+HEADLINE = "Powerful storm batters the Gulf Coast, leaving thousands without power overnight"
+BODY = "Emergency crews worked through the night as the storm brought flooding and high winds to coastal towns."
+
+
+def metadata(kind, url="https://www.example.com/news/storm?utm_source=rss", title=HEADLINE):
+    return {"kind": kind, "title": title, "sources": [{"url": url, "title": title, "description": BODY}]}
+
+
+def test_canonical_url_drops_tracking_and_mobile_variants():
+    expected = "https://example.com/news/storm?id=7"
+
+    assert canonical_url("http://www.example.com/news/storm/?id=7&utm_source=rss&fbclid=abc") == expected
+    assert canonical_url("https://m.example.com/news/storm/amp?gclid=1&id=7#comments") == expected
+    assert canonical_url("") == ""
+
+
+def test_url_differing_only_by_tracking_parameters_is_published(tmp_path, monkeypatch):
+    monkeypatch.setattr(story_index, "STORY_INDEX_DIR", tmp_path)
+    record_published(metadata("single"))
+
+    assert StoryIndex("single").is_published("https://example.com/news/storm?utm_campaign=daily&ocid=x", "A different headline entirely")
+
+
+def test_near_duplicate_headline_is_published(tmp_path, monkeypatch):
+    monkeypatch.setattr(story_index, "STORY_INDEX_DIR", tmp_path)
+    record_published(metadata("single"))
+    reworded = HEADLINE.replace("Powerful", "Strong")
+
+    assert bin(simhash(f"{HEADLINE}\n{BODY}") ^ simhash(f"{reworded}\n{BODY}")).count("1") <= story_index.MAX_HAMMING_DISTANCE
+    assert StoryIndex("single").is_published("https://other.example.org/a", reworded, BODY)
+    assert not StoryIndex("single").is_published("https://other.example.org/b", "Central bank holds interest rates steady", "Markets rallied.")
+
+
+def test_each_kind_has_its_own_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(story_index, "STORY_INDEX_DIR", tmp_path)
+    record_published(metadata("single"))
+
+    # The long-form video's story is still fair game for a Short, once.
+    assert StoryIndex("single").is_published("https://example.com/news/storm", HEADLINE, BODY)
+    assert not StoryIndex("short").is_published("https://example.com/news/storm", HEADLINE, BODY)
+    assert not StoryIndex("combined").is_published("https://example.com/news/storm", HEADLINE, BODY)
+
+    record_published(metadata("single"), kind="short")
+
+    assert StoryIndex("short").is_published("https://example.com/news/storm", HEADLINE, BODY)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["story_index_short.json", "story_index_single.json"]
+
+
+def test_old_entries_expire(tmp_path, monkeypatch):
+    monkeypatch.setattr(story_index, "STORY_INDEX_DIR", tmp_path)
+    record_published(metadata("single"))
+    later = time.time() + (story_index.MAX_AGE_DAYS + 1) * 86400
+    monkeypatch.setattr(story_index.time, "time", lambda: later)
+
+    assert not StoryIndex("single").is_published("https://example.com/news/storm", HEADLINE, BODY)
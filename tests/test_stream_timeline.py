@@ -0,0 +1,43 @@
+import subprocess
+
+import pytest
+
+import create_combined_news
+
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path, monkeypatch):
+    """Stands in for the remux: copies the segment's bytes to stdout, or writes half of them and fails for 'bad' segments."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(create_combined_news, "get_media_duration", lambda path: 2.0)
+
+    def run(cmd, stdout=None, check=False):
+        data = (tmp_path / cmd[cmd.index("-i") + 1]).read_bytes()
+        if b"bad" in data:
+            stdout.write(data[:len(data) // 2]); stdout.flush()
+            raise subprocess.CalledProcessError(1, cmd)
+        stdout.write(data); stdout.flush()
+    monkeypatch.setattr(create_combined_news.subprocess, "run", run)
+
+    def segment(name, data):
+        (tmp_path / name).write_bytes(data)
+        return name
+    return segment
+
+
+def test_failed_append_keeps_the_other_segments(fake_ffmpeg, tmp_path):
+    first = create_combined_news.append_segment(fake_ffmpeg("segment_0.ts", b"first segment|"))
+    second = create_combined_news.append_segment(fake_ffmpeg("segment_1.ts", b"bad segment that breaks the remux|"), first)
+    third = create_combined_news.append_segment(fake_ffmpeg("segment_2.ts", b"third segment|"), second)
+
+    assert second == first
+    assert third == {"bytes": len(b"first segment|third segment|"), "duration": 4.0}
+    assert (tmp_path / create_combined_news.TIMELINE_TS_PATH).read_bytes() == b"first segment|third segment|"
+
+
+def test_missing_previous_does_not_restart_the_timeline(fake_ffmpeg, tmp_path):
+    first = create_combined_news.append_segment(fake_ffmpeg("segment_0.ts", b"first segment|"))
+
+    assert create_combined_news.append_segment(fake_ffmpeg("segment_1.ts", b"second segment|"), None) is None
+    assert first["bytes"] == len(b"first segment|")
+    assert (tmp_path / create_combined_news.TIMELINE_TS_PATH).read_bytes() == b"first segment|"
@@ -0,0 +1,40 @@
+import pytest
+
+from timeline import MIN_SHOT_SECONDS, plan_timeline
+
+# (natural seconds, is_image) per asset, narration seconds, expected shot seconds.
+PLANS = {
+    "stills_cut_short": ([(6, True), (6, True), (10, False)], 31, [6, 6, 10, 6, 3]),
+    "short_tail_absorbed": ([(6, True), (10, False)], 12.5, [6, 6.5]),
+    "short_tail_borrows": ([(6, True), (10, False)], 16.5, [6, 9, 1.5]),
+    # The tail clip has only 0.8s of footage, so it cannot be stretched to the minimum.
+    "tail_clip_cannot_stretch": ([(10, False), (0.8, False)], 10.5, [9.7, 0.8]),
+    # The shot lending time to the tail never drops below the minimum itself.
+    "lender_keeps_min_shot": ([(2, False), (10, False)], 2.5, [1.5, 1.0]),
+    "single_still": ([(6, True)], 1.0, [1.0]),
+    "single_clip_loops": ([(10, False)], 25, [10, 10, 5]),
+    "zero_length_asset_skipped": ([(6, True), (0, True), (4, False)], 9, [6, 3]),
+}
+
+
+def plan(assets, duration):
+    return plan_timeline([(f"asset_{i}", seconds, is_image) for i, (seconds, is_image) in enumerate(assets)], duration)
+
+
+@pytest.mark.parametrize("assets, duration, expected", PLANS.values(), ids=PLANS.keys())
+def test_plan_covers_the_narration_exactly(assets, duration, expected):
+    timeline = plan(assets, duration)
+
+    assert [round(shot.seconds, 3) for shot in timeline.shots] == expected
+    assert timeline.total == pytest.approx(duration)
+
+
+@pytest.mark.parametrize("name", ["stills_cut_short", "short_tail_absorbed", "short_tail_borrows"])
+def test_plan_has_no_shot_under_the_minimum_when_it_can_be_avoided(name):
+    assets, duration, _ = PLANS[name]
+
+    assert min(shot.seconds for shot in plan(assets, duration).shots) >= MIN_SHOT_SECONDS
+
+
+def test_no_usable_assets_plan_nothing():
+    assert plan([(0, True), (None, False)], 10).shots == []
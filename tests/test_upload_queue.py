@@ -0,0 +1,49 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import pytest
+
+import upload_queue
+import worker_daemon
+
+METADATA = {"kind": "single", "title": "Storm hits the coast", "description": "d", "tags": ["news"], "sources": []}
+
+
+@pytest.fixture
+def uploads(monkeypatch):
+    """Counts uploads; recording the story in the index always fails (e.g. a full disk)."""
+    calls = []
+    def upload_video(path, body, session=None):
+        calls.append(path); return {"id": f"video-{len(calls)}"}
+    def record_published(metadata, kind=None):
+        raise OSError("No space left on device")
+    for module in (upload_queue, worker_daemon):
+        monkeypatch.setattr(module, "upload_video", upload_video)
+        monkeypatch.setattr(module, "authorized_session", lambda: None)
+        monkeypatch.setattr(module, "record_published", record_published)
+    return calls
+
+
+def test_queue_never_reuploads_when_recording_the_story_fails(tmp_path, uploads):
+    queue = upload_queue.UploadQueue(tmp_path / "uploads.sqlite")
+    queue.enqueue(tmp_path / "final_news.mp4", METADATA)
+
+    worker = upload_queue.UploadWorker(queue, concurrency=1).start()
+    worker.drain()
+
+    assert uploads == [str(tmp_path / "final_news.mp4")]
+    assert [(item["status"], item["video_id"]) for item in queue.items()] == [("done", "video-1")]
+
+
+def test_daemon_never_reuploads_when_recording_the_story_fails(tmp_path, uploads):
+    queue = worker_daemon.JobQueue(tmp_path / "jobs.sqlite")
+    queue.enqueue(worker_daemon.UPLOAD_KIND, {"video": "final_news.mp4", "metadata": METADATA})
+    daemon = worker_daemon.Daemon(queue)
+    daemon.upload_pool = ThreadPoolExecutor(max_workers=1)
+
+    daemon._fill()
+    for future in wait(list(daemon.running)).done: daemon._finish(future)
+    daemon.upload_pool.shutdown()
+
+    assert uploads == ["final_news.mp4"]
+    assert [(item["status"], item["result"]) for item in queue.items()] == [("done", '{"video_id": "video-1"}')]
+    assert queue.claim((worker_daemon.UPLOAD_KIND,)) is None
@@ -0,0 +1,146 @@
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import youtube_uploader
+from youtube_uploader import CHUNK_ALIGNMENT, UploadError, upload_video
+
+BODY = youtube_uploader.request_body_for({"title": "Storm hits the coast", "description": "d", "tags": ["news"]})
+
+
+class FakeUploadHandler(BaseHTTPRequestHandler):
+    """The parts of the YouTube resumable upload protocol the uploader uses."""
+    def log_message(self, *args): pass
+
+    def _reply(self, status, headers=(), body=None):
+        data = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.send_response(status)
+        for name, value in headers: self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_POST(self):
+        server = self.server
+        self._read_body()
+        with server.lock:
+            session_id = str(sum(kind == "start" for kind, _, _ in server.requests))
+            server.sessions[session_id] = bytearray()
+            server.requests.append(("start", session_id, None))
+        self._reply(200, [("Location", f"http://127.0.0.1:{server.server_port}/upload/{session_id}")])
+
+    def do_PUT(self):
+        server = self.server
+        session_id = self.path.rsplit("/", 1)[1]
+        data = self._read_body()
+        start, total = re.match(r"bytes (\d+|\*)-?\d*/(\d+)", self.headers["Content-Range"]).groups()
+        with server.lock:
+            received = server.sessions.get(session_id)
+            if start == "*":
+                server.requests.append(("query", session_id, None))
+            else:
+                server.requests.append(("chunk", session_id, int(start)))
+                fault = server.faults.pop(len([r for r in server.requests if r[0] == "chunk"]), None)
+                if fault == 404: server.sessions.pop(session_id, None); received = None
+                elif fault: return self._reply(fault)
+                elif received is not None and int(start) == len(received): received += data
+        if received is None: return self._reply(404)
+        if len(received) == int(total): return self._reply(201, body={"id": f"video-{session_id}", "bytes": len(received)})
+        self._reply(308, [("Range", f"bytes=0-{len(received) - 1}")] if received else [])
+
+
+@pytest.fixture
+def fake_youtube(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(youtube_uploader.time, "sleep", lambda seconds: None)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeUploadHandler)
+    server.lock, server.sessions, server.requests, server.faults = threading.Lock(), {}, [], {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown(); server.server_close()
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "final_news.mp4"
+    path.write_bytes(bytes(range(256)) * (3 * CHUNK_ALIGNMENT // 256) + b"tail")
+    return path
+
+
+def upload(server, video):
+    endpoint = f"http://127.0.0.1:{server.server_port}/upload/youtube/v3/videos"
+    return upload_video(video, BODY, session=requests.Session(), chunk_size=CHUNK_ALIGNMENT, endpoint=endpoint, timeout=5)
+
+
+def chunk_offsets(server):
+    return [offset for kind, _, offset in server.requests if kind == "chunk"]
+
+
+def test_upload_sends_aligned_chunks(fake_youtube, video):
+    response = upload(fake_youtube, video)
+
+    assert response == {"id": "video-0", "bytes": video.stat().st_size}
+    assert chunk_offsets(fake_youtube) == [0, CHUNK_ALIGNMENT, 2 * CHUNK_ALIGNMENT, 3 * CHUNK_ALIGNMENT]
+    assert fake_youtube.sessions["0"] == video.read_bytes()
+    assert not list(youtube_uploader.SESSION_DIR.iterdir())
+
+
+def test_interrupted_upload_resumes_from_the_saved_session(fake_youtube, video):
+    fake_youtube.faults[3] = 400
+    with pytest.raises(UploadError):
+        upload(fake_youtube, video)
+    assert len(list(youtube_uploader.SESSION_DIR.iterdir())) == 1
+
+    del fake_youtube.requests[:]
+    response = upload(fake_youtube, video)
+
+    # The rerun asks the saved session how far it got (308 + Range) instead of opening a new one.
+    assert response["id"] == "video-0"
+    assert [kind for kind, _, _ in fake_youtube.requests][:2] == ["query", "chunk"]
+    assert chunk_offsets(fake_youtube) == [2 * CHUNK_ALIGNMENT, 3 * CHUNK_ALIGNMENT]
+    assert fake_youtube.sessions["0"] == video.read_bytes()
+
+
+def test_server_errors_are_retried_from_the_committed_offset(fake_youtube, video):
+    fake_youtube.faults.update({2: 503, 3: 502})
+
+    response = upload(fake_youtube, video)
+
+    assert response["id"] == "video-0"
+    assert chunk_offsets(fake_youtube) == [0, CHUNK_ALIGNMENT, CHUNK_ALIGNMENT, CHUNK_ALIGNMENT, 2 * CHUNK_ALIGNMENT, 3 * CHUNK_ALIGNMENT]
+    assert fake_youtube.sessions["0"] == video.read_bytes()
+
+
+def test_expired_session_restarts_the_upload(fake_youtube, video):
+    fake_youtube.faults[3] = 404
+
+    response = upload(fake_youtube, video)
+
+    assert response["id"] == "video-1"
+    assert [kind for kind, _, _ in fake_youtube.requests].count("start") == 2
+    assert chunk_offsets(fake_youtube)[3:] == [0, CHUNK_ALIGNMENT, 2 * CHUNK_ALIGNMENT, 3 * CHUNK_ALIGNMENT]
+    assert fake_youtube.sessions["1"] == video.read_bytes()
+
+
+def test_retries_give_up_after_max_retries(fake_youtube, video, monkeypatch):
+    monkeypatch.setattr(youtube_uploader, "MAX_RETRIES", 2)
+    fake_youtube.faults.update({n: 503 for n in range(1, 5)})
+
+    with pytest.raises(UploadError, match="Giving up after 2 retries"):
+        upload(fake_youtube, video)
+
+
+def test_shorts_title_gets_the_tag_within_the_title_limit():
+    metadata = {"title": "x" * 100, "description": "d", "tags": ["news"]}
+
+    assert youtube_uploader.request_body_for(metadata)["snippet"]["title"] == "x" * 100
+    assert youtube_uploader.request_body_for(metadata, shorts=True)["snippet"]["title"] == "x" * 92 + " #Shorts"
+    assert youtube_uploader.request_body_for({**metadata, "title": "Storm #shorts"}, shorts=True)["snippet"]["title"] == "Storm #shorts"